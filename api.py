@@ -0,0 +1,257 @@
+"""Read-only HTTP API over the scraped contests, served from the same dataset store as app.py.
+
+    python api.py --port 8000
+
+    GET /contests?category=...&target=...&sort=deadline&page=1&page_size=50&fields=Title,Link,D-Day
+    GET /competitions?tag=Biology&tag=Chemistry&sort=title&order=desc
+    GET /contests?as_of=2025-05-01           # the snapshot history as of a date
+    GET /health
+    GET /metrics
+
+Filter parameters can be repeated or comma-separated; a row matches any of the
+values given for a parameter and every parameter given. Responses are JSON,
+gzip-compressed when the client accepts it, and carry an ETag; a matching
+If-None-Match gets a 304 without the query being run.
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import logging
+import os
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import numpy as np
+
+from scraper import metrics
+from scraper.dataset import DatasetStore
+from scraper.utils import days_until_deadline
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+# Smaller bodies are not worth compressing
+GZIP_MIN_BYTES = 1024
+
+# {path: how to query it}; filters map query parameters to indexed columns
+RESOURCES = {
+    'contests': {
+        'file': "contests_korea.json",
+        'filters': {'category': 'Category', 'target': 'Target'},
+        'sorts': {'deadline': None, 'title': 'Title', 'category': 'Category', 'organization': 'Organization'},
+        'default_sort': 'deadline',
+    },
+    'competitions': {
+        'file': "ics_competitions.json",
+        'filters': {'tag': 'Categories'},
+        'sorts': {'title': 'Title'},
+        'default_sort': 'title',
+    },
+}
+
+
+def split_values(values):
+    """Repeated and comma-separated parameter values as one list."""
+    return [v.strip() for value in values for v in value.split(',') if v.strip()]
+
+
+def parse_query(resource, query):
+    """Validate a parsed query string into {filters, sort, order, page, page_size, fields}; raises ValueError."""
+    spec = RESOURCES[resource]
+    known = set(spec['filters']) | {'sort', 'order', 'page', 'page_size', 'fields', 'as_of'}
+    unknown = sorted(set(query) - known)
+    if unknown:
+        raise ValueError(f"unknown parameter(s): {', '.join(unknown)}")
+    sort = query.get('sort', [spec['default_sort']])[-1]
+    if sort not in spec['sorts']:
+        raise ValueError(f"sort must be one of {', '.join(spec['sorts'])}")
+    order = query.get('order', ['asc'])[-1]
+    if order not in ('asc', 'desc'):
+        raise ValueError("order must be asc or desc")
+    try:
+        page = int(query.get('page', ['1'])[-1])
+        page_size = int(query.get('page_size', [str(DEFAULT_PAGE_SIZE)])[-1])
+    except ValueError:
+        raise ValueError("page and page_size must be integers")
+    if page < 1 or not 1 <= page_size <= MAX_PAGE_SIZE:
+        raise ValueError(f"page must be >= 1 and page_size between 1 and {MAX_PAGE_SIZE}")
+    return {
+        'filters': {param: sorted(split_values(query.get(param, []))) for param in spec['filters']},
+        'sort': sort,
+        'order': order,
+        'page': page,
+        'page_size': page_size,
+        'fields': split_values(query.get('fields', [])),
+        'as_of': query.get('as_of', [None])[-1],
+    }
+
+
+def sort_order(dataset, resource, sort, order):
+    """All row positions in the requested order; computed once per data version."""
+    def build():
+        column = RESOURCES[resource]['sorts'][sort]
+        df = dataset.df
+        if column is None:
+            # Soonest deadline first; contests that already closed go last
+            days = days_until_deadline(df['D-Day'].fillna(0).to_numpy())
+            positions = np.lexsort((days, days < 0))
+        else:
+            positions = df[column].sort_values(kind='stable', na_position='last').index.to_numpy()
+        if order == 'desc':
+            positions = positions[::-1]
+        positions = np.ascontiguousarray(positions)
+        positions.flags.writeable = False
+        return positions
+    return dataset.derive(('api_order', sort, order), build)
+
+
+def run_query(dataset, resource, params):
+    """The response payload for validated params against one dataset version."""
+    spec = RESOURCES[resource]
+    if not len(dataset):
+        ordered = np.empty(0, dtype=np.int64)
+    else:
+        selections = {spec['filters'][p]: values for p, values in params['filters'].items()}
+        matched = dataset.positions(selections)
+        ordered = sort_order(dataset, resource, params['sort'], params['order'])
+        if matched is not None:
+            ordered = ordered[np.isin(ordered, matched, assume_unique=True)]
+
+    fields = params['fields']
+    if fields and len(dataset):
+        missing = [f for f in fields if f not in dataset.df.columns]
+        if missing:
+            raise ValueError(f"unknown field(s): {', '.join(missing)}")
+    start = (params['page'] - 1) * params['page_size']
+    items = []
+    for pos in ordered[start:start + params['page_size']]:
+        record = dataset.record(pos)
+        items.append({f: record.get(f) for f in fields} if fields else record)
+    return {
+        'version': dataset.version,
+        'last_scraped': dataset.last_scraped,
+        'total': int(len(ordered)),
+        'page': params['page'],
+        'page_size': params['page_size'],
+        'pages': max(1, -(-len(ordered) // params['page_size'])),
+        'items': items,
+    }
+
+
+def make_etag(version, resource, params):
+    """Weak ETag for a query against one data version; it changes whenever the data does."""
+    canonical = json.dumps([resource, params], sort_keys=True, ensure_ascii=False)
+    digest = hashlib.sha1(canonical.encode('utf-8')).hexdigest()[:16]
+    return f'W/"{version}-{digest}"'
+
+
+def etag_matches(header, etag):
+    if not header:
+        return False
+    return header.strip() == '*' or etag in [tag.strip() for tag in header.split(',')]
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} {format % args}")
+
+    def do_GET(self):
+        started = time.perf_counter()
+        url = urlparse(self.path)
+        resource = url.path.strip('/') or 'health'
+        status = self.handle_path(resource, parse_qs(url.query))
+        label = resource if resource in RESOURCES or resource in ('health', 'metrics') else 'other'
+        metrics.API_REQUESTS.inc(resource=label, status=status)
+        metrics.API_SECONDS.observe(time.perf_counter() - started, resource=label)
+
+    def handle_path(self, resource, query):
+        store = self.server.store
+        if resource == 'health':
+            versions = {name: store.get(spec['file']).version for name, spec in RESOURCES.items()}
+            return self.send_json(200, {'status': 'ok', 'versions': versions})
+        if resource == 'metrics':
+            return self.send_body(200, metrics.render_prometheus().encode('utf-8'),
+                                  'text/plain; version=0.0.4; charset=utf-8')
+        if resource not in RESOURCES:
+            return self.send_json(404, {'error': f"unknown resource {resource!r}"})
+        try:
+            params = parse_query(resource, query)
+        except ValueError as e:
+            return self.send_json(400, {'error': str(e)})
+
+        # Hold on to one version for the whole request; a refresh swaps in a new one for the next
+        filename = RESOURCES[resource]['file']
+        try:
+            dataset = store.get_as_of(filename, params['as_of']) if params['as_of'] else store.get(filename)
+        except ValueError as e:
+            return self.send_json(400, {'error': str(e)})
+        except LookupError as e:
+            return self.send_json(404, {'error': str(e)})
+        etag = make_etag(dataset.version, resource, params)
+        if etag_matches(self.headers.get('If-None-Match'), etag):
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', 'no-cache')
+            self.send_header('Vary', 'Accept-Encoding')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return 304
+        try:
+            payload = run_query(dataset, resource, params)
+        except ValueError as e:
+            return self.send_json(400, {'error': str(e)})
+        return self.send_json(200, payload, etag)
+
+    def send_json(self, status, payload, etag=None):
+        body = json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        return self.send_body(status, body, 'application/json; charset=utf-8', etag)
+
+    def send_body(self, status, body, content_type, etag=None):
+        use_gzip = len(body) >= GZIP_MIN_BYTES and 'gzip' in self.headers.get('Accept-Encoding', '')
+        if use_gzip:
+            body = gzip.compress(body, compresslevel=5)
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Vary', 'Accept-Encoding')
+        if use_gzip:
+            self.send_header('Content-Encoding', 'gzip')
+        if etag:
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+        self.wfile.write(body)
+        return status
+
+
+def make_server(host="127.0.0.1", port=8000, store=None):
+    """An API server over store (a new DatasetStore by default); call serve_forever() on it."""
+    server = ThreadingHTTPServer((host, port), ApiHandler)
+    server.daemon_threads = True
+    server.store = store or DatasetStore()
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Read-only query API over the scraped contests")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--data-dir", default=".", help="directory holding the snapshot JSON files")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    os.chdir(args.data_dir)
+    server = make_server(args.host, args.port)
+    logger.info(f"Serving the query API on http://{args.host}:{server.server_address[1]}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
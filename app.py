@@ -1,11 +1,15 @@
 import streamlit as st
 import logging
-from scraper.contest_scraper import scrape_contests
 from ui.display_korea import display_contests
 from ui.display_ics import display_ics_competitions
-import json
+from scraper.dataset import DatasetStore, file_version
+from scraper.dedupe import DUPLICATES_FILE, load_duplicates
+from scraper import metrics, profiling
+from ui.diagnostics import display_diagnostics
+from ui.alerts import display_saved_searches
+from ui.history import AS_OF, COMPARE, history_controls, display_comparison
+from ui.duplicates import display_cross_listed
 import os
-import subprocess
 from datetime import datetime, date
 
 # Set page to wide mode (must be the first Streamlit command)
@@ -18,155 +22,177 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@st.cache_resource
+def start_metrics_server():
+    """Expose /metrics once per process when SCRAPER_METRICS_PORT is set."""
+    port = os.getenv("SCRAPER_METRICS_PORT")
+    return metrics.serve_metrics(int(port)) if port else None
+
+start_metrics_server()
+
+@st.cache_resource
+def dataset_store():
+    """One read-only copy of each data file (records, DataFrame, filter indexes) for all sessions."""
+    return DatasetStore()
+
+@st.cache_resource(max_entries=2)
+def shared_duplicates(version):
+    """Duplicate clusters from the last scrape, loaded once per version of the duplicates file."""
+    return load_duplicates(DUPLICATES_FILE)
+
 KOREA_JSON = "contests_korea.json"
 ICS_JSON = "ics_competitions.json"
-KOREA_TIMESTAMP_KEY = "contests_korea_last_scraped"
-ICS_TIMESTAMP_KEY = "ics_competitions_last_scraped"
 
-# Initialize session state for storing scraped data
-if 'contests_data' not in st.session_state:
-    st.session_state.contests_data = []
+# Sessions keep only filter state and the data version they last rendered;
+# the data itself lives in dataset_store()
 if 'filter_counter' not in st.session_state:
     st.session_state.filter_counter = 0
-if 'ics_competitions' not in st.session_state:
-    st.session_state.ics_competitions = []
-if KOREA_TIMESTAMP_KEY not in st.session_state:
-    st.session_state[KOREA_TIMESTAMP_KEY] = None
-if ICS_TIMESTAMP_KEY not in st.session_state:
-    st.session_state[ICS_TIMESTAMP_KEY] = None
 if 'korea_autoscraped_today' not in st.session_state:
     st.session_state.korea_autoscraped_today = False
-
-def load_json_with_timestamp(filename, timestamp_key):
-    if os.path.exists(filename):
-        try:
-            with open(filename, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            ts = data.get('last_scraped')
-            if ts:
-                st.session_state[timestamp_key] = ts
-            return data.get('contests', data) if isinstance(data, dict) else data
-        except Exception as e:
-            st.warning(f"Failed to load {filename}: {e}")
-            return []
-    else:
+if 'last_visit' not in st.session_state:
+    # The previous visit time travels in the URL (?since=...), so a reload or
+    # bookmark remembers it; stamp the current visit for next time.
+    st.session_state.last_visit = st.query_params.get('since')
+    st.query_params['since'] = datetime.now().isoformat(timespec='seconds')
+
+def get_dataset(filename):
+    """The current shared Dataset for a data file, warning if it could not be loaded."""
+    dataset = dataset_store().get(filename)
+    if dataset.error is not None:
+        st.warning(f"Failed to load {filename}: {dataset.error}")
+    elif dataset.version is None:
         st.warning(f"{filename} not found. Please run the scraper.")
-        return []
-
-def save_json_with_timestamp(filename, data, timestamp_key):
-    ts = datetime.now().strftime("%Y-%m-%d")
-    obj = {'last_scraped': ts, 'contests': data}
-    with open(filename, "w", encoding="utf-8") as f:
-        json.dump(obj, f, ensure_ascii=False, indent=2)
-    st.session_state[timestamp_key] = ts
-
-def load_ics_competitions_from_json():
-    return load_json_with_timestamp(ICS_JSON, ICS_TIMESTAMP_KEY)
+    return dataset
+
+def track_version(filename, dataset):
+    """A new version (or a past one) invalidates row selections made against the one shown before."""
+    version_key = f"{filename}_version"
+    if st.session_state.get(version_key) != dataset.version:
+        if version_key in st.session_state:
+            st.session_state.pop('selected_rows', None)
+        st.session_state[version_key] = dataset.version
+
+def history_view(filename, current, label, key):
+    """(dataset to show, new IDs) for the sidebar's history choice; a comparison is rendered here."""
+    mode, dates = history_controls(filename, label, key)
+    dataset, new_ids = current, current.added_since(st.session_state.last_visit)
+    if mode == AS_OF:
+        try:
+            dataset, new_ids = dataset_store().get_as_of(filename, dates), None
+            st.caption(f"Showing {label} as of {dataset.last_scraped}")
+        except LookupError as e:
+            st.warning(str(e))
+    elif mode == COMPARE:
+        display_comparison(filename, label, *dates)
+    track_version(filename, dataset)
+    return dataset, new_ids
+
+@st.cache_resource
+def browser_pool():
+    """One browser for the server process: ICS refreshes reuse it instead of launching Chromium each time."""
+    from scraper.browser_pool import BrowserPool
+    return BrowserPool()
 
 def update_ics_competitions_json():
     st.info("Updating ICS competitions using Playwright. Please wait...")
     try:
-        result = subprocess.run([
-            "python", "-m", "scraper.run_ics_playwright"
-        ], capture_output=True, text=True)
-        if result.returncode == 0:
-            st.success("ICS competitions updated successfully!")
+        from scraper.ics_scraper_playwright import update_ics_competitions_playwright
+        result = update_ics_competitions_playwright(headless=True, output=ICS_JSON, pool=browser_pool())
+        if result.diff is None:
+            st.warning(
+                f"ICS crawl stopped early ({len(result.records)} competitions); kept the existing data. "
+                "Update again to resume where it stopped."
+            )
         else:
-            st.error(f"Failed to update ICS competitions. Error: {result.stderr}")
+            st.success("ICS competitions updated successfully!")
     except Exception as e:
         st.error(f"Exception while updating ICS competitions: {e}")
-    # Save timestamp
-    ts = datetime.now().strftime("%Y-%m-%d")
-    st.session_state[ICS_TIMESTAMP_KEY] = ts
-    # Reload data
-    st.session_state.ics_competitions = load_ics_competitions_from_json()
-
-def load_korea_contests_from_json():
-    return load_json_with_timestamp(KOREA_JSON, KOREA_TIMESTAMP_KEY)
+    # Swap the new version in for every session
+    dataset_store().get(ICS_JSON)
 
 def update_korea_contests_json():
-    st.info("Scraping all Contest Korea contests. Please wait...")
     try:
-        contests = scrape_contests(max_pages=20)
-        save_json_with_timestamp(KOREA_JSON, contests, KOREA_TIMESTAMP_KEY)
-        st.session_state.contests_data = contests
+        # requests/bs4/lxml are only loaded when a scrape actually runs
+        from scraper.schedule import REFRESH_BUDGET, scheduled_refresh
+        st.info(f"Refreshing Contest Korea (up to {REFRESH_BUDGET} seconds)...")
+        # Newest listings and closing contests first; what does not fit in the budget is done next refresh
+        result = scheduled_refresh(KOREA_JSON, budget=REFRESH_BUDGET)
+        dataset_store().get(KOREA_JSON)
         st.session_state.korea_autoscraped_today = True
-        st.success("Contest Korea contests updated successfully!")
+        if result.diff is None:
+            st.warning("Could not reach Contest Korea; kept the existing data. Refresh again to retry.")
+        else:
+            left = f" {len(result.left)} items are left for the next refresh." if result.left else ""
+            st.success(
+                f"Contest Korea refreshed: {len(result.diff['added'])} new, {len(result.diff['changed'])} changed, "
+                f"{result.details} details fetched.{left}"
+            )
     except Exception as e:
         st.error(f"Exception while scraping Contest Korea: {e}")
 
-def check_and_auto_update(filename, timestamp_key, update_func, load_func):
+def check_and_auto_update(dataset, update_func):
     """If the date has changed since last scrape, auto-update."""
-    last_scraped = None
-    if os.path.exists(filename):
-        try:
-            with open(filename, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            last_scraped = data.get('last_scraped')
-        except Exception:
-            pass
+    last_scraped = dataset.last_scraped
     today_str = date.today().strftime("%Y-%m-%d")
     if not last_scraped or not last_scraped.startswith(today_str):
         update_func()
-    else:
-        # Load from file if not already loaded
-        if not st.session_state.get(timestamp_key):
-            load_func()
 
 def main():
     st.title("Contest Korea Scraper")
     
-    # Add page limit option (for display only, not for scraping)
-    max_pages = st.slider(
-        "Maximum number of pages to display",
-        min_value=1,
-        max_value=50,
-        value=20,
-        help="Limit the number of pages to display (scraping always fetches all)",
-        key="page_limit_slider"
-    )
-    
     # Create a placeholder for the contests display
     contests_placeholder = st.empty()
     ics_placeholder = st.empty()
     
-    # Always load cached data first
-    if not st.session_state.contests_data:
-        st.session_state.contests_data = load_json_with_timestamp(KOREA_JSON, KOREA_TIMESTAMP_KEY)
+    # Shared, already-parsed data; loaded once per version for all sessions
+    with profiling.span("load"):
+        korea = get_dataset(KOREA_JSON)
+        duplicates = shared_duplicates(file_version(DUPLICATES_FILE))
+    display_saved_searches(KOREA_JSON)
 
     # Show table immediately
     with contests_placeholder.container():
-        # Only display up to max_pages * 12 items (12 per page)
-        display_contests(st.session_state.contests_data[:max_pages*12])
+        shown, new_ids = history_view(KOREA_JSON, korea, "Contest Korea", "korea")
+        # The table pages through the data itself, so hand over everything
+        with metrics.RENDER_SECONDS.time(view="korea"), profiling.span("render_korea"):
+            display_contests(shown, new_ids=new_ids, duplicates=duplicates)
         # Move the refresh button here, just below the filter/table
         if st.button("Refresh Contest Korea Contests"):
             update_korea_contests_json()
-            st.session_state.contests_data = load_json_with_timestamp(KOREA_JSON, KOREA_TIMESTAMP_KEY)
             st.rerun()
     # Show last scrape time for Contest Korea
-    if st.session_state[KOREA_TIMESTAMP_KEY]:
-        st.caption(f"Contest Korea last scraped: {st.session_state[KOREA_TIMESTAMP_KEY]}")
+    if korea.last_scraped:
+        st.caption(f"Contest Korea last scraped: {korea.last_scraped}")
 
     # If the date has changed, trigger a scrape in the background (but only once per session)
-    last_scraped = st.session_state.get(KOREA_TIMESTAMP_KEY)
+    last_scraped = korea.last_scraped
     today_str = date.today().strftime("%Y-%m-%d")
     if (not last_scraped or not last_scraped.startswith(today_str)) and not st.session_state.korea_autoscraped_today:
         st.info("Automatically scraping Contest Korea for today's data...")
         update_korea_contests_json()
-        st.session_state.contests_data = load_json_with_timestamp(KOREA_JSON, KOREA_TIMESTAMP_KEY)
         st.rerun()
 
     # Auto-update if date has changed for ICS (but do not block Korea display)
-    check_and_auto_update(ICS_JSON, ICS_TIMESTAMP_KEY, update_ics_competitions_json, lambda: st.session_state.update({'ics_competitions': load_ics_competitions_from_json()}))
+    with profiling.span("load"):
+        ics = get_dataset(ICS_JSON)
+    check_and_auto_update(ics, update_ics_competitions_json)
+    ics = dataset_store().get(ICS_JSON)
     # Show last scrape time for ICS
-    if st.session_state[ICS_TIMESTAMP_KEY]:
-        st.caption(f"ICS competitions last scraped: {st.session_state[ICS_TIMESTAMP_KEY]}")
+    if ics.last_scraped:
+        st.caption(f"ICS competitions last scraped: {ics.last_scraped}")
     # Button to update ICS competitions
     if st.button("Update ICS Competitions (Playwright)"):
         update_ics_competitions_json()
+        ics = dataset_store().get(ICS_JSON)
     # Display ICS table
     with ics_placeholder.container():
-        display_ics_competitions(st.session_state.ics_competitions)
+        shown, new_ids = history_view(ICS_JSON, ics, "ICS competitions", "ics")
+        with metrics.RENDER_SECONDS.time(view="ics"), profiling.span("render_ics"):
+            display_ics_competitions(shown, new_ids=new_ids, duplicates=duplicates)
+        display_cross_listed(duplicates, {'korea': korea, 'ics': ics})
+    display_diagnostics()
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    # With SCRAPER_PROFILE set, each rerun writes a profile to profiles/
+    with profiling.profiled("app_rerun"):
+        main() 
\ No newline at end of file
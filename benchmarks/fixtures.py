@@ -0,0 +1,149 @@
+import html
+import json
+import os
+from urllib.parse import urlparse
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+KOREA_PAGE_SIZE = 12
+ICS_PAGE_SIZE = 9
+
+
+def load_records(filename):
+    with open(os.path.join(REPO_ROOT, filename), "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return data['contests'] if isinstance(data, dict) else data
+
+
+def _strip_prefix(value, prefix):
+    value = value or ""
+    return value[len(prefix):].strip() if value.startswith(prefix) else value
+
+
+def render_korea_item(record):
+    """One <li> of a contestkorea.com list page."""
+    e = html.escape
+    href = "view.php?" + (urlparse(record['Link']).query or "")
+    dates = ""
+    if record.get('Date Info') and record['Date Info'] != "N/A":
+        for part in record['Date Info'].split(" | "):
+            step, _, when = part.partition(": ")
+            dates += f'<span><em>{e(step)}</em>{e(when)}</span>'
+    d_day = record.get('D-Day', 0)
+    d_day_text = f"D{d_day:+d}" if d_day else "D-day"
+    organization = _strip_prefix(record.get('Organization'), "주최 .")
+    target = _strip_prefix(record.get('Target'), "대상 .")
+    return (
+        '<li>\n'
+        f'  <div class="title"><a href="{e(href)}"><span class="category">{e(record["Category"])}</span>'
+        f'<span class="txt">{e(record["Title"])}</span></a></div>\n'
+        '  <ul class="host">\n'
+        f'    <li class="icon_1"><strong>주최</strong> . {e(organization)}</li>\n'
+        f'    <li class="icon_2"><strong>대상</strong> . {e(target)}</li>\n'
+        '  </ul>\n'
+        f'  <div class="date">{dates}</div>\n'
+        f'  <div class="d-day"><span class="day">{d_day_text}</span></div>\n'
+        '</li>\n'
+    )
+
+
+def render_korea_list_page(records):
+    """A contestkorea.com list page; an empty list renders the 'no results' page."""
+    if not records:
+        return '<html><body><div class="list_none">등록된 공모전이 없습니다.</div></body></html>'
+    items = "".join(render_korea_item(r) for r in records)
+    return (
+        '<html><head><meta charset="utf-8"><title>공모전 - 콘테스트코리아</title></head><body>\n'
+        '<div id="wrap"><div class="list_style_2"><ul>\n'
+        f'{items}'
+        '</ul></div></div>\n</body></html>\n'
+    )
+
+
+def render_korea_detail_page(record, poster="/upload/poster/sample.jpg"):
+    """A contestkorea.com view.php page with the labelled fields and the free-text body."""
+    e = html.escape
+    organization = _strip_prefix(record.get('Organization'), "주최 .")
+    target = _strip_prefix(record.get('Target'), "대상 .")
+    schedule = "".join(f"<li>{e(part)}</li>" for part in (record.get('Date Info') or "").split(" | "))
+    return (
+        '<html><head><meta charset="utf-8"></head><body>\n'
+        f'<div class="view_top_area"><h1 class="tit">{e(record["Title"])}</h1>\n'
+        '<div class="clfx"><ul>\n'
+        f'  <li><span class="tit">응모분야</span><span class="txt">{e(record["Category"])}</span></li>\n'
+        f'  <li><span class="tit">응모대상</span><span class="txt">{e(target)}</span></li>\n'
+        f'  <li><span class="tit">주최</span><span class="txt">{e(organization)}</span></li>\n'
+        '  <li><span class="tit">1등 시상금</span><span class="txt">300만원</span></li>\n'
+        '  <li><span class="tit">시상내역</span><span class="txt">대상 1명 300만원, 최우수상 2명 각 100만원, 우수상 5명 각 30만원</span></li>\n'
+        '  <li><span class="tit">접수방법</span><span class="txt">이메일 접수</span></li>\n'
+        '  <li><span class="tit">문의</span><span class="txt">contest@example.org / 02-123-4567</span></li>\n'
+        '</ul></div></div>\n'
+        '<div class="view_detail_area">\n'
+        f'  <div class="img_area"><img src="{e(poster)}" alt="poster"></div>\n'
+        '  <div class="txt">\n'
+        f'    <p>■ 공모주제: {e(record["Title"])}</p>\n'
+        f'    <p>■ 참가자격: {e(target)}</p>\n'
+        f'    <p>■ 일정</p><ul>{schedule}</ul>\n'
+        '    <p>■ 제출방법: 홈페이지 양식 작성 후 이메일(contest@example.org) 제출</p>\n'
+        '    <p>■ 시상내역: 대상 1명 300만원, 최우수상 2명 각 100만원, 우수상 5명 각 30만원</p>\n'
+        '    <p>■ 문의: 사무국 02-123-4567</p>\n'
+        '  </div>\n'
+        '</div>\n</body></html>\n'
+    )
+
+
+def render_ics_page(records, next_url=None):
+    """A competitionsciences.org listing page with its nav-links pager."""
+    e = html.escape
+    items = ""
+    for r in records:
+        items += (
+            '<article class="competition"><div class="middle-wrapper">\n'
+            f'  <h3><a href="{e(r.get("Link") or "")}">{e(r.get("Title") or "")}</a></h3>\n'
+            f'  <p class="ages">Ages: <span>{e(r.get("Ages") or "")}</span></p>\n'
+            f'  <p class="categories">Categories: <span>{e(r.get("Categories") or "")}</span></p>\n'
+            '</div></article>\n'
+        )
+    nav = '<div class="nav-links">'
+    if next_url:
+        nav += f'<a class="next page-numbers" href="{e(next_url)}">Next</a>'
+    nav += '</div>'
+    return (
+        '<html><head><meta charset="utf-8"><title>Competitions</title></head><body>\n'
+        f'<main>{items}</main>\n<nav class="pagination">{nav}</nav>\n</body></html>\n'
+    )
+
+
+def fixture_path(name):
+    return os.path.join(FIXTURES_DIR, name)
+
+
+def read_fixture(name):
+    with open(fixture_path(name), "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def write_fixtures(pages=3):
+    """Render the checked-in fixtures from the current snapshots."""
+    os.makedirs(FIXTURES_DIR, exist_ok=True)
+    korea = load_records("contests_korea.json")
+    ics = load_records("ics_competitions.json")
+    written = []
+    for page in range(1, pages + 1):
+        chunk = korea[(page - 1) * KOREA_PAGE_SIZE:page * KOREA_PAGE_SIZE]
+        written.append((f"contestkorea_list_{page}.html", render_korea_list_page(chunk)))
+        chunk = ics[(page - 1) * ICS_PAGE_SIZE:page * ICS_PAGE_SIZE]
+        next_url = f"https://www.competitionsciences.org/competitions/page/{page + 1}/"
+        written.append((f"ics_list_{page}.html", render_ics_page(chunk, next_url)))
+    written.append(("contestkorea_list_end.html", render_korea_list_page([])))
+    for i, record in enumerate(korea[:2], start=1):
+        written.append((f"contestkorea_detail_{i}.html", render_korea_detail_page(record)))
+    for name, text in written:
+        with open(fixture_path(name), "w", encoding="utf-8") as f:
+            f.write(text)
+    return [name for name, _ in written]
+
+
+if __name__ == "__main__":
+    for name in write_fixtures():
+        print(f"Wrote {fixture_path(name)}")
@@ -0,0 +1,75 @@
+"""Import-time profile of the app, summarized from ``python -X importtime``.
+
+    python -m benchmarks.import_time                      # app start-up, heaviest packages
+    python -m benchmarks.import_time ui.display_korea --top 20
+
+`python -m benchmarks.run --only import` tracks the same numbers in the history/baseline.
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# What a cold Streamlit session imports, plus the UI modules on their own
+DEFAULT_MODULES = ("app", "ui.display_korea", "ui.display_ics", "scraper.storage")
+
+
+def import_profile(module, python=sys.executable):
+    """[(name, self_seconds, cumulative_seconds, depth)] for importing module in a fresh interpreter."""
+    proc = subprocess.run(
+        [python, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_DIR, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed: {proc.stderr.strip().splitlines()[-1:]}")
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(self_us) / 1e6, int(cumulative_us) / 1e6, depth))
+    return rows
+
+
+def module_seconds(rows, module):
+    """Cumulative import time of the module itself, without interpreter start-up."""
+    return next((cumulative for name, _, cumulative, depth in rows if name == module and depth == 0), 0.0)
+
+
+def package_totals(rows):
+    """{top-level package: self seconds}, i.e. what each package costs wherever it is imported."""
+    totals = {}
+    for name, self_seconds, _, _ in rows:
+        package = name.split(".")[0]
+        totals[package] = totals.get(package, 0.0) + self_seconds
+    return totals
+
+
+def import_benchmarks(modules=DEFAULT_MODULES, repeat=3):
+    """{'import_<module>': best cumulative seconds over repeat fresh interpreters}."""
+    return {
+        f"import_{module}": min(module_seconds(import_profile(module), module) for _ in range(repeat))
+        for module in modules
+    }
+
+
+def print_summary(module, rows, top):
+    print(f"import {module}: {module_seconds(rows, module) * 1000:.1f} ms")
+    totals = sorted(package_totals(rows).items(), key=lambda kv: kv[1], reverse=True)
+    for package, seconds in totals[:top]:
+        print(f"  {package:<28} {seconds * 1000:8.1f} ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarize python -X importtime for the app's modules")
+    parser.add_argument("modules", nargs="*", default=list(DEFAULT_MODULES))
+    parser.add_argument("--top", type=int, default=10, help="heaviest packages to list per module")
+    args = parser.parse_args(argv)
+    for module in args.modules:
+        print_summary(module, import_profile(module), args.top)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""Drive the scrapers against the replay server and report throughput and tail latency.
+
+    python -m benchmarks.load_harness --latency 0.05 --jitter 0.03 --error-rate 0.05
+    python -m benchmarks.load_harness --scrapers korea --runs 3 --concurrency 8
+    python -m benchmarks.load_harness --scrapers korea --page-size 12   # without displayrow probing
+"""
+import argparse
+import logging
+import time
+
+import os
+import tempfile
+
+from scraper.contest_scraper import scrape_contests, scrape_contests_sharded
+from scraper.engine import Engine, Fetcher
+from scraper.ics_scraper import scrape_ics_competitions
+from .replay_server import start_replay_server, add_config_arguments, config_from_args
+
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def run_korea(base_url, args):
+    engine = Engine(concurrency=args.concurrency, min_interval=args.min_interval, fetcher=Fetcher(cache_ttl=0))
+    return scrape_contests(base_url=base_url, engine=engine, page_size=args.page_size)
+
+
+def run_korea_sharded(base_url, args):
+    engine = Engine(concurrency=args.concurrency, min_interval=args.min_interval, fetcher=Fetcher(cache_ttl=0))
+    with tempfile.TemporaryDirectory() as tmp:
+        return scrape_contests_sharded(base_url=base_url, engine=engine,
+                                       state_file=os.path.join(tmp, "shards.json"))
+
+
+def run_ics(base_url, args):
+    engine = Engine(concurrency=1, min_interval=args.min_interval, fetcher=Fetcher(cache_ttl=0))
+    return scrape_ics_competitions(max_pages=None, start_url=f"{base_url}/competitions/", engine=engine)
+
+
+def run_ics_playwright(base_url, args):
+    from scraper.ics_scraper_playwright import scrape_ics_competitions_playwright
+    return scrape_ics_competitions_playwright(max_pages=None, headless=True, start_url=f"{base_url}/competitions/")
+
+
+SCRAPERS = {
+    'korea': run_korea,
+    'korea-sharded': run_korea_sharded,
+    'ics': run_ics,
+    'ics-playwright': run_ics_playwright,
+}
+
+
+def run_scraper(server, name, args):
+    """Run one scraper args.runs times and summarize what the server saw."""
+    with server.state.lock:
+        server.state.log.clear()
+    elapsed, records = 0.0, 0
+    for _ in range(args.runs):
+        started = time.perf_counter()
+        records += len(SCRAPERS[name](server.base_url, args))
+        elapsed += time.perf_counter() - started
+    with server.state.lock:
+        log = list(server.state.log)
+    latencies = [seconds for _, _, seconds, _ in log]
+    return {
+        'scraper': name,
+        'bytes': sum(size for _, _, _, size in log),
+        'runs': args.runs,
+        'records': records,
+        'requests': len(log),
+        'errors': sum(1 for _, status, _, _ in log if status >= 429),
+        'seconds': elapsed,
+        'records_per_s': records / elapsed if elapsed else 0.0,
+        'requests_per_s': len(log) / elapsed if elapsed else 0.0,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p95_ms': percentile(latencies, 0.95) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+    }
+
+
+def print_report(rows):
+    header = f"{'scraper':<15}{'records':>9}{'requests':>10}{'KiB':>9}{'errors':>8}{'sec':>9}{'rec/s':>9}{'req/s':>8}{'p50ms':>8}{'p95ms':>8}{'p99ms':>8}"
+    print(header)
+    for r in rows:
+        print(f"{r['scraper']:<15}{r['records']:>9}{r['requests']:>10}{r['bytes'] / 1024:>9.0f}{r['errors']:>8}{r['seconds']:>9.2f}"
+              f"{r['records_per_s']:>9.1f}{r['requests_per_s']:>8.1f}{r['p50_ms']:>8.1f}{r['p95_ms']:>8.1f}{r['p99_ms']:>8.1f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="End-to-end load harness for the scrapers")
+    parser.add_argument("--scrapers", nargs="+", choices=sorted(SCRAPERS), default=['korea', 'ics'])
+    parser.add_argument("--runs", type=int, default=1)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--min-interval", type=float, default=0.0, help="engine gap between request starts")
+    parser.add_argument("--page-size", type=int, default=None, help="Contest Korea displayrow (default: probe)")
+    add_config_arguments(parser)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+
+    server = start_replay_server(config=config_from_args(args))
+    rows = []
+    try:
+        for name in args.scrapers:
+            try:
+                rows.append(run_scraper(server, name, args))
+            except ImportError as e:
+                print(f"Skipping {name}: {e}")
+    finally:
+        server.shutdown()
+    print_report(rows)
+    return rows
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""Local stand-in for contestkorea.com and competitionsciences.org.
+
+Serves the snapshot data through the same renderers that produced the checked-in
+fixtures, so the scrapers can be driven end to end without touching the live sites:
+
+    python -m benchmarks.replay_server --port 8765 --latency 0.05 --jitter 0.02 --error-rate 0.05
+
+Contest Korea: /sub/list.php?page=N&displayrow=M&Txt_code1[i]=C (404 past the last page),
+               /sub/view.php?str_no=...
+ICS:           /competitions/, /competitions/page/N/ chained through nav-links 'next'.
+"""
+import argparse
+import random
+import socket
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from scraper.contest_scraper import CATEGORY_CODES
+from scraper.diff import record_id
+from .fixtures import (
+    KOREA_PAGE_SIZE, ICS_PAGE_SIZE, load_records,
+    render_korea_list_page, render_korea_detail_page, render_ics_page,
+)
+
+CHUNK_BYTES = 4096
+
+
+class ReplayConfig:
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, throttle_rate=0.0,
+                 retry_after=1, bandwidth=None, max_displayrow=None, seed=None):
+        self.latency = latency            # seconds added to every response
+        self.jitter = jitter              # +/- uniform seconds on top of latency
+        self.error_rate = error_rate      # share of requests answered with a 5xx
+        self.throttle_rate = throttle_rate  # share of requests answered with 429
+        self.retry_after = retry_after    # Retry-After seconds sent with 429/503
+        self.bandwidth = bandwidth        # bytes per second, None for unlimited
+        self.max_displayrow = max_displayrow  # cap on displayrow, 0 to ignore it, None for no cap
+        self.rng = random.Random(seed)
+
+
+class ReplayState:
+    """Data, fault config and a log of (path, status, seconds, bytes) per request."""
+
+    def __init__(self, config, korea_records=None, ics_records=None):
+        self.config = config
+        self.korea = korea_records if korea_records is not None else load_records("contests_korea.json")
+        self.ics = ics_records if ics_records is not None else load_records("ics_competitions.json")
+        self.korea_by_id = {record_id(r): r for r in self.korea}
+        self.log = []
+        self.lock = threading.Lock()
+
+    def record(self, path, status, seconds, size):
+        with self.lock:
+            self.log.append((path, status, seconds, size))
+
+
+def category_codes(record):
+    """Txt_code1 codes a replayed contest is listed under; about 1 in 10 is under two."""
+    h = zlib.crc32(record_id(record).encode('utf-8'))
+    codes = {CATEGORY_CODES[h % len(CATEGORY_CODES)]}
+    if h % 10 == 0:
+        codes.add(CATEGORY_CODES[(h // 10) % len(CATEGORY_CODES)])
+    return codes
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        # Headers and body go out in separate writes; without this, Nagle plus
+        # delayed ACKs add ~40 ms to every keep-alive response
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        started = time.perf_counter()
+        state = self.server.state
+        config = state.config
+        url = urlparse(self.path)
+        with state.lock:
+            roll = config.rng.random()
+            delay = config.latency + config.rng.uniform(-config.jitter, config.jitter)
+        time.sleep(max(0.0, delay))
+
+        if roll < config.throttle_rate:
+            status, body, headers = 429, "Too Many Requests", {'Retry-After': str(config.retry_after)}
+        elif roll < config.throttle_rate + config.error_rate:
+            status, body, headers = 503, "Service Unavailable", {'Retry-After': str(config.retry_after)}
+        else:
+            status, body = self.route(state, url)
+            headers = {}
+        size = self.respond(status, body, headers, config.bandwidth)
+        state.record(url.path, status, time.perf_counter() - started, size)
+
+    def route(self, state, url):
+        query = parse_qs(url.query)
+        path = url.path
+        if path == "/sub/list.php":
+            page = int(query.get('page', ['1'])[0])
+            size = int(query.get('displayrow', [str(KOREA_PAGE_SIZE)])[0])
+            cap = state.config.max_displayrow
+            if cap == 0:
+                size = KOREA_PAGE_SIZE
+            elif cap is not None:
+                size = min(size, cap)
+            codes = {v[0] for k, v in query.items() if k.startswith('Txt_code1[')}
+            records = state.korea
+            if codes:
+                records = [r for r in records if category_codes(r) & codes]
+            chunk = records[(page - 1) * size:page * size]
+            if not chunk:
+                return 404, "Not Found"
+            return 200, render_korea_list_page(chunk)
+        if path == "/sub/view.php":
+            record = state.korea_by_id.get(query.get('str_no', [''])[0])
+            if record is None:
+                return 404, "Not Found"
+            return 200, render_korea_detail_page(record)
+        if path.startswith("/competitions"):
+            parts = [p for p in path.split('/') if p]
+            if parts == ['competitions']:
+                page = 1
+            elif len(parts) == 3 and parts[1] == 'page' and parts[2].isdigit():
+                page = int(parts[2])
+            else:
+                return 404, "Not Found"
+            chunk = state.ics[(page - 1) * ICS_PAGE_SIZE:page * ICS_PAGE_SIZE]
+            if not chunk:
+                return 404, "Not Found"
+            has_next = page * ICS_PAGE_SIZE < len(state.ics)
+            next_url = f"{self.server.base_url}/competitions/page/{page + 1}/" if has_next else None
+            return 200, render_ics_page(chunk, next_url)
+        return 404, "Not Found"
+
+    def respond(self, status, body, headers, bandwidth):
+        data = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        if not bandwidth:
+            self.wfile.write(data)
+            return len(data)
+        for start in range(0, len(data), CHUNK_BYTES):
+            chunk = data[start:start + CHUNK_BYTES]
+            self.wfile.write(chunk)
+            time.sleep(len(chunk) / bandwidth)
+        return len(data)
+
+
+def start_replay_server(port=0, config=None, korea_records=None, ics_records=None, host="127.0.0.1"):
+    """Start the server on a daemon thread; returns the server (see server.base_url, server.state)."""
+    server = ThreadingHTTPServer((host, port), ReplayHandler)
+    server.daemon_threads = True
+    server.state = ReplayState(config or ReplayConfig(), korea_records, ics_records)
+    server.base_url = f"http://{host}:{server.server_address[1]}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def add_config_arguments(parser):
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="+/- seconds of uniform jitter")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of 503 responses")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="share of 429 responses")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds on 429/503")
+    parser.add_argument("--bandwidth", type=int, default=None, help="bytes per second per response")
+    parser.add_argument("--max-displayrow", type=int, default=None,
+                        help="largest Contest Korea page size served (0 ignores displayrow)")
+    parser.add_argument("--seed", type=int, default=None)
+
+
+def config_from_args(args):
+    return ReplayConfig(
+        latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate, retry_after=args.retry_after,
+        bandwidth=args.bandwidth, max_displayrow=args.max_displayrow, seed=args.seed,
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay server for the Contest Korea and ICS scrapers")
+    parser.add_argument("--port", type=int, default=8765)
+    add_config_arguments(parser)
+    args = parser.parse_args(argv)
+    server = start_replay_server(args.port, config_from_args(args))
+    print(f"Contest Korea: {server.base_url}/sub/list.php")
+    print(f"ICS:           {server.base_url}/competitions/")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+"""Offline benchmarks for the parsers, filters and snapshot I/O.
+
+    python -m benchmarks.run                    # run, append to history, compare to baseline
+    python -m benchmarks.run --save-baseline    # make this run the new baseline
+    python -m benchmarks.run --sizes 1000 10000 --only filter
+    python -m benchmarks.run --only import      # cold import time of the app (see import_time.py)
+
+Exits with status 1 when a benchmark is slower than baseline by more than --threshold.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from bs4 import BeautifulSoup
+
+from scraper.contest_scraper import select_contest_items, parse_contest_item
+from scraper.columnar import load_arrow
+from scraper.dataset import Dataset, INDEX_COLUMNS, file_version
+from scraper.dedupe import update_duplicates
+from scraper.ics_scraper import parse_competitions_from_soup
+from scraper.storage import load_snapshot, save_snapshot
+from scraper.utils import extract_days_left
+from ui.display_korea import KOREA_GRID_COLUMNS, KOREA_TRUNCATED_COLUMNS, contest_filter_options, filter_contests
+from ui.display_ics import competition_tags, filter_competitions
+from ui.table import DEFAULT_PAGE_SIZE, MAX_CELL_CHARS, _page_frames
+from .import_time import import_benchmarks
+from .fixtures import (
+    KOREA_PAGE_SIZE, ICS_PAGE_SIZE, load_records, read_fixture, render_korea_list_page, render_ics_page,
+)
+from .synthetic import make_contests, make_competitions, chunked
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+HISTORY_FILE = os.path.join(BENCH_DIR, "history.json")
+BASELINE_FILE = os.path.join(BENCH_DIR, "baseline.json")
+DEFAULT_SIZES = (10000, 100000)
+# Parsing HTML is ~1000x slower per row than filtering, so it is scaled separately
+DEFAULT_PARSE_SIZES = (1000, 10000)
+DEFAULT_THRESHOLD = 0.20
+
+
+def measure(func, repeat=3):
+    """Best wall-clock time of several runs, in seconds."""
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def parse_korea_pages(pages):
+    return [parse_contest_item(item) for page in pages for item in select_contest_items(BeautifulSoup(page, 'lxml'))]
+
+
+def parse_ics_pages(pages):
+    return [c for page in pages for c in parse_competitions_from_soup(BeautifulSoup(page, 'lxml'))]
+
+
+def parse_benchmarks(sizes):
+    korea_page = read_fixture("contestkorea_list_1.html")
+    ics_page = read_fixture("ics_list_1.html")
+    yield "parse_korea_fixture_page", lambda: parse_korea_pages([korea_page])
+    yield "parse_ics_fixture_page", lambda: parse_ics_pages([ics_page])
+    for n in sizes:
+        korea_pages = [render_korea_list_page(chunk) for chunk in chunked(make_contests(n), KOREA_PAGE_SIZE)]
+        ics_pages = [render_ics_page(chunk) for chunk in chunked(make_competitions(n), ICS_PAGE_SIZE)]
+        yield f"parse_korea_{n}", lambda pages=korea_pages: parse_korea_pages(pages)
+        yield f"parse_ics_{n}", lambda pages=ics_pages: parse_ics_pages(pages)
+
+
+def dday_benchmarks(sizes):
+    for n in sizes:
+        texts = [f"D-{i % 120}" if i % 3 else f"D+{i % 30}" for i in range(n)]
+        yield f"extract_days_left_{n}", lambda texts=texts: [extract_days_left(t) for t in texts]
+
+
+def filter_benchmarks(sizes):
+    for n in sizes:
+        korea_records = make_contests(n)
+        korea = pd.DataFrame(korea_records)
+        categories, targets = contest_filter_options(korea)
+        some_categories, some_targets = categories[::2], targets[::3]
+        yield f"korea_filter_options_{n}", lambda df=korea: contest_filter_options(df)
+        yield f"korea_filter_{n}", lambda df=korea, c=some_categories, t=some_targets: filter_contests(df, c, t)
+        korea_dataset = Dataset("contests_korea.json", 0, None, korea_records, INDEX_COLUMNS["contests_korea.json"])
+        yield f"korea_filter_index_{n}", lambda d=korea_dataset, c=some_categories, t=some_targets: \
+            d.select({'Category': c, 'Target': t})
+        # A repeated view (same signature, sort) is served from the dataset's view cache
+        yield f"korea_view_memo_{n}", lambda d=korea_dataset, c=some_categories, t=some_targets: \
+            d.view({'Category': c, 'Target': t}, None, 'D-Day', True)
+        ics_records = make_competitions(n)
+        ics = pd.DataFrame(ics_records)
+        some_tags = competition_tags(ics)[::3]
+        yield f"ics_filter_tags_{n}", lambda df=ics: competition_tags(df)
+        yield f"ics_filter_{n}", lambda df=ics, t=some_tags: filter_competitions(df, t)
+        ics_dataset = Dataset("ics_competitions.json", 0, None, ics_records, INDEX_COLUMNS["ics_competitions.json"])
+        yield f"ics_filter_index_{n}", lambda d=ics_dataset, t=some_tags: d.select({'Categories': t})
+
+
+def json_benchmarks(sizes, workdir):
+    for n in sizes:
+        records = make_contests(n)
+        path = os.path.join(workdir, f"contests_{n}.json")
+        save_snapshot(path, records)
+        yield f"json_save_{n}", lambda path=path, records=records: save_snapshot(path, records)
+        yield f"json_load_{n}", lambda path=path: load_snapshot(path)
+        # What the app pays for a new version: JSON into a DataFrame, or the mapped Arrow copy
+        yield f"frame_load_json_{n}", lambda path=path: pd.DataFrame(load_snapshot(path)[1])
+        yield f"frame_load_arrow_{n}", lambda path=path: load_arrow(path, file_version(path))
+        # A grid page over the mapped frame, with cells long enough to be cut
+        # (Organization is a Categorical there)
+        long_records = [
+            dict(r, Organization=r['Organization'] + " " + "x" * MAX_CELL_CHARS) if i % 10 == 0 else r
+            for i, r in enumerate(records)
+        ]
+        long_path = os.path.join(workdir, f"contests_long_{n}.json")
+        save_snapshot(long_path, long_records)
+        yield f"korea_page_arrow_{n}", lambda path=long_path: render_grid_page(load_arrow(path, file_version(path))[2])
+
+
+def render_grid_page(df):
+    # The app's page builder, minus the per-view memo
+    return _page_frames(df, np.arange(len(df)), KOREA_GRID_COLUMNS, KOREA_TRUNCATED_COLUMNS, 1, DEFAULT_PAGE_SIZE)
+
+
+def dedupe_benchmarks(workdir):
+    records = {'korea': load_records("contests_korea.json"), 'ics': load_records("ics_competitions.json")}
+    base = os.path.join(workdir, "duplicates_base.npz")
+    update_duplicates(records, base, rebuild=True)
+    grown = dict(records, korea=records['korea'] + make_contests(10, seed=1))
+    path = os.path.join(workdir, "duplicates.npz")
+
+    def incremental():
+        # Start from the same state each time, so the 10 records are always new
+        shutil.copyfile(base, path)
+        update_duplicates(grown, path)
+
+    yield "dedupe_full_real", lambda: update_duplicates(records, path, rebuild=True)
+    yield "dedupe_incremental_10", incremental
+
+
+GROUPS = {
+    'parse': lambda args, workdir: parse_benchmarks(args.parse_sizes),
+    'dday': lambda args, workdir: dday_benchmarks(args.sizes),
+    'filter': lambda args, workdir: filter_benchmarks(args.sizes),
+    'json': lambda args, workdir: json_benchmarks(args.sizes, workdir),
+    'dedupe': lambda args, workdir: dedupe_benchmarks(workdir),
+}
+# Groups that time themselves in a subprocess: {group: args -> {name: seconds}}
+SELF_TIMED_GROUPS = {
+    'import': lambda args: import_benchmarks(repeat=args.repeat),
+}
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def load_json(path, default):
+    if not os.path.exists(path):
+        return default
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_json(path, obj):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(obj, f, indent=2)
+
+
+def record_run(results, history_file=HISTORY_FILE):
+    """Append a run to the JSON history and return the entry."""
+    entry = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'results': results,
+    }
+    history = load_json(history_file, [])
+    history.append(entry)
+    save_json(history_file, history)
+    return entry
+
+
+def find_regressions(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """[(name, baseline_s, current_s)] for benchmarks slower than baseline by more than threshold."""
+    return [
+        (name, baseline[name], seconds)
+        for name, seconds in results.items()
+        if name in baseline and seconds > baseline[name] * (1 + threshold)
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline benchmarks for parsers, filters and snapshot I/O")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--parse-sizes", type=int, nargs="+", default=list(DEFAULT_PARSE_SIZES))
+    parser.add_argument("--only", nargs="+", choices=sorted(GROUPS) + sorted(SELF_TIMED_GROUPS),
+                        help="run only these groups")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--save-baseline", action="store_true")
+    args = parser.parse_args(argv)
+    # Keep the per-item log lines out of the timings
+    logging.disable(logging.INFO)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for group in args.only or sorted(GROUPS) + sorted(SELF_TIMED_GROUPS):
+            if group in SELF_TIMED_GROUPS:
+                timed = SELF_TIMED_GROUPS[group](args).items()
+            else:
+                timed = ((name, measure(func, args.repeat)) for name, func in GROUPS[group](args, workdir))
+            for name, seconds in timed:
+                results[name] = seconds
+                print(f"{name:<32} {seconds * 1000:10.2f} ms")
+
+    record_run(results)
+    if args.save_baseline:
+        baseline = load_json(BASELINE_FILE, {})
+        baseline.update(results)
+        save_json(BASELINE_FILE, baseline)
+        print(f"Saved baseline to {BASELINE_FILE}")
+        return 0
+    regressions = find_regressions(results, load_json(BASELINE_FILE, {}), args.threshold)
+    for name, before, now in regressions:
+        print(f"REGRESSION {name}: {before * 1000:.2f} ms -> {now * 1000:.2f} ms")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
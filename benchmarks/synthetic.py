@@ -0,0 +1,43 @@
+import random
+from .fixtures import load_records
+
+
+def make_contests(n, seed=0):
+    """n Contest Korea-shaped records with field values drawn from the real snapshot."""
+    rng = random.Random(seed)
+    real = load_records("contests_korea.json")
+    pools = {field: [r[field] for r in real] for field in ('Category', 'Title', 'Organization', 'Target', 'Date Info')}
+    records = []
+    for i in range(n):
+        str_no = f"{202500000000 + i}"
+        records.append({
+            'Category': rng.choice(pools['Category']),
+            'Title': f"{rng.choice(pools['Title'])} #{i}",
+            'Organization': rng.choice(pools['Organization']),
+            'Target': rng.choice(pools['Target']),
+            'Date Info': rng.choice(pools['Date Info']),
+            'D-Day': rng.randint(-120, 30),
+            'Link': f"https://www.contestkorea.com/sub/view.php?int_gbn=1&Txt_bcode=030310001&str_no={str_no}",
+        })
+    return records
+
+
+def make_competitions(n, seed=0):
+    """n ICS-shaped records with field values drawn from the real snapshot."""
+    rng = random.Random(seed)
+    real = load_records("ics_competitions.json")
+    pools = {field: [r[field] for r in real] for field in ('Title', 'Ages', 'Categories')}
+    return [
+        {
+            'Title': f"{rng.choice(pools['Title'])} #{i}",
+            'Link': f"https://www.competitionsciences.org/competitions/synthetic-{i}/",
+            'Ages': rng.choice(pools['Ages']),
+            'Categories': rng.choice(pools['Categories']),
+        }
+        for i in range(n)
+    ]
+
+
+def chunked(records, size):
+    for start in range(0, len(records), size):
+        yield records[start:start + size]
@@ -0,0 +1,83 @@
+"""Stream scraped records as NDJSON, one JSON object per line, as pages are parsed.
+
+    python -m scraper korea > contests.ndjson
+    python -m scraper ics --max-pages 5 -o ics.ndjson
+    python -m scraper korea --pages | jq '.records | length'    # one line per page
+
+Logs go to stderr, so stdout can be piped straight into the next tool.
+"""
+import argparse
+import json
+import logging
+import sys
+
+SCRAPERS = ('korea', 'ics', 'ics-playwright')
+
+
+def iter_pages(name, max_pages, url=None):
+    """(page, records) batches from one scraper, imported on demand."""
+    if name == 'korea':
+        from .contest_scraper import BASE_URL, ContestKoreaSource, iter_contest_pages
+        from .engine import Engine
+        yield from iter_contest_pages(ContestKoreaSource(url or BASE_URL), Engine(), max_pages)
+    elif name == 'ics':
+        from .engine import Engine
+        from .ics_scraper import ICS_COMPETITIONS_URL, ICSSource
+        yield from Engine().iter_pages(ICSSource(url or ICS_COMPETITIONS_URL), max_pages)
+    else:
+        # The Playwright scraper streams records; its pages are not exposed
+        from .ics_scraper import ICS_COMPETITIONS_URL
+        from .ics_scraper_playwright import iter_ics_competitions_playwright
+        records = iter_ics_competitions_playwright(max_pages, headless=True, start_url=url or ICS_COMPETITIONS_URL)
+        for i, record in enumerate(records):
+            yield i + 1, [record]
+
+
+def write_ndjson(batches, out, per_page=False):
+    """Write each record (or each page as {"page", "records"}) as a line; returns the record count."""
+    count = 0
+    for page, records in batches:
+        if per_page:
+            out.write(json.dumps({'page': page, 'records': records}, ensure_ascii=False) + "\n")
+        else:
+            for record in records:
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+        count += len(records)
+        # Let consumers start on this page while the next one is fetched
+        out.flush()
+    return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m scraper", description="Stream scraped records as NDJSON")
+    parser.add_argument("scraper", choices=SCRAPERS)
+    parser.add_argument("--max-pages", type=int, default=None,
+                        help="stop after this many pages (Contest Korea: 12-row site pages)")
+    parser.add_argument("--url", help="site root (korea) or first listing page (ics), e.g. a replay server")
+    parser.add_argument("-o", "--output", help="write to this file instead of stdout")
+    parser.add_argument("--pages", action="store_true", help="one line per page: {\"page\": n, \"records\": [...]}")
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING, stream=sys.stderr,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+
+    batches = iter_pages(args.scraper, args.max_pages, args.url)
+    try:
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as out:
+                count = write_ndjson(batches, out, args.pages)
+        else:
+            count = write_ndjson(batches, sys.stdout, args.pages)
+    except BrokenPipeError:
+        # The reader went away (e.g. `| head`); stop crawling quietly
+        sys.stderr.close()
+        return 0
+    except ImportError as e:
+        logging.error(f"{args.scraper} is not available: {e}")
+        return 1
+    logging.info(f"Wrote {count} records")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,291 @@
+"""Saved searches, checked against what each scrape added or changed.
+
+    python -m scraper.alerts list
+    python -m scraper.alerts add "Science for students" contests_korea.json \\
+        --filter Category=과학/공학 --filter Target=대학생
+    python -m scraper.alerts remove ID
+    python -m scraper.alerts outbox -n 20
+
+A search selects values per column like the app's filters: a record matches
+when, for every column with a selection, it has any of the selected values
+(and its title contains the optional query text). After a snapshot is saved,
+only its added and changed records are checked. Searches are indexed by one
+value they require, so a record is only checked against the searches that ask
+for one of its own values; the cost follows the size of the change, not the
+dataset times the number of searches. Matches are appended to
+alerts_outbox.jsonl and, when a webhook is set (per search or through
+SCRAPER_ALERT_WEBHOOK), posted there as well.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+import uuid
+from datetime import datetime
+
+from .dataset import INDEX_COLUMNS
+from .diff import record_id
+from .storage import write_json_atomic
+
+logger = logging.getLogger(__name__)
+
+SEARCHES_FILE = "saved_searches.json"
+OUTBOX_FILE = "alerts_outbox.jsonl"
+WEBHOOK_ENV = "SCRAPER_ALERT_WEBHOOK"
+WEBHOOK_TIMEOUT = 5
+
+_lock = threading.Lock()
+# Search indexes per searches file, rebuilt when the file changes: {path: (mtime, index)}
+_indexes = {}
+
+
+def searches_path(filename):
+    """Saved searches for the snapshots in filename's folder."""
+    return os.path.join(os.path.dirname(filename), SEARCHES_FILE)
+
+
+def outbox_path(filename):
+    return os.path.join(os.path.dirname(filename), OUTBOX_FILE)
+
+
+def load_searches(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f).get('searches', [])
+
+
+def add_search(path, name, source, filters, query=None, webhook=None):
+    """Store a search over source (a snapshot file name) and return it.
+
+    filters maps columns to the values to look for; empty selections are dropped.
+    """
+    search = {
+        'id': uuid.uuid4().hex[:8],
+        'name': name,
+        'source': os.path.basename(source),
+        'filters': {column: sorted(set(values)) for column, values in filters.items() if values},
+        'query': query or None,
+        'webhook': webhook or None,
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+    }
+    with _lock:
+        searches = load_searches(path)
+        searches.append(search)
+        write_json_atomic(path, {'searches': searches})
+    return search
+
+
+def remove_search(path, search_id):
+    """Delete a search; returns whether it existed."""
+    with _lock:
+        searches = load_searches(path)
+        kept = [s for s in searches if s['id'] != search_id]
+        if len(kept) == len(searches):
+            return False
+        write_json_atomic(path, {'searches': kept})
+    return True
+
+
+def record_tokens(record, column, sep):
+    """The values a record has in a column, split like the Dataset filter indexes."""
+    value = record.get(column)
+    if not isinstance(value, str):
+        return set()
+    return {t.strip() for t in value.split(sep)} if sep else {value}
+
+
+class SearchIndex:
+    """Saved searches by source and by one value they require.
+
+    Each search is filed under its most selective column (the one with the
+    fewest values); a search without filters is checked for every record of
+    its source.
+    """
+
+    def __init__(self, searches):
+        self.searches = {s['id']: s for s in searches}
+        self.by_value = {}
+        self.unfiltered = {}
+        # Columns searches are filed under, per source: {source: {column: separator}}
+        self.columns = {}
+        for search in searches:
+            filters = {c: v for c, v in search['filters'].items() if v}
+            if not filters:
+                self.unfiltered.setdefault(search['source'], []).append(search)
+                continue
+            column = min(filters, key=lambda c: len(filters[c]))
+            self.columns.setdefault(search['source'], {})[column] = separator(search['source'], column)
+            for value in filters[column]:
+                self.by_value.setdefault((search['source'], column, value), []).append(search)
+
+    def __len__(self):
+        return len(self.searches)
+
+    def candidates(self, source, record):
+        """Searches that might match record: those filed under one of its values."""
+        found = {s['id']: s for s in self.unfiltered.get(source, [])}
+        for column, sep in self.columns.get(source, {}).items():
+            for token in record_tokens(record, column, sep):
+                for search in self.by_value.get((source, column, token), ()):
+                    found[search['id']] = search
+        return found.values()
+
+    def matching(self, source, record):
+        return [s for s in self.candidates(source, record) if matches(s, record)]
+
+
+def separator(source, column):
+    """How a source's column splits into values (see dataset.INDEX_COLUMNS); None for whole values."""
+    return INDEX_COLUMNS.get(source, {}).get(column)
+
+
+def matches(search, record):
+    for column, values in search['filters'].items():
+        if values and record_tokens(record, column, separator(search['source'], column)).isdisjoint(values):
+            return False
+    query = search.get('query')
+    return not query or query.lower() in str(record.get('Title') or '').lower()
+
+
+def search_index(path):
+    """The SearchIndex for a searches file, rebuilt only when the file changed."""
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return SearchIndex([])
+    cached = _indexes.get(path)
+    if cached is None or cached[0] != mtime:
+        cached = (mtime, SearchIndex(load_searches(path)))
+        _indexes[path] = cached
+    return cached[1]
+
+
+def evaluate_delta(filename, diff, key=record_id):
+    """Alerts for the records a save of filename added or changed, written to the outbox.
+
+    A changed record only alerts when it matches now and did not before.
+    Returns the alerts.
+    """
+    index = search_index(searches_path(filename))
+    if not len(index):
+        return []
+    source = os.path.basename(filename)
+    now = datetime.now().isoformat(timespec='seconds')
+    alerts = []
+    for record in diff['added']:
+        for search in index.matching(source, record):
+            alerts.append(_alert(search, 'added', key(record), record, now))
+    for change in diff['changed']:
+        record = change['record']
+        before = dict(record, **{field: values[0] for field, values in change['fields'].items()})
+        for search in index.matching(source, record):
+            if not matches(search, before):
+                alerts.append(_alert(search, 'changed', change['id'], record, now))
+    if alerts:
+        deliver(outbox_path(filename), alerts, index)
+    logger.info(
+        f"{filename}: checked {len(diff['added']) + len(diff['changed'])} records against "
+        f"{len(index)} saved searches, {len(alerts)} alerts"
+    )
+    return alerts
+
+
+def _alert(search, event, rid, record, now):
+    return {
+        'created_at': now,
+        'search_id': search['id'],
+        'search': search['name'],
+        'source': search['source'],
+        'event': event,
+        'id': rid,
+        'record': record,
+    }
+
+
+def deliver(path, alerts, index):
+    """Append alerts to the outbox, then post each search's batch to its webhook, if any."""
+    with _lock:
+        with open(path, "a", encoding="utf-8") as f:
+            for alert in alerts:
+                f.write(json.dumps(alert, ensure_ascii=False) + "\n")
+    batches = {}
+    for alert in alerts:
+        search = index.searches[alert['search_id']]
+        url = search.get('webhook') or os.environ.get(WEBHOOK_ENV)
+        if url:
+            batches.setdefault(url, []).append(alert)
+    if not batches:
+        return
+    import requests
+    for url, batch in batches.items():
+        try:
+            requests.post(url, json={'alerts': batch}, timeout=WEBHOOK_TIMEOUT).raise_for_status()
+        except requests.RequestException as e:
+            # The outbox still has them
+            logger.warning(f"Could not post {len(batch)} alerts to {url}: {e}")
+
+
+def read_outbox(path, limit=None):
+    """Alerts in the outbox, oldest first; only the last limit if given."""
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        alerts = [json.loads(line) for line in f if line.strip()]
+    return alerts[-limit:] if limit else alerts
+
+
+def _parse_filters(pairs):
+    filters = {}
+    for pair in pairs:
+        column, sep, value = pair.partition("=")
+        if not sep or not column or not value:
+            raise ValueError(f"--filter expects COLUMN=VALUE, got {pair!r}")
+        filters.setdefault(column, []).append(value)
+    return filters
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m scraper.alerts", description="Manage saved searches")
+    parser.add_argument("--data-dir", default=".", help="directory holding the snapshots and searches")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("list", help="show saved searches")
+    add = commands.add_parser("add", help="save a search")
+    add.add_argument("name")
+    add.add_argument("source", choices=sorted(INDEX_COLUMNS), help="snapshot file the search applies to")
+    add.add_argument("--filter", action="append", default=[], metavar="COLUMN=VALUE",
+                     help="repeat for several values; values of one column are alternatives")
+    add.add_argument("--query", help="text the title must contain")
+    add.add_argument("--webhook", help="URL to post matches to")
+    remove = commands.add_parser("remove", help="delete a saved search")
+    remove.add_argument("id")
+    outbox = commands.add_parser("outbox", help="show recent alerts")
+    outbox.add_argument("-n", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    path = os.path.join(args.data_dir, SEARCHES_FILE)
+    if args.command == "list":
+        for search in load_searches(path):
+            print(f"{search['id']}  {search['source']}  {search['name']}  "
+                  f"{json.dumps(search['filters'], ensure_ascii=False)}  {search.get('query') or ''}")
+    elif args.command == "add":
+        try:
+            filters = _parse_filters(args.filter)
+        except ValueError as e:
+            parser.error(str(e))
+        search = add_search(path, args.name, args.source, filters, args.query, args.webhook)
+        print(search['id'])
+    elif args.command == "remove":
+        if not remove_search(path, args.id):
+            print(f"No saved search {args.id}", file=sys.stderr)
+            return 1
+    else:
+        for alert in read_outbox(os.path.join(args.data_dir, OUTBOX_FILE), args.n):
+            print(f"{alert['created_at']}  {alert['search']}  {alert['event']}  {alert['record'].get('Title')}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
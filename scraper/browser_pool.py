@@ -0,0 +1,240 @@
+"""A long-lived Chromium for the Playwright scrapers, handing out pre-warmed contexts.
+
+    python -m scraper.browser_pool                   # serve a browser on ws://127.0.0.1:3000/
+    SCRAPER_BROWSER_ENDPOINT=ws://127.0.0.1:3000/ python -m scraper.run_ics_playwright
+
+In the app the pool lives as long as the server process, so a refresh reuses
+the running browser instead of starting Python, Playwright and Chromium again.
+One-shot commands connect to the served browser when SCRAPER_BROWSER_ENDPOINT
+is set and launch their own otherwise. The server restarts the browser if it
+exits; a pool whose browser crashed or disconnected starts (or connects to) a
+new one for the next job.
+"""
+import argparse
+import atexit
+import logging
+import os
+import queue
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+BROWSER_ENDPOINT_ENV = "SCRAPER_BROWSER_ENDPOINT"
+# Contexts kept open and ready; one is in use at a time, the rest are spares
+POOL_SIZE = 2
+# Page loads after which a context is closed and replaced, to bound its memory
+PAGES_PER_CONTEXT = 100
+SERVER_HOST = "127.0.0.1"
+SERVER_PORT = 3000
+RESTART_DELAY = 2
+
+
+class _Slot:
+    """A browser context with one page, counting the page loads it has served."""
+
+    def __init__(self, browser):
+        self.context = browser.new_context()
+        self.page = self.context.new_page()
+        self.loads = 0
+        self.page.on("load", self._loaded)
+
+    def _loaded(self, _page=None):
+        self.loads += 1
+
+    def close(self):
+        try:
+            self.context.close()
+        except Exception as e:
+            logger.debug(f"Closing a browser context failed: {e}")
+
+
+class BrowserPool:
+    """Chromium run on one worker thread, with warm contexts recycled after pages_per_context loads.
+
+    Playwright's sync API is bound to the thread that started it, so jobs run
+    on the pool's thread: run(job) calls job(page) there and returns its
+    result. endpoint (default: $SCRAPER_BROWSER_ENDPOINT) connects to a served
+    browser instead of launching one.
+    """
+
+    def __init__(self, size=POOL_SIZE, pages_per_context=PAGES_PER_CONTEXT, headless=True, endpoint=None):
+        self.size = size
+        self.pages_per_context = pages_per_context
+        self.headless = headless
+        self.endpoint = endpoint or os.environ.get(BROWSER_ENDPOINT_ENV)
+        self.launches = 0
+        self.recycled = 0
+        self._jobs = queue.Queue()
+        self._thread = None
+        self._thread_lock = threading.Lock()
+        self._playwright = None
+        self._browser = None
+        self._idle = []
+
+    def submit(self, job):
+        """Queue job(page) on the pool's thread; returns a Future for its result."""
+        future = Future()
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("submit() from inside a pool job would wait on itself")
+        with self._thread_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._work, name="browser-pool", daemon=True)
+                self._thread.start()
+            self._jobs.put((job, future))
+        return future
+
+    def run(self, job, timeout=None):
+        """job(page) on a warm page; its exceptions are raised here."""
+        return self.submit(job).result(timeout)
+
+    def start(self):
+        """Launch the browser and warm the contexts now rather than on the first job."""
+        self.run(lambda page: None)
+
+    def close(self):
+        with self._thread_lock:
+            thread, self._thread = self._thread, None
+        if thread is not None and thread.is_alive():
+            self._jobs.put(None)
+            thread.join()
+
+    def _work(self):
+        try:
+            from playwright.sync_api import sync_playwright
+            self._playwright = sync_playwright().start()
+        except Exception as e:
+            # Fail what is queued; the next submit() starts a new thread and tries again
+            with self._thread_lock:
+                if self._thread is threading.current_thread():
+                    self._thread = None
+                self._fail_queued(e)
+            return
+        try:
+            while True:
+                item = self._jobs.get()
+                if item is None:
+                    break
+                job, future = item
+                if not future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    future.set_result(self._run(job))
+                except BaseException as e:
+                    future.set_exception(e)
+        finally:
+            self._close_browser()
+            self._playwright.stop()
+            self._playwright = None
+
+    def _fail_queued(self, error):
+        while True:
+            try:
+                item = self._jobs.get_nowait()
+            except queue.Empty:
+                return
+            if item is not None and item[1].set_running_or_notify_cancel():
+                item[1].set_exception(error)
+
+    def _run(self, job):
+        self._ensure_browser()
+        if not self._idle:
+            self._idle.append(_Slot(self._browser))
+        slot = self._idle.pop(0)
+        try:
+            return job(slot.page)
+        finally:
+            self._release(slot)
+
+    def _alive(self):
+        return self._browser is not None and self._browser.is_connected()
+
+    def _ensure_browser(self):
+        if self._alive():
+            return
+        if self._browser is not None:
+            logger.warning("Browser crashed or disconnected; starting a new one")
+            self._close_browser()
+        if self.endpoint:
+            self._browser = self._playwright.chromium.connect(self.endpoint)
+        else:
+            self._browser = self._playwright.chromium.launch(headless=self.headless)
+        self.launches += 1
+        logger.info(f"Browser ready ({'connected to ' + self.endpoint if self.endpoint else 'launched'})")
+
+    def _release(self, slot):
+        if self._alive() and slot.loads < self.pages_per_context and not slot.page.is_closed():
+            self._idle.append(slot)
+        else:
+            slot.close()
+            self.recycled += 1
+        # Warm the spares now, so the next job does not wait for a context
+        try:
+            if self._alive():
+                while len(self._idle) < self.size:
+                    self._idle.append(_Slot(self._browser))
+        except Exception as e:
+            logger.warning(f"Could not warm a browser context: {e}")
+
+    def _close_browser(self):
+        for slot in self._idle:
+            slot.close()
+        self._idle = []
+        if self._browser is not None:
+            try:
+                self._browser.close()
+            except Exception as e:
+                logger.debug(f"Closing the browser failed: {e}")
+            self._browser = None
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool(headless=True):
+    """The process's shared pool, created on first use and closed at exit.
+
+    headless only applies to the first call; later calls get the same browser.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = BrowserPool(headless=headless)
+            atexit.register(_pool.close)
+        elif _pool.headless != headless:
+            logger.warning(f"The browser pool is already running with headless={_pool.headless}; "
+                           f"ignoring headless={headless}")
+        return _pool
+
+
+def serve(host=SERVER_HOST, port=SERVER_PORT):
+    """Run Playwright's browser server, starting it again whenever it exits."""
+    command = [sys.executable, "-m", "playwright", "run-server", "--host", host, "--port", str(port)]
+    logger.info(f"Serving a browser on ws://{host}:{port}/ (set {BROWSER_ENDPOINT_ENV} to use it)")
+    while True:
+        proc = subprocess.Popen(command)
+        try:
+            code = proc.wait()
+        except KeyboardInterrupt:
+            proc.terminate()
+            proc.wait()
+            return 0
+        logger.warning(f"Browser server exited with {code}; restarting in {RESTART_DELAY}s")
+        time.sleep(RESTART_DELAY)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m scraper.browser_pool", description="Serve a shared browser")
+    parser.add_argument("--host", default=SERVER_HOST)
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    return serve(args.host, args.port)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# An older checkpoint describes a site that has moved on; start over instead
+CHECKPOINT_MAX_AGE = 12 * 3600
+
+
+def checkpoint_path(output):
+    """Checkpoint that sits next to a snapshot, e.g. contests_korea.checkpoint.jsonl."""
+    return os.path.splitext(output)[0] + ".checkpoint.jsonl"
+
+
+def page_hash(text):
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+def _canonical(request):
+    return json.dumps(request, sort_keys=True, ensure_ascii=False)
+
+
+class Checkpoint:
+    """Per-page crawl state, appended to a JSONL file as each page is parsed.
+
+    The first line identifies the crawl (source and first request); every other
+    line is one page: its request, the hash of the fetched HTML, the parsed
+    records, whether it was the last page and the request for the next one.
+    A rerun of the same crawl replays the saved pages without fetching them and
+    carries on from the first page that is missing.
+    """
+
+    def __init__(self, path, max_age=CHECKPOINT_MAX_AGE):
+        self.path = path
+        self.max_age = max_age
+        self.pages = {}
+        self._file = None
+        self._lock = threading.Lock()
+
+    def open(self, source):
+        """Load a matching checkpoint for source, or start a new one."""
+        identity = _canonical({'source': source.name, 'start': source.start_request()})
+        header, pages = self._read()
+        if header is not None and header['identity'] == identity and time.time() - header['started'] < self.max_age:
+            self.pages = pages
+            if pages:
+                logger.info(f"[{source.name}] Resuming from checkpoint with {len(pages)} saved pages")
+            self._file = open(self.path, "a", encoding="utf-8")
+        else:
+            self.pages = {}
+            self._file = open(self.path, "w", encoding="utf-8")
+            self._write({'identity': identity, 'started': time.time()})
+        return self
+
+    def _read(self):
+        if not os.path.exists(self.path):
+            return None, {}
+        header, pages = None, {}
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # A crash mid-write leaves a torn last line
+                    break
+                if header is None:
+                    header = entry
+                else:
+                    pages[entry['page']] = entry
+        return header, pages
+
+    def _write(self, entry):
+        with self._lock:
+            self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self._file.flush()
+
+    def page(self, page, request=None):
+        """The saved entry for a page, or None; with request, only if it was fetched the same way."""
+        entry = self.pages.get(page)
+        if entry is None or (request is not None and _canonical(entry['request']) != _canonical(request)):
+            return None
+        return entry
+
+    def save(self, page, request, text, records, last, next_request=None):
+        entry = {
+            'page': page,
+            'request': request,
+            'hash': page_hash(text),
+            'records': records,
+            'last': last,
+            'next': next_request,
+        }
+        self.pages[page] = entry
+        self._write(entry)
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def clear(self):
+        """Drop the checkpoint once its crawl has been saved."""
+        self.close()
+        self.pages = {}
+        if os.path.exists(self.path):
+            os.remove(self.path)
@@ -0,0 +1,106 @@
+import logging
+import os
+import threading
+
+from .diff import record_id
+
+logger = logging.getLogger(__name__)
+
+ARROW_SUFFIX = ".arrow"
+# Typed columns; every other field is stored as it comes (strings for both sources)
+INT_COLUMNS = ('D-Day',)
+CATEGORY_COLUMNS = ('Category', 'Organization')
+# Stored next to the record fields; not part of the records themselves
+ID_COLUMN = '_id'
+
+
+def arrow_path(filename):
+    """Arrow IPC copy of a snapshot, e.g. contests_korea.arrow."""
+    return os.path.splitext(filename)[0] + ARROW_SUFFIX
+
+
+def records_table(records, key=record_id, metadata=None):
+    """The records as an Arrow table with typed columns and their ids."""
+    import pyarrow as pa
+
+    columns = list(dict.fromkeys(field for record in records for field in record))
+    arrays = {}
+    for column in columns:
+        values = [record.get(column) for record in records]
+        if column in INT_COLUMNS:
+            try:
+                arrays[column] = pa.array(values, pa.int32())
+                continue
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                logger.warning(f"{column} is not all integers; storing it as text")
+                values = [None if v is None else str(v) for v in values]
+        array = pa.array(values)
+        if column in CATEGORY_COLUMNS and pa.types.is_string(array.type):
+            # A sorted dictionary, so the categories sort like the text they stand for
+            dictionary = sorted({v for v in values if v is not None})
+            codes = {v: i for i, v in enumerate(dictionary)}
+            array = pa.DictionaryArray.from_arrays(
+                pa.array([codes.get(v) for v in values], pa.int32()), pa.array(dictionary, pa.string())
+            )
+        arrays[column] = array
+    arrays[ID_COLUMN] = pa.array([key(record) for record in records], pa.string())
+    table = pa.table(arrays)
+    return table.replace_schema_metadata({k: str(v) for k, v in (metadata or {}).items()})
+
+
+def write_arrow(filename, records, last_scraped, complete=True, key=record_id):
+    """Write the Arrow copy of the snapshot just saved to filename.
+
+    Uncompressed, so readers can memory-map it. The JSON file's mtime is kept
+    in the metadata; load_arrow() ignores a copy that does not match it.
+    """
+    import pyarrow as pa
+
+    metadata = {
+        'last_scraped': last_scraped or '',
+        'complete': int(bool(complete)),
+        'json_version': os.stat(filename).st_mtime_ns,
+    }
+    table = records_table(records, key, metadata)
+    path = arrow_path(filename)
+    # Unique, since the app may write a copy of a snapshot the scraper is writing too
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with pa.OSFile(tmp, "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp, path)
+    return path
+
+
+def _pandas_type(arrow_type):
+    import pandas as pd
+    import pyarrow as pa
+    # Arrow-backed columns wrap the mapped buffers instead of copying them into
+    # Python objects; dictionary columns become Categoricals (the default)
+    if pa.types.is_string(arrow_type) or pa.types.is_integer(arrow_type):
+        return pd.ArrowDtype(arrow_type)
+    return None
+
+
+def load_arrow(filename, version):
+    """(last_scraped, complete, DataFrame, ids) over a memory-mapped Arrow copy of filename.
+
+    version is the JSON file's mtime (see dataset.file_version); returns None
+    when there is no Arrow copy or it was written for another version.
+    """
+    path = arrow_path(filename)
+    if version is None or not os.path.exists(path):
+        return None
+    import pyarrow as pa
+
+    source = pa.memory_map(path, "r")
+    reader = pa.ipc.open_file(source)
+    metadata = {k.decode(): v.decode() for k, v in (reader.schema.metadata or {}).items()}
+    if metadata.get('json_version') != str(version):
+        return None
+    table = reader.read_all()
+    ids = table.column(ID_COLUMN).to_pandas(types_mapper=_pandas_type)
+    # Copies from older versions may hold other internal (underscore) columns too
+    table = table.drop_columns([c for c in table.column_names if c.startswith('_')])
+    df = table.to_pandas(types_mapper=_pandas_type)
+    return metadata.get('last_scraped') or None, metadata.get('complete') == '1', df, ids
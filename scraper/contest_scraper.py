@@ -1,175 +1,329 @@
+import json
 import logging
-import requests
-from bs4 import BeautifulSoup
-import time
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from .checkpoint import Checkpoint, checkpoint_path
+from .diff import diff_records, record_id
+from .engine import CrawlResult, Engine, FetchError, Source, save_crawl
+from .storage import write_json_atomic
 from .utils import extract_days_left
 
+BASE_URL = "https://www.contestkorea.com"
+LIST_URL = BASE_URL + "/sub/list.php"
+# What the site's own pager uses; max_pages is always counted in these pages
+DEFAULT_PAGE_SIZE = 12
+# displayrow values to try, largest first, before falling back to the default
+PAGE_SIZE_CANDIDATES = (500, 200, 100, 50)
+# Txt_code1 category codes; the default crawl asks for all of them in one stream
+CATEGORY_CODES = ("98", "27", "28", "29")
+# Per-category crawl state for scrape_contests_sharded
+SHARD_STATE_FILE = "contests_korea.shards.json"
+# Seconds between refreshes of a shard; a shard whose last refresh found new or
+# changed contests is "hot" and refreshed more often
+SHARD_REFRESH_SECONDS = 6 * 3600
+HOT_SHARD_REFRESH_SECONDS = 3600
+LIST_PARAMS = {
+    "displayrow": str(DEFAULT_PAGE_SIZE),
+    "int_gbn": "1",
+    "Txt_sGn": "1",
+    "Txt_key": "all",
+    "Txt_word": "",
+    "Txt_bcode": "",
+    "Txt_aarea": "",
+    "Txt_area": "",
+    "Txt_sortkey": "a.int_sort",
+    "Txt_sortword": "desc",
+    "Txt_host": "",
+    "Txt_award": "",
+    "Txt_award2": "",
+    "Txt_code3": "",
+    "Txt_tipyn": "",
+    "Txt_comment": "",
+    "Txt_resultyn": "",
+    "Txt_actcode": "",
+}
 
-def scrape_contests(max_pages=None):
-    base_url = "https://www.contestkorea.com/sub/list.php"
-    params = {
-        "displayrow": "12",
-        "int_gbn": "1",
-        "Txt_sGn": "1",
-        "Txt_key": "all",
-        "Txt_word": "",
-        "Txt_bcode": "",
-        "Txt_code1[0]": "98",
-        "Txt_code1[1]": "27",
-        "Txt_code1[2]": "28",
-        "Txt_code1[3]": "29",
-        "Txt_aarea": "",
-        "Txt_area": "",
-        "Txt_sortkey": "a.int_sort",
-        "Txt_sortword": "desc",
-        "Txt_host": "",
-        "Txt_award": "",
-        "Txt_award2": "",
-        "Txt_code3": "",
-        "Txt_tipyn": "",
-        "Txt_comment": "",
-        "Txt_resultyn": "",
-        "Txt_actcode": "",
-    }
-    
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-        'Accept-Language': 'en-US,en;q=0.5',
-        'Connection': 'keep-alive',
+
+def select_contest_items(soup):
+    """Contest <li> elements on a list page, or None past the last page."""
+    # Find the main container
+    main_container = soup.find('div', class_='list_style_2')
+    if not main_container:
+        return None
+    # Get all list items within the container that have a title div
+    contest_items = main_container.find_all('li', class_=lambda x: x != 'icon_1' and x != 'icon_2')
+    return contest_items or None
+
+
+def parse_contest_item(item, base_url=BASE_URL):
+    """Parse one list item into a contest record, or None if it is not a contest."""
+    # Get title and link from the title div
+    title_div = item.find('div', class_='title')
+    if not title_div:
+        return None
+
+    title_link = title_div.find('a')
+    if not title_link:
+        return None
+
+    # Get category and title
+    category_elem = title_link.find('span', class_='category')
+    title_elem = title_link.find('span', class_='txt')
+
+    if not category_elem or not title_elem:
+        return None
+
+    category = category_elem.text.strip()
+    title = title_elem.text.strip()
+    href = title_link['href']
+    if not href.startswith('/sub/'):
+        href = '/sub/' + href.lstrip('/')
+    link = base_url + href
+
+    # Get host information
+    host_ul = item.find('ul', class_='host')
+    organization = "N/A"
+    target = "N/A"
+
+    if host_ul:
+        host_li = host_ul.find('li', class_='icon_1')
+        if host_li:
+            organization = host_li.text.replace('주최.', '').strip()
+
+        target_li = host_ul.find('li', class_='icon_2')
+        if target_li:
+            # Remove '대상.' and clean up spaces
+            target = target_li.text.replace('대상.', '').strip()
+            # Remove multiple spaces and newlines
+            target = ' '.join(target.split())
+
+    # Get date information
+    date_div = item.find('div', class_='date')
+    date_info = "N/A"
+    if date_div:
+        date_spans = date_div.find_all('span')
+        dates = []
+        for span in date_spans:
+            step = span.find('em')
+            if step:
+                step_text = step.text.strip()
+                date = span.text.replace(step_text, '').strip()
+                dates.append(f"{step_text}: {date}")
+        date_info = " | ".join(dates) if dates else "N/A"
+
+    # Get D-day information
+    dday_div = item.find('div', class_='d-day')
+    days_left = 0
+    if dday_div:
+        dday = dday_div.find('span', class_='day')
+        if dday:
+            dday_text = dday.text.strip()
+            days_left = extract_days_left(dday_text)
+
+    logging.info(f"Successfully processed contest: {title}")
+    return {
+        'Category': category,
+        'Title': title,
+        'Organization': organization,
+        'Target': target,
+        'Date Info': date_info,
+        'D-Day': days_left,  # Store as integer for sorting and display
+        'Link': link
     }
-    
-    all_contests = []
-    page = 1
-    
-    try:
-        # Set the number of pages to scrape
-        pages_to_scrape = max_pages if max_pages is not None else float('inf')
-        logging.info(f"Will attempt to scrape up to {pages_to_scrape} pages")
-        
-        # Scrape each page until we hit the limit or find an invalid page
-        while True:
-            # Check if we've hit the page limit
-            if page > pages_to_scrape:
-                break
-                
-            params["page"] = page
-            response = requests.get(base_url, params=params, headers=headers, timeout=10)
-            
-            # If we get a 404 or no content, we've reached the end
-            if response.status_code == 404 or len(response.content) == 0:
-                logging.info(f"Reached end of available pages at page {page-1}")
-                break
-                
-            response.raise_for_status()
-            soup = BeautifulSoup(response.text, 'lxml')
-            
-            # Find the main container
-            main_container = soup.find('div', class_='list_style_2')
-            if not main_container:
-                logging.info(f"No more contests found at page {page}")
-                break
-                
-            # Get all list items within the container that have a title div
-            contest_items = main_container.find_all('li', class_=lambda x: x != 'icon_1' and x != 'icon_2')
-            
-            if not contest_items:
-                logging.info(f"No contest items found on page {page}")
+
+
+class ContestKoreaSource(Source):
+    """contestkorea.com list pages, addressed by page number.
+
+    Without a page_size, prepare() probes for the largest displayrow the server
+    honors, so a full crawl takes a handful of large pages instead of many small ones.
+    """
+    name = "contestkorea"
+    numbered_pages = True
+    output_file = "contests_korea.json"
+
+    def __init__(self, base_url=BASE_URL, page_size=None, codes=CATEGORY_CODES):
+        self.base_url = base_url
+        self.page_size = page_size
+        self.codes = tuple(codes)
+        if self.codes != CATEGORY_CODES:
+            self.name = "contestkorea-" + "-".join(self.codes)
+        # Probe responses, handed back when the crawl asks for the same page
+        self._probed = {}
+
+    def prepare(self, engine):
+        if self.page_size is None:
+            self.page_size = self.probe_page_size(engine)
+            keep = str(self.page_size)
+            self._probed = {k: v for k, v in self._probed.items() if dict(k[1]).get('displayrow') == keep}
+
+    def fetch(self, engine, url, params):
+        key = (url, tuple(sorted(params.items())))
+        response = self._probed.pop(key, None)
+        if response is None:
+            response = super().fetch(engine, url, params)
+            if self.page_size is None and response[0] in (200, 404):
+                self._probed[key] = response
+        return response
+
+    def probe_page_size(self, engine):
+        """Largest displayrow the server honors, or DEFAULT_PAGE_SIZE."""
+        for size in PAGE_SIZE_CANDIDATES:
+            try:
+                _, items = engine.fetch_items(self, self._request(1, size))
+                count = len(items or [])
+                if count == size or count < DEFAULT_PAGE_SIZE:
+                    # Honored, or everything fits on one page either way
+                    break
+                if count == DEFAULT_PAGE_SIZE:
+                    logging.info(f"[{self.name}] displayrow is ignored, using {DEFAULT_PAGE_SIZE}")
+                    return DEFAULT_PAGE_SIZE
+                # A short first page is either all the data or a server-side cap
+                _, more = engine.fetch_items(self, self._request(2, size))
+                if more:
+                    size = count
                 break
-                
-            logging.info(f"Found {len(contest_items)} contest items on page {page}")
-            
-            for item in contest_items:
-                try:
-                    # Get title and link from the title div
-                    title_div = item.find('div', class_='title')
-                    if not title_div:
-                        continue
-                        
-                    title_link = title_div.find('a')
-                    if not title_link:
-                        continue
-                        
-                    # Get category and title
-                    category_elem = title_link.find('span', class_='category')
-                    title_elem = title_link.find('span', class_='txt')
-                    
-                    if not category_elem or not title_elem:
-                        continue
-                        
-                    category = category_elem.text.strip()
-                    title = title_elem.text.strip()
-                    href = title_link['href']
-                    if not href.startswith('/sub/'):
-                        href = '/sub/' + href.lstrip('/')
-                    link = "https://www.contestkorea.com" + href
-                    
-                    # Get host information
-                    host_ul = item.find('ul', class_='host')
-                    organization = "N/A"
-                    target = "N/A"
-                    
-                    if host_ul:
-                        host_li = host_ul.find('li', class_='icon_1')
-                        if host_li:
-                            organization = host_li.text.replace('주최.', '').strip()
-                        
-                        target_li = host_ul.find('li', class_='icon_2')
-                        if target_li:
-                            # Remove '대상.' and clean up spaces
-                            target = target_li.text.replace('대상.', '').strip()
-                            # Remove multiple spaces and newlines
-                            target = ' '.join(target.split())
-                    
-                    # Get date information
-                    date_div = item.find('div', class_='date')
-                    date_info = "N/A"
-                    if date_div:
-                        date_spans = date_div.find_all('span')
-                        dates = []
-                        for span in date_spans:
-                            step = span.find('em')
-                            if step:
-                                step_text = step.text.strip()
-                                date = span.text.replace(step_text, '').strip()
-                                dates.append(f"{step_text}: {date}")
-                        date_info = " | ".join(dates) if dates else "N/A"
-                    
-                    # Get D-day information
-                    dday_div = item.find('div', class_='d-day')
-                    days_left = 0
-                    if dday_div:
-                        dday = dday_div.find('span', class_='day')
-                        if dday:
-                            dday_text = dday.text.strip()
-                            days_left = extract_days_left(dday_text)
-                    
-                    all_contests.append({
-                        'Category': category,
-                        'Title': title,
-                        'Organization': organization,
-                        'Target': target,
-                        'Date Info': date_info,
-                        'D-Day': days_left,  # Store as integer for sorting and display
-                        'Link': link
-                    })
-                    
-                    logging.info(f"Successfully processed contest: {title}")
-                    
-                except Exception as e:
-                    logging.error(f"Error processing item on page {page}: {str(e)}")
-                    continue
-            
-            # Move to next page
-            page += 1
-            
-            # Add a small delay to avoid overloading the server
-            time.sleep(1)
-        
-        return all_contests
-    except requests.exceptions.RequestException as e:
-        logging.error(f"Network error occurred: {str(e)}")
-        return all_contests
-    except Exception as e:
-        logging.error(f"Error scraping contests: {str(e)}")
-        return all_contests 
\ No newline at end of file
+            except (FetchError, OSError) as e:
+                logging.warning(f"[{self.name}] Page size probe failed: {e}")
+                return DEFAULT_PAGE_SIZE
+        logging.info(f"[{self.name}] Using displayrow={size}")
+        return size
+
+    def _request(self, page, size):
+        params = dict(LIST_PARAMS, page=page, displayrow=str(size))
+        for i, code in enumerate(self.codes):
+            params[f"Txt_code1[{i}]"] = code
+        return self.base_url + "/sub/list.php", params
+
+    def page_request(self, page):
+        return self._request(page, self.page_size or DEFAULT_PAGE_SIZE)
+
+    def is_last_page(self, items):
+        return len(items) < (self.page_size or DEFAULT_PAGE_SIZE)
+
+    def select_items(self, soup):
+        return select_contest_items(soup)
+
+    def parse_item(self, item):
+        return parse_contest_item(item, self.base_url)
+
+
+def iter_contest_pages(source, engine, max_pages=None, result=None, checkpoint=None):
+    """Yield (page, records) for a ContestKoreaSource as each list page is parsed.
+
+    max_pages counts the site's 12-row pages whatever displayrow is used.
+    """
+    source.prepare(engine)
+    if max_pages is None:
+        logging.info(f"[{source.name}] Will attempt to scrape all pages of {source.page_size}")
+        yield from engine.iter_pages(source, result=result, checkpoint=checkpoint)
+        return
+    remaining = max_pages * DEFAULT_PAGE_SIZE
+    logging.info(f"[{source.name}] Will attempt to scrape up to {remaining} contests")
+    limit = math.ceil(remaining / source.page_size)
+    for page, records in engine.iter_pages(source, limit, result, checkpoint):
+        records = records[:max(0, remaining)]
+        remaining -= len(records)
+        yield page, records
+
+
+def crawl_contests(source, engine, max_pages=None):
+    """Crawl a ContestKoreaSource; returns (CrawlResult, records)."""
+    result = CrawlResult(source)
+    records = [r for _, page_records in iter_contest_pages(source, engine, max_pages, result) for r in page_records]
+    return result, records
+
+
+def iter_contests(max_pages=None, base_url=BASE_URL, engine=None, page_size=None):
+    """Yield contest records as soon as each list page is parsed."""
+    engine = engine or Engine()
+    for _, records in iter_contest_pages(ContestKoreaSource(base_url, page_size), engine, max_pages):
+        yield from records
+
+
+def scrape_contests(max_pages=None, base_url=BASE_URL, engine=None, page_size=None):
+    return list(iter_contests(max_pages, base_url, engine, page_size))
+
+
+def update_contests(max_pages=None, output=ContestKoreaSource.output_file, base_url=BASE_URL, engine=None,
+                    resume=True):
+    """Crawl with a checkpoint next to output and save the snapshot; returns the CrawlResult.
+
+    If the crawl stops early, the existing complete snapshot is kept
+    (result.diff is None) and the next call resumes from the checkpoint.
+    """
+    engine = engine or Engine()
+    source = ContestKoreaSource(base_url)
+    checkpoint = Checkpoint(checkpoint_path(output)) if resume else None
+    result = CrawlResult(source)
+    for _, records in iter_contest_pages(source, engine, max_pages, result, checkpoint):
+        result.records.extend(records)
+    return save_crawl(output, result, checkpoint, key=source.key)
+
+
+def load_shard_state(path=SHARD_STATE_FILE):
+    """{code: {'crawled_at', 'hot', 'records'}}; empty if the file is missing or unreadable."""
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logging.warning(f"Could not read shard state {path}: {e}")
+        return {}
+
+
+def shard_due(entry, now, refresh_seconds=SHARD_REFRESH_SECONDS, hot_refresh_seconds=HOT_SHARD_REFRESH_SECONDS):
+    """True if a shard was never crawled or its refresh interval has passed."""
+    if not entry or not entry.get('crawled_at'):
+        return True
+    interval = hot_refresh_seconds if entry.get('hot') else refresh_seconds
+    age = (now - datetime.fromisoformat(entry['crawled_at'])).total_seconds()
+    return age >= interval
+
+
+def scrape_contests_sharded(codes=CATEGORY_CODES, base_url=BASE_URL, engine=None, max_pages=None,
+                            state_file=SHARD_STATE_FILE, force=False):
+    """Crawl one query per category code in parallel and merge the shards.
+
+    Only shards that are due (see shard_due) are crawled; force=True or a
+    collection of codes refreshes those regardless. The others contribute the
+    records from their last crawl, kept in state_file. Contests listed under
+    several categories appear once, deduped by record_id.
+    """
+    engine = engine or Engine()
+    state = load_shard_state(state_file)
+    now = datetime.now()
+    due = [c for c in codes if force is True or c in (force or ()) or shard_due(state.get(c), now)]
+    logging.info(f"Refreshing category shards {due or 'none'} of {list(codes)}")
+
+    def crawl_shard(code):
+        return crawl_contests(ContestKoreaSource(base_url, codes=(code,)), engine, max_pages)
+
+    # The shards share one engine, so its AIMD limit caps requests across all of them
+    with ThreadPoolExecutor(max_workers=max(1, len(due))) as pool:
+        results = dict(zip(due, pool.map(crawl_shard, due)))
+
+    for code, (result, records) in results.items():
+        entry = state.get(code) or {}
+        previous = entry.get('records', [])
+        if not result.complete and previous:
+            logging.warning(f"Shard {code} crawl incomplete; keeping its previous {len(previous)} records")
+            continue
+        diff = diff_records(previous, records)
+        state[code] = {
+            # An incomplete first crawl is kept but stays due
+            'crawled_at': now.isoformat(timespec='seconds') if result.complete else None,
+            'hot': bool(diff['added'] or diff['changed']),
+            'records': records,
+        }
+    if results:
+        write_json_atomic(state_file, state, indent=None)
+
+    merged = {}
+    for code in codes:
+        for record in (state.get(code) or {}).get('records', []):
+            merged.setdefault(record_id(record), record)
+    return list(merged.values())
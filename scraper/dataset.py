@@ -0,0 +1,290 @@
+import logging
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from .columnar import load_arrow, write_arrow
+from .diff import record_id
+from .history import records_as_of, resolve
+from .storage import ids_added_since, read_changes, read_snapshot
+
+logger = logging.getLogger(__name__)
+
+# Filter indexes per data file: {column: separator}; None indexes the whole value
+INDEX_COLUMNS = {
+    "contests_korea.json": {'Category': None, 'Target': ','},
+    "ics_competitions.json": {'Categories': ','},
+}
+# Past versions kept in memory by DatasetStore.get_as_of
+HISTORY_CACHE_SIZE = 4
+# Filtered/sorted views kept per Dataset by Dataset.memo
+VIEW_CACHE_SIZE = 64
+
+
+def file_version(filename):
+    """Cheap version token for a data file (its mtime), or None if it is missing."""
+    try:
+        return os.stat(filename).st_mtime_ns
+    except OSError:
+        return None
+
+
+def build_index(series, sep=None):
+    """{token: row positions} for a column; with sep, each cell holds several tokens.
+
+    Cells repeat a lot, so only the distinct values are split in Python; the
+    rows are grouped with numpy. That keeps indexing a mapped Arrow dataset cheap.
+    """
+    codes, values = pd.factorize(series)
+    order = np.argsort(codes, kind='stable')
+    sorted_codes = codes[order]
+    bounds = np.searchsorted(sorted_codes, np.arange(len(values) + 1))
+    groups = {}
+    for code, value in enumerate(values):
+        if not isinstance(value, str):
+            continue
+        tokens = [t.strip() for t in value.split(sep)] if sep else [value]
+        for token in dict.fromkeys(tokens):
+            groups.setdefault(token, []).append(order[bounds[code]:bounds[code + 1]])
+    frozen = {}
+    for token, parts in groups.items():
+        array = np.sort(np.concatenate(parts)) if len(parts) > 1 else np.ascontiguousarray(parts[0])
+        array = array.astype(np.int64, copy=False)
+        array.flags.writeable = False
+        frozen[token] = array
+    return frozen
+
+
+def filter_signature(selections):
+    """Canonical, hashable form of {column: selected values}: sorted, without empty selections."""
+    return tuple(sorted((column, tuple(sorted(set(values)))) for column, values in selections.items() if values))
+
+
+def rows_token(rows):
+    """Hashable stand-in for a row position array (None for all rows)."""
+    if rows is None:
+        return None
+    rows = np.ascontiguousarray(rows, dtype=np.int64)
+    return len(rows), hash(rows.tobytes())
+
+
+def _missing(value):
+    return value is None or value is pd.NA or (isinstance(value, float) and value != value)
+
+
+def clean_record(row):
+    """A record from a DataFrame row (or dict), with None for missing values like the scraped records."""
+    return {k: None if _missing(v) else v for k, v in dict(row).items()}
+
+
+def frame_records(df):
+    return [clean_record(row) for row in df.to_dict('records')]
+
+
+class Dataset:
+    """One version of a data file: records, DataFrame and filter indexes.
+
+    Shared by every session, so treat it as read-only; anything derived from it
+    goes through derive() and is computed once per version. A Dataset can be
+    built over a DataFrame (and its ids) instead of records, e.g. one mapped
+    from an Arrow file; the records are then only built when asked for.
+    """
+
+    def __init__(self, filename, version, last_scraped, records, index_columns=None, error=None, frame=None, ids=None):
+        self.filename = filename
+        self.version = version
+        self.last_scraped = last_scraped
+        self.error = error
+        self._records = records
+        self.df = pd.DataFrame(records) if frame is None else frame
+        if ids is None:
+            self.ids = pd.Series([record_id(r) for r in records], index=self.df.index, dtype=object)
+        else:
+            self.ids = ids.set_axis(self.df.index)
+        self.indexes = {
+            column: build_index(self.df[column], sep)
+            for column, sep in (index_columns or {}).items()
+            if column in self.df.columns
+        }
+        self._derived = {}
+        self._views = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.df)
+
+    @property
+    def records(self):
+        """The records as dicts, in file order."""
+        if self._records is None:
+            self._records = self.derive('records', frame_records, self.df)
+        return self._records
+
+    def record(self, pos):
+        """One record by row position, without building all of them."""
+        if self._records is not None:
+            return self._records[pos]
+        return clean_record(self.df.iloc[pos])
+
+    def derive(self, key, func, *args):
+        """func(*args), computed once for this version and shared by all sessions."""
+        with self._lock:
+            if key not in self._derived:
+                self._derived[key] = func(*args)
+            return self._derived[key]
+
+    def memo(self, key, func, *args):
+        """Like derive(), but only the VIEW_CACHE_SIZE most recently used results are kept."""
+        with self._lock:
+            if key in self._views:
+                # Most recently used last
+                self._views[key] = self._views.pop(key)
+                return self._views[key]
+        value = func(*args)
+        with self._lock:
+            self._views[key] = value
+            while len(self._views) > VIEW_CACHE_SIZE:
+                self._views.pop(next(iter(self._views)))
+        return value
+
+    def view_key(self, selections, rows=None, sort_key=None, ascending=True):
+        """The memo key of view(); also a stable signature of the view for other caches."""
+        return ('view', filter_signature(selections), rows_token(rows), sort_key, ascending)
+
+    def view(self, selections, rows=None, sort_key=None, ascending=True):
+        """Row positions for a selection (see positions()), sorted by sort_key; memoized.
+
+        Sorting is stable with missing values last, so paging over the result
+        is stable too. The returned array is shared; do not modify it.
+        """
+        return self.memo(self.view_key(selections, rows, sort_key, ascending),
+                         self._view, selections, rows, sort_key, ascending)
+
+    def _view(self, selections, rows, sort_key, ascending):
+        if sort_key is None:
+            positions = self.positions(selections, rows)
+            positions = np.arange(len(self.df)) if positions is None else positions
+        else:
+            positions = self.view(selections, rows)
+            if sort_key in self.df.columns:
+                column = self.df[sort_key].iloc[positions].reset_index(drop=True)
+                positions = positions[column.sort_values(ascending=ascending, kind='stable', na_position='last').index]
+        # A copy, so freezing it never touches the caller's rows
+        positions = np.array(positions, dtype=np.int64)
+        positions.flags.writeable = False
+        return positions
+
+    def positions(self, selections, rows=None):
+        """Row positions matching any selected value in every column with a selection.
+
+        An empty selection does not filter; rows (positions) narrows the result further.
+        """
+        result = None if rows is None else np.asarray(rows, dtype=np.int64)
+        for column, values in selections.items():
+            if not values:
+                continue
+            index = self.indexes[column]
+            hits = [index[v] for v in values if v in index]
+            matched = np.unique(np.concatenate(hits)) if hits else np.empty(0, dtype=np.int64)
+            result = matched if result is None else np.intersect1d(result, matched, assume_unique=True)
+        return result
+
+    def select(self, selections, rows=None):
+        """The DataFrame rows for positions(selections, rows), in file order."""
+        positions = self.positions(selections, rows)
+        return self.df if positions is None else self.df.iloc[positions]
+
+    def added_since(self, since=None):
+        """IDs added after an ISO timestamp (see storage.added_since), from a cached change log."""
+        return ids_added_since(self.derive('changes', read_changes, self.filename), since)
+
+
+def load_dataset(filename, index_columns=None):
+    """Read a snapshot into a Dataset; a missing or unreadable file gives an empty one."""
+    version = file_version(filename)
+    if index_columns is None:
+        index_columns = INDEX_COLUMNS.get(os.path.basename(filename))
+    if version is None:
+        return Dataset(filename, None, None, [], index_columns)
+    # The Arrow copy maps straight into the DataFrame; JSON has to be parsed and copied
+    try:
+        mapped = load_arrow(filename, version)
+    except (ImportError, OSError, ValueError) as e:
+        logger.warning(f"Could not map the Arrow copy of {filename}: {e}")
+        mapped = None
+    if mapped is not None:
+        last_scraped, _, df, ids = mapped
+        return Dataset(filename, version, last_scraped, None, index_columns, frame=df, ids=ids)
+    try:
+        data = read_snapshot(filename)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Failed to load {filename}: {e}")
+        return Dataset(filename, version, None, [], index_columns, error=e)
+    # Snapshots saved before the Arrow copy existed get one now, for the next load
+    try:
+        write_arrow(filename, data['contests'], data['last_scraped'], data['complete'])
+    except (ImportError, OSError, ValueError) as e:
+        logger.warning(f"Could not write the Arrow copy of {filename}: {e}")
+    return Dataset(filename, version, data['last_scraped'], data['contests'], index_columns)
+
+
+def load_dataset_as_of(filename, when, index_columns=None):
+    """A Dataset for the snapshot history of filename as of a date; raises LookupError before the first."""
+    if index_columns is None:
+        index_columns = INDEX_COLUMNS.get(os.path.basename(filename))
+    entry, records = records_as_of(filename, when)
+    return Dataset(filename, f"asof-{entry['scraped_at']}", entry['scraped_at'][:10], records, index_columns)
+
+
+class DatasetStore:
+    """Process-wide holder of the current Dataset per file.
+
+    get() reloads when the file's version changes and swaps the new Dataset in
+    under a lock; readers keep whatever version they already hold. While one
+    thread loads a new version, the others keep getting the current one.
+    """
+
+    def __init__(self):
+        self._datasets = {}
+        self._lock = threading.Lock()
+        self._history = {}
+        self._history_lock = threading.Lock()
+
+    def get(self, filename):
+        version = file_version(filename)
+        current = self._datasets.get(filename)
+        if current is not None and current.version == version:
+            return current
+        # Only wait for a load when there is nothing to serve yet
+        if not self._lock.acquire(blocking=current is None):
+            return current
+        try:
+            current = self._datasets.get(filename)
+            if current is None or current.version != version:
+                current = load_dataset(filename)
+                logger.info(f"Loaded {filename} version {current.version} ({len(current)} records)")
+                self._datasets[filename] = current
+            return current
+        finally:
+            self._lock.release()
+
+    def get_as_of(self, filename, when):
+        """The Dataset for filename as of a past date, keeping the last few in memory.
+
+        Raises LookupError when the history does not reach back that far.
+        """
+        entry = resolve(filename, when)
+        if entry is None:
+            raise LookupError(f"{filename}: no snapshot on or before {when}")
+        key = (filename, entry['scraped_at'])
+        with self._history_lock:
+            dataset = self._history.pop(key, None)
+            if dataset is None:
+                dataset = load_dataset_as_of(filename, entry['scraped_at'])
+            # Most recently used last
+            self._history[key] = dataset
+            while len(self._history) > HISTORY_CACHE_SIZE:
+                self._history.pop(next(iter(self._history)))
+        return dataset
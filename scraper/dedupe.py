@@ -0,0 +1,310 @@
+"""Find the same contest listed twice, within or across sources, with MinHash and LSH.
+
+    python -m scraper.dedupe              # update duplicates.npz from the current snapshots
+    python -m scraper.dedupe --rebuild    # recompute every signature
+
+Titles and organizations are normalized and cut into character 3-grams. Each
+record gets a MinHash signature; records that share a band of their signature
+land in the same LSH bucket and become candidates. Only candidates get the
+exact similarity check, so the cost grows with the number of records rather
+than the number of pairs. Signatures and confirmed pairs are kept in
+duplicates.npz; an update only signs records that are new or whose title or
+organization changed, and only checks candidate pairs that involve them.
+"""
+import argparse
+import logging
+import os
+import re
+import sys
+import unicodedata
+import zlib
+
+import numpy as np
+
+from .diff import record_id
+from .storage import load_snapshot
+
+logger = logging.getLogger(__name__)
+
+DUPLICATES_FILE = "duplicates.npz"
+# Snapshot files to compare, by basename, and the short name used in keys ("korea:<id>")
+SOURCES = {"contests_korea.json": "korea", "ics_competitions.json": "ics"}
+
+SHINGLE_SIZE = 3
+NUM_PERM = 64
+# 16 bands of 4 rows: pairs from about 0.5 Jaccard up become candidates
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+MERSENNE_PRIME = (1 << 31) - 1
+SEED = 42
+# Confirmation: titles must be this similar, or a little less when both
+# records name an organization and those match too
+TITLE_THRESHOLD = 0.85
+TITLE_THRESHOLD_SAME_ORGANIZATION = 0.75
+ORGANIZATION_THRESHOLD = 0.5
+
+_rng = np.random.default_rng(SEED)
+_PERM_A = _rng.integers(1, MERSENNE_PRIME, NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.integers(0, MERSENNE_PRIME, NUM_PERM, dtype=np.uint64)
+_BAND_MIX = _rng.integers(1, 1 << 63, ROWS, dtype=np.uint64) | np.uint64(1)
+
+# Contest Korea writes "주최 . name"; a leading role label is not part of the name
+_ORG_PREFIX = re.compile(r"^\s*(주최|주관|host(ed by)?)\s*[.:]?\s*", re.IGNORECASE)
+_NOISE = re.compile(r"[\W_]+")
+_NUMBER = re.compile(r"\d+")
+
+
+def normalize(text, organization=False):
+    """Case-, width- and punctuation-insensitive form of a title or organization."""
+    if not isinstance(text, str):
+        return ""
+    text = unicodedata.normalize("NFKC", text).lower()
+    if organization:
+        text = _ORG_PREFIX.sub("", text)
+    return _NOISE.sub("", text)
+
+
+def shingles(text, size=SHINGLE_SIZE):
+    if not text:
+        return set()
+    if len(text) <= size:
+        return {text}
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+def item_shingles(title, organization):
+    """Title 3-grams and organization 3-grams (marked, so they never match a title's)."""
+    return shingles(title) | {"@" + s for s in shingles(organization)}
+
+
+def minhash(shingle_set):
+    """NUM_PERM-long uint64 signature; empty sets get an all-max signature that matches nothing."""
+    if not shingle_set:
+        return np.full(NUM_PERM, MERSENNE_PRIME, dtype=np.uint64)
+    hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingle_set), dtype=np.uint64, count=len(shingle_set))
+    hashes %= MERSENNE_PRIME
+    return ((_PERM_A[:, None] * hashes[None, :] + _PERM_B[:, None]) % MERSENNE_PRIME).min(axis=1)
+
+
+def band_keys(signatures):
+    """(n, BANDS) bucket keys: each band's ROWS values mixed into one uint64.
+
+    A collision between different bands only adds a candidate, which the
+    similarity check then rejects.
+    """
+    return (signatures.reshape(len(signatures), BANDS, ROWS) * _BAND_MIX).sum(axis=2)
+
+
+def candidate_pairs(signatures, fresh):
+    """Index pairs (i < j) that share an LSH bucket, with at least one of them in fresh."""
+    keys = band_keys(signatures)
+    valid = signatures[:, 0] != MERSENNE_PRIME
+    fresh_rows = np.array([i for i in sorted(fresh) if valid[i]], dtype=np.int64)
+    pairs = set()
+    for band in range(BANDS):
+        column = keys[:, band]
+        # Only buckets that hold a fresh record matter
+        buckets = {}
+        for i in np.flatnonzero(np.isin(column, column[fresh_rows]) & valid).tolist():
+            buckets.setdefault(column[i], []).append(i)
+        for members in buckets.values():
+            for a in members:
+                if a not in fresh:
+                    continue
+                for b in members:
+                    if b != a:
+                        pairs.add((min(a, b), max(a, b)))
+    return pairs
+
+
+def jaccard(a, b):
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def similarity(a, b):
+    """Title Jaccard of two (title, organization) pairs, or None if they are not duplicates."""
+    # Different years, editions or grades ("2024" / "2025", "제2회" / "제3회") are different contests
+    if set(_NUMBER.findall(a[0])) != set(_NUMBER.findall(b[0])):
+        return None
+    threshold = TITLE_THRESHOLD
+    if a[1] and b[1]:
+        if jaccard(shingles(a[1]), shingles(b[1])) < ORGANIZATION_THRESHOLD:
+            return None
+        threshold = TITLE_THRESHOLD_SAME_ORGANIZATION
+    title = jaccard(shingles(a[0]), shingles(b[0]))
+    return title if title >= threshold else None
+
+
+class Duplicates:
+    """Confirmed duplicate pairs over keyed records ("<source>:<record id>"), grouped into clusters."""
+
+    def __init__(self, keys, pairs, scores=(), version=None):
+        self.keys = list(keys)
+        self.version = version
+        self.pairs = [tuple(p) for p in pairs]
+        self.scores = list(scores)
+        parent = {}
+
+        def find(key):
+            parent.setdefault(key, key)
+            while parent[key] != key:
+                parent[key] = parent[parent[key]]
+                key = parent[key]
+            return key
+
+        for a, b in self.pairs:
+            ra, rb = find(a), find(b)
+            if ra != rb:
+                parent[rb] = ra
+        order = {key: i for i, key in enumerate(self.keys)}
+        groups = {}
+        for key in parent:
+            groups.setdefault(find(key), []).append(key)
+        # Members in key order, so the first one is the listing that is kept when collapsing
+        self.clusters = sorted(
+            (sorted(members, key=lambda k: order.get(k, len(order))) for members in groups.values()),
+            key=lambda members: order.get(members[0], len(order)),
+        )
+        self.cluster_of = {key: members for members in self.clusters for key in members}
+
+    def __len__(self):
+        return len(self.clusters)
+
+    def collapsed(self, source, ids):
+        """Positions (into ids) of records that duplicate an earlier record of the same source."""
+        hidden, seen = [], set()
+        for pos, rid in enumerate(ids):
+            members = self.cluster_of.get(f"{source}:{rid}")
+            if members is None:
+                continue
+            if members[0] in seen:
+                hidden.append(pos)
+            seen.add(members[0])
+        return np.array(hidden, dtype=np.int64)
+
+    def elsewhere(self, source):
+        """[(key in source, [keys in other sources])] for clusters spanning sources."""
+        links = []
+        for members in self.clusters:
+            here = [m for m in members if m.startswith(source + ":")]
+            there = [m for m in members if not m.startswith(source + ":")]
+            if here and there:
+                links.append((here[0], there))
+        return links
+
+
+def keyed_items(records_by_source):
+    """[(key, normalized title, normalized organization)] for every record, sources in order."""
+    items, seen = [], set()
+    for source, records in records_by_source.items():
+        for record in records:
+            key = f"{source}:{record_id(record)}"
+            if key in seen:
+                continue
+            seen.add(key)
+            items.append((key, normalize(record.get("Title")), normalize(record.get("Organization"), organization=True)))
+    return items
+
+
+def load_state(path=DUPLICATES_FILE):
+    """{key: (title, organization, signature)} and the confirmed pairs/scores from a previous run."""
+    if not os.path.exists(path):
+        return {}, [], []
+    with np.load(path, allow_pickle=False) as data:
+        items = {
+            key: (title, organization, signature)
+            for key, title, organization, signature in zip(
+                data["keys"].tolist(), data["titles"].tolist(), data["organizations"].tolist(), data["signatures"]
+            )
+        }
+        return items, data["pairs"].tolist(), data["scores"].tolist()
+
+
+def save_state(path, items, signatures, pairs, scores):
+    tmp = f"{path}.tmp.npz"
+    # Signatures are random bits; compressing them costs more than it saves
+    np.savez(
+        tmp,
+        keys=np.array([key for key, _, _ in items], dtype=str),
+        titles=np.array([title for _, title, _ in items], dtype=str),
+        organizations=np.array([organization for _, _, organization in items], dtype=str),
+        signatures=signatures.reshape(len(items), NUM_PERM).astype(np.uint32),
+        pairs=np.array(pairs, dtype=str).reshape(len(pairs), 2),
+        scores=np.array(scores, dtype=np.float64),
+    )
+    os.replace(tmp, path)
+
+
+def update_duplicates(records_by_source, path=DUPLICATES_FILE, rebuild=False):
+    """Find duplicates among {source: records}, reusing the previous run's work; returns Duplicates."""
+    previous, old_pairs, old_scores = ({}, [], []) if rebuild else load_state(path)
+    items = keyed_items(records_by_source)
+    signatures = np.empty((len(items), NUM_PERM), dtype=np.uint64)
+    fresh = set()
+    for i, (key, title, organization) in enumerate(items):
+        old = previous.get(key)
+        if old is not None and old[0] == title and old[1] == organization:
+            signatures[i] = old[2]
+        else:
+            signatures[i] = minhash(item_shingles(title, organization))
+            fresh.add(i)
+
+    # Pairs between unchanged records still hold; the rest are checked again below
+    index = {key: i for i, (key, _, _) in enumerate(items)}
+    pairs, scores = [], []
+    for (a, b), score in zip(old_pairs, old_scores):
+        if a in index and b in index and index[a] not in fresh and index[b] not in fresh:
+            pairs.append((a, b))
+            scores.append(score)
+    candidates = candidate_pairs(signatures, fresh)
+    for i, j in sorted(candidates):
+        score = similarity(items[i][1:], items[j][1:])
+        if score is not None:
+            pairs.append((items[i][0], items[j][0]))
+            scores.append(score)
+
+    save_state(path, items, signatures, pairs, scores)
+    logger.info(
+        f"Dedupe: {len(fresh)} of {len(items)} records signed, {len(candidates)} candidates, "
+        f"{len(pairs)} duplicate pairs"
+    )
+    return Duplicates([key for key, _, _ in items], pairs, scores)
+
+
+def load_duplicates(path=DUPLICATES_FILE):
+    """The Duplicates saved by the last update (empty if there is none); version is the file's mtime."""
+    items, pairs, scores = load_state(path)
+    version = os.stat(path).st_mtime_ns if os.path.exists(path) else None
+    return Duplicates(items, pairs, scores, version)
+
+
+def refresh_duplicates(filename):
+    """Update the duplicates next to filename after it was saved, if it is one of SOURCES."""
+    if os.path.basename(filename) not in SOURCES:
+        return None
+    folder = os.path.dirname(filename)
+    records_by_source = {
+        source: load_snapshot(os.path.join(folder, name))[1] for name, source in SOURCES.items()
+    }
+    return update_duplicates(records_by_source, os.path.join(folder, DUPLICATES_FILE))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m scraper.dedupe", description="Update duplicate clusters")
+    parser.add_argument("--data-dir", default=".", help="directory holding the snapshot JSON files")
+    parser.add_argument("--rebuild", action="store_true", help="ignore the saved signatures")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    records_by_source = {
+        source: load_snapshot(os.path.join(args.data_dir, name))[1] for name, source in SOURCES.items()
+    }
+    duplicates = update_duplicates(records_by_source, os.path.join(args.data_dir, DUPLICATES_FILE), args.rebuild)
+    for members in duplicates.clusters:
+        print("  ".join(members))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,234 @@
+import json
+import os
+import re
+import threading
+from datetime import datetime
+from urllib.parse import urljoin
+
+from .diff import fingerprint, record_id
+from .storage import write_json_atomic
+
+DETAIL_BASE_URL = "https://www.contestkorea.com"
+DETAIL_TIMEOUT = 10
+# Longest value a prompt gets per field; the detail text can run to pages
+MAX_PROMPT_FIELD_CHARS = 200
+
+# Labels used on the detail page (the top table and the "■ label: value" body)
+LABELS = {
+    '공모주제': 'Topic', '주제': 'Topic',
+    '응모대상': 'Eligibility', '참가자격': 'Eligibility', '응모자격': 'Eligibility',
+    '접수방법': 'Submission', '제출방법': 'Submission', '응모방법': 'Submission',
+    '문의': 'Contact', '문의처': 'Contact',
+    '1등 시상금': 'Top Prize', '시상내역': 'Prizes', '시상': 'Prizes',
+    '홈페이지': 'Homepage',
+}
+SCHEDULE_LABELS = ('일정', '추진일정', '진행일정')
+
+MONEY_UNITS = {'억': 100_000_000, '천만': 10_000_000, '백만': 1_000_000, '만': 10_000, '천': 1_000}
+_MONEY = re.compile(r"((?:\d[\d,.]*\s*(?:억|천만|백만|만|천)\s*)*\d[\d,.]*\s*(?:억|천만|백만|만|천)?)\s*원")
+_MONEY_PART = re.compile(r"(\d[\d,.]*)\s*(억|천만|백만|만|천)?")
+_AWARD = re.compile(r"([^\s,/]+?)\s*(\d+)\s*(?:명|팀)\s*(각\s*)?" + _MONEY.pattern)
+_EMAIL = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+_PHONE = re.compile(r"\d{2,4}-\d{3,4}-\d{4}")
+_STAGE = re.compile(r"^\s*([^:：]+?)\s*[:：]\s*([\d.]+)\s*(?:~\s*([\d.]+))?")
+_BULLET = re.compile(r"^[■□●○◆◇▶※\-*\s]+")
+
+
+def parse_krw(text):
+    """First amount in won in text ("300만원", "1억 5천만원", "500,000원"), or None."""
+    match = _MONEY.search(text or "")
+    if not match:
+        return None
+    total = 0
+    for number, unit in _MONEY_PART.findall(match.group(1)):
+        total += float(number.replace(',', '')) * MONEY_UNITS.get(unit, 1)
+    return int(total)
+
+
+def format_krw(amount):
+    """Won as the site writes them: 6500000 -> "650만원", 120000000 -> "1억 2000만원"."""
+    if amount is None:
+        return ""
+    eok, man = divmod(amount // 10_000, 10_000)
+    if not eok and not man:
+        return f"{amount:,}원"
+    parts = ([f"{eok}억"] if eok else []) + ([f"{man}만"] if man else [])
+    return " ".join(parts) + "원"
+
+
+def parse_awards(text):
+    """[{'Award', 'Winners', 'Amount'}] from "대상 1명 300만원, 최우수상 2명 각 100만원"; Amount is per winner."""
+    awards = []
+    for match in _AWARD.finditer(text or ""):
+        name, winners, each, money = match.group(1), int(match.group(2)), match.group(3), match.group(4)
+        amount = parse_krw(money + "원")
+        if amount is not None and not each and winners > 1:
+            # Without 각 the amount is for the whole award
+            amount //= winners
+        awards.append({'Award': name, 'Winners': winners, 'Amount': amount})
+    return awards
+
+
+def parse_schedule(lines):
+    """[{'Stage', 'Start', 'End'}] from lines like "접수: 05.08~05.30" (dates as the site writes them)."""
+    schedule = []
+    for line in lines:
+        match = _STAGE.match(line or "")
+        if match:
+            stage, start, end = match.groups()
+            schedule.append({'Stage': stage, 'Start': start, 'End': end or start})
+    return schedule
+
+
+def _add(fields, name, value):
+    # The site pads list separators ("누구나 , 유치원") and ends some cells with a "▶" link
+    value = re.sub(r"\s*,\s*", ", ", " ".join(value.split())).strip(" ▶,")
+    if not value:
+        return
+    if name in fields and value not in fields[name]:
+        fields[name] = f"{fields[name]} / {value}"
+    else:
+        fields.setdefault(name, value)
+
+
+def extract_detail(html, base_url=DETAIL_BASE_URL):
+    """Structured fields from a contestkorea.com detail page; only the ones found are returned."""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, 'lxml')
+    fields = {}
+    top = soup.find('div', class_='view_top_area')
+    if top:
+        for item in top.find_all('li'):
+            label, value = item.find('span', class_='tit'), item.find('span', class_='txt')
+            if label and value and label.get_text(strip=True) in LABELS:
+                _add(fields, LABELS[label.get_text(strip=True)], value.get_text(" ", strip=True))
+
+    area = soup.find('div', class_='view_detail_area')
+    if area:
+        img = area.select_one('div.img_area img[src]')
+        if img:
+            fields['Poster'] = urljoin(base_url, img['src'])
+        for p in area.find_all('p'):
+            text = _BULLET.sub("", p.get_text(" ", strip=True))
+            label, _, value = text.partition(':')
+            label = label.strip()
+            if label in SCHEDULE_LABELS:
+                listing = p.find_next_sibling()
+                lines = [li.get_text(" ", strip=True) for li in listing.find_all('li')] if listing else []
+                if not value.strip() and lines:
+                    fields['Schedule'] = parse_schedule(lines)
+                else:
+                    fields['Schedule'] = parse_schedule(value.split('|'))
+            elif label in LABELS and value.strip():
+                _add(fields, LABELS[label], value)
+
+    if 'Top Prize' in fields:
+        fields['Top Prize'] = parse_krw(fields['Top Prize'])
+    if 'Prizes' in fields:
+        awards = parse_awards(fields['Prizes'])
+        if awards:
+            fields['Awards'] = awards
+            fields['Prize Total'] = sum(a['Winners'] * (a['Amount'] or 0) for a in awards)
+            if fields.get('Top Prize') is None:
+                fields['Top Prize'] = max(a['Amount'] or 0 for a in awards)
+    if 'Contact' in fields:
+        fields['Emails'] = sorted(set(_EMAIL.findall(fields['Contact'])))
+        fields['Phones'] = sorted(set(_PHONE.findall(fields['Contact'])))
+    return fields
+
+
+def fetch_detail_html(url, timeout=DETAIL_TIMEOUT):
+    """The detail page's HTML; raises on network errors."""
+    import requests
+    resp = requests.get(url, timeout=timeout)
+    resp.raise_for_status()
+    return resp.text
+
+
+def details_path(filename):
+    """Detail fields that sit next to a snapshot, e.g. contests_korea.details.json."""
+    return os.path.splitext(filename)[0] + ".details.json"
+
+
+_details_lock = threading.Lock()
+
+
+def read_details(filename):
+    """{record id: {'fingerprint', 'fetched_at', 'fields'}} stored for a snapshot."""
+    path = details_path(filename)
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_details(filename, entries):
+    """Merge {record id: entry} into the stored details."""
+    with _details_lock:
+        details = read_details(filename)
+        details.update(entries)
+        write_json_atomic(details_path(filename), details, indent=None)
+
+
+def detail_entry(record, fields):
+    return {
+        'fingerprint': fingerprint(record),
+        'fetched_at': datetime.now().isoformat(timespec='seconds'),
+        'fields': fields,
+    }
+
+
+def stored_detail(details, record):
+    """The stored fields for record, or None if it was never fetched or has changed since."""
+    entry = details.get(record_id(record))
+    if entry is None or entry['fingerprint'] != fingerprint(record):
+        return None
+    return entry['fields']
+
+
+def get_detail(filename, record, fetch=fetch_detail_html):
+    """Detail fields for a contest of filename: stored ones if the contest is unchanged, else fetched and stored."""
+    fields = stored_detail(read_details(filename), record)
+    if fields is None:
+        fields = extract_detail(fetch(record['Link']))
+        save_details(filename, {record_id(record): detail_entry(record, fields)})
+    return fields
+
+
+def fetch_detail_area(url, fetch=fetch_detail_html):
+    """The detail page's free-text body as HTML, without the poster; only for an explicit request."""
+    from bs4 import BeautifulSoup
+    area = BeautifulSoup(fetch(url), 'lxml').find('div', class_='view_detail_area')
+    if area is None:
+        return None
+    for img_area in area.find_all('div', class_='img_area'):
+        img_area.decompose()
+    return str(area)
+
+
+def _clip(value, limit=MAX_PROMPT_FIELD_CHARS):
+    value = str(value)
+    return value if len(value) <= limit else value[:limit - 1] + "…"
+
+
+def detail_prompt(record, fields):
+    """A few lines describing a contest for an LLM prompt, instead of the page's HTML."""
+    lines = [f"Title: {record.get('Title')}"]
+    for name in ('Category', 'Organization', 'Target'):
+        if record.get(name):
+            lines.append(f"{name}: {_clip(record[name])}")
+    for name in ('Topic', 'Eligibility', 'Submission'):
+        if fields.get(name):
+            lines.append(f"{name}: {_clip(fields[name])}")
+    if fields.get('Prizes'):
+        total = f" (total {format_krw(fields['Prize Total'])})" if fields.get('Prize Total') else ""
+        lines.append(f"Prizes: {_clip(fields['Prizes'])}{total}")
+    schedule = fields.get('Schedule')
+    if schedule:
+        lines.append("Schedule: " + "; ".join(
+            f"{s['Stage']} {s['Start']}" + (f"~{s['End']}" if s['End'] != s['Start'] else "") for s in schedule
+        ))
+    elif record.get('Date Info'):
+        lines.append(f"Schedule: {record['Date Info']}")
+    return "\n".join(lines)
@@ -0,0 +1,60 @@
+import hashlib
+import json
+from urllib.parse import urlparse, parse_qs
+
+# Fields that move on their own every day (D-Day counts down) and would
+# otherwise mark every contest as changed on every scrape.
+VOLATILE_FIELDS = {'D-Day'}
+
+
+def record_id(record):
+    """Stable ID for a contest: Contest Korea's str_no, else the link, else the title."""
+    link = record.get('Link') or ''
+    str_no = parse_qs(urlparse(link).query).get('str_no')
+    if str_no:
+        return str_no[0]
+    return link or record.get('Title')
+
+
+def fingerprint(record):
+    """Hash of the non-volatile fields of a record."""
+    stable = {k: v for k, v in record.items() if k not in VOLATILE_FIELDS}
+    payload = json.dumps(stable, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def diff_records(old_records, new_records, key=record_id):
+    """Compare two scrapes in O(n).
+
+    Returns a dict with 'added' and 'removed' record lists and a 'changed' list of
+    {'id', 'record', 'fields': {field: [old, new]}} entries.
+    """
+    old_index = {}
+    for record in old_records:
+        old_index[key(record)] = record
+    old_prints = {rid: fingerprint(record) for rid, record in old_index.items()}
+
+    added, changed = [], []
+    seen = set()
+    for record in new_records:
+        rid = key(record)
+        if rid in seen:
+            continue
+        seen.add(rid)
+        if rid not in old_index:
+            added.append(record)
+        elif fingerprint(record) != old_prints[rid]:
+            before = old_index[rid]
+            fields = {
+                f: [before.get(f), record.get(f)]
+                for f in set(before) | set(record)
+                if f not in VOLATILE_FIELDS and before.get(f) != record.get(f)
+            }
+            changed.append({'id': rid, 'record': record, 'fields': fields})
+    removed = [record for rid, record in old_index.items() if rid not in seen]
+    return {'added': added, 'removed': removed, 'changed': changed}
+
+
+def delta_ids(diff, key=record_id):
+    """IDs of records that downstream steps need to (re)process."""
+    return {key(r) for r in diff['added']} | {c['id'] for c in diff['changed']}
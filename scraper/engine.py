@@ -0,0 +1,477 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+import requests
+from requests.adapters import HTTPAdapter
+from bs4 import BeautifulSoup
+from .checkpoint import Checkpoint, checkpoint_path
+from .diff import record_id
+from .storage import save_snapshot
+from . import metrics, profiling
+from .throttle import AIMDController, RETRY_STATUSES, backoff_delay, parse_retry_after
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.5',
+    'Connection': 'keep-alive',
+}
+# Ceiling for the adaptive in-flight limit; crawls start at INITIAL_CONCURRENCY
+DEFAULT_CONCURRENCY = 8
+INITIAL_CONCURRENCY = 2
+# Optional fixed gap between request starts; the AIMD controller does the pacing
+DEFAULT_MIN_INTERVAL = 0.0
+REQUEST_TIMEOUT = 10
+# Tries per page before it is given up on
+MAX_ATTEMPTS = 5
+# Never honor a Retry-After longer than this
+MAX_RETRY_AFTER = 120
+# Numbered crawls stop after this many failed pages in a row (site down)
+MAX_CONSECUTIVE_FAILURES = 3
+# Pages fetched within this many seconds are served from memory
+CACHE_TTL = 300
+# Older pages are revalidated (ETag/Last-Modified) until this age, then dropped
+CACHE_MAX_AGE = 3600
+# Pages kept at most; the least recently used go first
+CACHE_MAX_ENTRIES = 256
+
+
+class Source:
+    """One site to crawl.
+
+    A source only describes the site: how to address its pages, how to find and
+    parse the items on a page and how to identify a record. Fetching, concurrency,
+    caching, retries, stats and persistence come from the Engine.
+    """
+    name = "source"
+    # True when page N can be addressed directly, so pages can be fetched in parallel.
+    # Otherwise the engine follows next_request() from page to page.
+    numbered_pages = False
+    output_file = None
+    # Exceptions from fetch() that are worth retrying
+    retryable_errors = (requests.exceptions.ConnectionError, requests.exceptions.Timeout)
+
+    def prepare(self, engine):
+        """Hook run once before a crawl, e.g. to probe the site."""
+
+    def page_request(self, page):
+        """(url, params) for a 1-based page number; numbered sources only."""
+        raise NotImplementedError
+
+    def is_last_page(self, items):
+        """True when a page's items show there is nothing after it (e.g. a short page)."""
+        return False
+
+    def start_request(self):
+        """(url, params) of the first page."""
+        return self.page_request(1)
+
+    def next_request(self, soup, request):
+        """(url, params) of the page after this one, or None; link-following sources only."""
+        return None
+
+    def fetch(self, engine, url, params):
+        """Fetch a page and return (status_code, text, headers)."""
+        return engine.fetcher.get(url, params)
+
+    def select_items(self, soup):
+        """Item elements on a page, or None when the page marks the end of the data."""
+        raise NotImplementedError
+
+    def parse_item(self, item):
+        """Turn one item element into a record dict, or None to skip it."""
+        raise NotImplementedError
+
+    def normalize(self, record):
+        return record
+
+    def key(self, record):
+        return record_id(record)
+
+
+class Fetcher:
+    """Shared HTTP client: keep-alive session and a small page cache.
+
+    The cache holds at most max_entries pages, none older than max_age seconds.
+    Retries are left to the Engine, which paces them with its AIMD controller.
+    """
+
+    def __init__(self, headers=None, timeout=REQUEST_TIMEOUT, cache_ttl=CACHE_TTL, max_age=CACHE_MAX_AGE,
+                 max_entries=CACHE_MAX_ENTRIES):
+        self.timeout = timeout
+        self.cache_ttl = cache_ttl
+        self.max_age = max_age
+        self.max_entries = max_entries
+        self.session = requests.Session()
+        self.session.headers.update(headers or DEFAULT_HEADERS)
+        adapter = HTTPAdapter(max_retries=0, pool_maxsize=DEFAULT_CONCURRENCY * 2)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, url, params=None):
+        key = (url, tuple(sorted((params or {}).items())))
+        host = urlparse(url).netloc
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached and time.monotonic() - cached['at'] >= self.max_age:
+                del self._cache[key]
+                cached = None
+            elif cached:
+                self._cache.move_to_end(key)
+        if cached and time.monotonic() - cached['at'] < self.cache_ttl:
+            metrics.CACHE_HITS.inc(host=host)
+            return 200, cached['text'], {}
+        headers = {}
+        if cached and cached['etag']:
+            headers['If-None-Match'] = cached['etag']
+        if cached and cached['last_modified']:
+            headers['If-Modified-Since'] = cached['last_modified']
+        with metrics.IN_FLIGHT.track(host=host):
+            resp = self.session.get(url, params=params, headers=headers, timeout=self.timeout)
+        metrics.REQUESTS.inc(host=host, status=resp.status_code)
+        metrics.RESPONSE_BYTES.inc(len(resp.content), host=host)
+        if resp.status_code == 304 and cached:
+            metrics.CACHE_HITS.inc(host=host)
+            with self._lock:
+                cached['at'] = time.monotonic()
+            return 200, cached['text'], resp.headers
+        if resp.status_code == 200 and resp.content:
+            self._store(key, {
+                'at': time.monotonic(),
+                'text': resp.text,
+                'etag': resp.headers.get('ETag'),
+                'last_modified': resp.headers.get('Last-Modified'),
+            })
+        return resp.status_code, resp.text, resp.headers
+
+
+    def _store(self, key, entry):
+        now = time.monotonic()
+        with self._lock:
+            for stale in [k for k, v in self._cache.items() if now - v['at'] >= self.max_age]:
+                del self._cache[stale]
+            self._cache[key] = entry
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+
+
+_default_fetcher = None
+
+
+def get_fetcher():
+    """Process-wide fetcher, so the page cache survives between crawls."""
+    global _default_fetcher
+    if _default_fetcher is None:
+        _default_fetcher = Fetcher()
+    return _default_fetcher
+
+
+class CrawlResult:
+    def __init__(self, source):
+        self.source = source
+        self.records = []
+        self.pages = 0
+        self.failed_pages = []
+        self.complete = False
+        # Set once the records are saved; None if a partial crawl left the snapshot alone
+        self.diff = None
+        self.stats = {'requests': 0, 'retries': 0, 'parse_errors': 0, 'fetch_seconds': 0.0, 'parse_seconds': 0.0}
+        self._lock = threading.Lock()
+
+    def count(self, name, value=1):
+        with self._lock:
+            self.stats[name] += value
+
+
+class FetchError(Exception):
+    """A page still failed after MAX_ATTEMPTS tries."""
+
+
+class Engine:
+    """Drives any Source: plans pages, fetches them, parses, dedupes and persists."""
+
+    def __init__(self, concurrency=DEFAULT_CONCURRENCY, min_interval=DEFAULT_MIN_INTERVAL, fetcher=None, controller=None):
+        self.concurrency = concurrency
+        self.min_interval = min_interval
+        self.fetcher = fetcher or get_fetcher()
+        self.controller = controller or AIMDController(
+            initial=min(INITIAL_CONCURRENCY, concurrency), maximum=concurrency
+        )
+        self._slot_lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def _wait_for_slot(self):
+        with self._slot_lock:
+            now = time.monotonic()
+            start = max(now, self._next_slot)
+            self._next_slot = start + self.min_interval
+        if start > now:
+            time.sleep(start - now)
+
+    def _fetch(self, source, request, result, deadline=None):
+        """Fetch one page under the concurrency controller, retrying 429/5xx and network errors.
+
+        With a deadline (time.monotonic()), no retry is started that would begin after it.
+        """
+        url, params = request
+        status = None
+        for attempt in range(MAX_ATTEMPTS):
+            self._wait_for_slot()
+            self.controller.acquire()
+            started = time.monotonic()
+            status, text, headers, error = None, None, {}, None
+            try:
+                with profiling.span("fetch"):
+                    status, text, headers = source.fetch(self, url, params)
+            except source.retryable_errors as e:
+                error = e
+            finally:
+                elapsed = time.monotonic() - started
+                self.controller.release(elapsed, status)
+            metrics.FETCH_SECONDS.observe(elapsed, source=source.name)
+            metrics.CONCURRENCY_LIMIT.set(self.controller.limit, source=source.name)
+            result.count('fetch_seconds', elapsed)
+            result.count('requests')
+            if status is not None and status not in RETRY_STATUSES:
+                return status, text
+
+            retry_after = parse_retry_after(headers.get('Retry-After')) if headers else None
+            if retry_after is not None:
+                retry_after = min(retry_after, MAX_RETRY_AFTER)
+                self.controller.pause(retry_after)
+            if attempt + 1 == MAX_ATTEMPTS:
+                break
+            delay = max(retry_after or 0.0, backoff_delay(attempt))
+            if deadline is not None and time.monotonic() + delay >= deadline:
+                break
+            result.count('retries')
+            metrics.RETRIES.inc(source=source.name)
+            logger.warning(
+                f"[{source.name}] {url} gave {status or error}; retry {attempt + 1} in {delay:.1f}s "
+                f"(concurrency limit {self.controller.limit:.1f})"
+            )
+            time.sleep(delay)
+        raise FetchError(f"{url} failed after {attempt + 1} attempts (last: {status or error})")
+
+    def fetch(self, source, request, result=None, deadline=None):
+        """(status, text) of one request, paced and retried like the crawl's pages."""
+        return self._fetch(source, request, result or CrawlResult(source), deadline)
+
+    def crawl_page(self, source, page, result=None, deadline=None):
+        """Fetch and parse one numbered page; returns (records, is_last), records None past the end."""
+        result = result or CrawlResult(source)
+        status, text = self.fetch(source, source.page_request(page), result, deadline)
+        with profiling.span("parse"):
+            _, records, is_last = self._parse(source, page, status, text, result)
+        return records, is_last
+
+    def fetch_items(self, source, request, result=None):
+        """Fetch one page and return (soup, items); items is None past the end of the data."""
+        status, text = self.fetch(source, request, result)
+        if status == 404 or not text:
+            return None, None
+        if status != 200:
+            raise requests.HTTPError(f"status {status} for {request[0]}")
+        soup = BeautifulSoup(text, 'lxml')
+        return soup, source.select_items(soup)
+
+    def _parse(self, source, page, status, text, result):
+        """Return (soup, records, is_last) for a fetched page; records is None at the end of the data."""
+        # A 404 or an empty body means we ran past the last page
+        if status == 404 or not text:
+            logger.info(f"[{source.name}] Reached end of available pages at page {page - 1}")
+            return None, None, True
+        if status != 200:
+            raise requests.HTTPError(f"status {status} for page {page}")
+        started = time.monotonic()
+        soup = BeautifulSoup(text, 'lxml')
+        items = source.select_items(soup)
+        if items is None:
+            logger.info(f"[{source.name}] No more items at page {page}")
+            self._parsed(source, result, time.monotonic() - started)
+            return soup, None, True
+        records = []
+        for item in items:
+            try:
+                record = source.parse_item(item)
+            except Exception as e:
+                result.count('parse_errors')
+                metrics.PARSE_ERRORS.inc(source=source.name)
+                logger.error(f"[{source.name}] Error processing item on page {page}: {str(e)}")
+                continue
+            if record is not None:
+                records.append(source.normalize(record))
+        self._parsed(source, result, time.monotonic() - started)
+        metrics.RECORDS.inc(len(records), source=source.name)
+        logger.info(f"[{source.name}] Parsed {len(records)} items on page {page}")
+        return soup, records, source.is_last_page(items)
+
+    def _parsed(self, source, result, elapsed):
+        metrics.PARSE_SECONDS.observe(elapsed, source=source.name)
+        result.count('parse_seconds', elapsed)
+
+    def iter_pages(self, source, max_pages=None, result=None, checkpoint=None):
+        """Yield (page, records) as soon as each page is parsed.
+
+        Records already seen on an earlier page are dropped. Stats, failed pages
+        and completeness are kept on result (a CrawlResult); its records list
+        stays empty, so memory does not grow with the crawl. With a Checkpoint,
+        pages it already holds are replayed instead of fetched and every new
+        page is saved to it.
+        """
+        result = result if result is not None else CrawlResult(source)
+        seen = set()
+        records_seen = 0
+        try:
+            source.prepare(self)
+            if checkpoint is not None:
+                checkpoint.open(source)
+            if source.numbered_pages:
+                pages = self._crawl_numbered(source, max_pages, result, checkpoint)
+            else:
+                pages = self._crawl_linked(source, max_pages, result, checkpoint)
+            for page, records in pages:
+                fresh = []
+                for record in records:
+                    rid = source.key(record)
+                    if rid not in seen:
+                        seen.add(rid)
+                        fresh.append(record)
+                records_seen += len(fresh)
+                result.pages = page
+                yield page, fresh
+        except (FetchError, requests.exceptions.RequestException) as e:
+            logger.error(f"[{source.name}] Network error occurred: {str(e)}")
+        except Exception as e:
+            logger.exception(f"[{source.name}] Error while crawling: {e}")
+        finally:
+            if checkpoint is not None:
+                checkpoint.close()
+        s = result.stats
+        logger.info(
+            f"[{source.name}] {records_seen} records from {result.pages} pages, "
+            f"{s['requests']} requests, {s['retries']} retries, fetch {s['fetch_seconds']:.2f}s, "
+            f"parse {s['parse_seconds']:.2f}s, {s['parse_errors']} parse errors, "
+            f"failed pages {result.failed_pages}, complete={result.complete}"
+        )
+
+    def iter_records(self, source, max_pages=None, result=None):
+        """Yield records one at a time as pages are parsed (see iter_pages)."""
+        for _, records in self.iter_pages(source, max_pages, result):
+            yield from records
+
+    def _crawl_numbered(self, source, max_pages, result, checkpoint=None):
+        page = 1
+        consecutive_failures = 0
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            while max_pages is None or page <= max_pages:
+                # Plan as many pages as the controller currently allows in flight
+                last = page + max(1, int(self.controller.limit)) - 1
+                if max_pages is not None:
+                    last = min(last, max_pages)
+                planned = []
+                for p in range(page, last + 1):
+                    request = source.page_request(p)
+                    saved = checkpoint.page(p, request) if checkpoint is not None else None
+                    future = None if saved else pool.submit(self._fetch, source, request, result)
+                    planned.append((p, request, saved, future))
+                # Handle pages in order so the first end-of-data page stops the crawl
+                for p, request, saved, future in planned:
+                    if saved:
+                        consecutive_failures = 0
+                        yield p, saved['records']
+                        if saved['last']:
+                            result.complete = not result.failed_pages
+                            return
+                        continue
+                    try:
+                        status, text = future.result()
+                    except FetchError as e:
+                        # Keep going; the crawl is reported as incomplete
+                        logger.error(f"[{source.name}] Giving up on page {p}: {e}")
+                        result.failed_pages.append(p)
+                        consecutive_failures += 1
+                        if consecutive_failures >= MAX_CONSECUTIVE_FAILURES:
+                            logger.error(f"[{source.name}] {consecutive_failures} pages failed in a row; stopping")
+                            return
+                        continue
+                    consecutive_failures = 0
+                    with profiling.span("parse"):
+                        _, records, is_last = self._parse(source, p, status, text, result)
+                    if records is not None:
+                        if checkpoint is not None:
+                            checkpoint.save(p, request, text, records, is_last)
+                        yield p, records
+                    if is_last:
+                        result.complete = not result.failed_pages
+                        return
+                page = last + 1
+        result.complete = max_pages is not None and not result.failed_pages
+
+    def _crawl_linked(self, source, max_pages, result, checkpoint=None):
+        request = source.start_request()
+        page = 1
+        while request and (max_pages is None or page <= max_pages):
+            saved = checkpoint.page(page, request) if checkpoint is not None else None
+            if saved:
+                yield page, saved['records']
+                if saved['last']:
+                    result.complete = True
+                    return
+                request = tuple(saved['next']) if saved['next'] else None
+                page += 1
+                continue
+            try:
+                status, text = self._fetch(source, request, result)
+            except FetchError:
+                # Without this page there is no next link to follow
+                result.failed_pages.append(page)
+                raise
+            with profiling.span("parse"):
+                soup, records, is_last = self._parse(source, page, status, text, result)
+            next_request = None if is_last else source.next_request(soup, request)
+            if records is not None:
+                if checkpoint is not None:
+                    checkpoint.save(page, request, text, records, is_last or next_request is None, next_request)
+                yield page, records
+            if is_last:
+                result.complete = True
+                return
+            request = next_request
+            page += 1
+        result.complete = request is None or max_pages is not None
+
+    def run(self, source, max_pages=None, output=None, resume=True):
+        """Crawl and persist the records to output (defaults to source.output_file).
+
+        With resume, the crawl is checkpointed next to output, so a rerun after a
+        crash or a failed page carries on where this one stopped.
+        """
+        output = output or source.output_file
+        checkpoint = Checkpoint(checkpoint_path(output)) if output and resume else None
+        result = CrawlResult(source)
+        for _, records in self.iter_pages(source, max_pages, result, checkpoint):
+            result.records.extend(records)
+        if output:
+            save_crawl(output, result, checkpoint, key=source.key)
+        return result
+
+
+def save_crawl(output, result, checkpoint=None, key=record_id):
+    """Save a crawl's records, never letting a partial crawl replace a complete snapshot.
+
+    The checkpoint is dropped once a complete crawl is saved; after a partial
+    one it is kept so the next run resumes.
+    """
+    result.diff = save_snapshot(output, result.records, key=key, complete=result.complete)
+    if checkpoint is not None and result.complete:
+        checkpoint.clear()
+    return result
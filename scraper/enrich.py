@@ -0,0 +1,132 @@
+"""Fetch the detail pages of new or changed contests after a crawl.
+
+    python -m scraper.enrich                                   # contests_korea.json
+    python -m scraper.enrich --budget 300 --base-url http://127.0.0.1:8765
+
+The fields (see scraper.detail) are stored in contests_korea.details.json,
+next to the snapshot, so the app shows a contest's details without fetching
+its page first. Contests whose stored details have the same fingerprint are
+skipped. Pages are fetched concurrently through the Engine, under the same
+adaptive concurrency limit, retries and page cache as the list crawl. Pages
+not started when the budget runs out are left for the next run. Fetched
+details are saved in batches, so a crash keeps most of the work.
+"""
+import argparse
+import logging
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlparse
+
+import requests
+
+from . import metrics
+from .detail import detail_entry, extract_detail, read_details, save_details, stored_detail
+from .diff import record_id
+from .engine import CrawlResult, Engine, FetchError, Source
+from .storage import load_snapshot
+
+logger = logging.getLogger(__name__)
+
+DETAILS_SOURCE_FILE = "contests_korea.json"
+# Seconds the whole stage may take; sized for the nightly window
+ENRICH_BUDGET = 15 * 60
+# Details written to the details file at a time
+SAVE_EVERY = 50
+
+
+class DetailSource(Source):
+    """Contest Korea detail pages; fetched one by one, never crawled."""
+    name = "contestkorea-detail"
+
+
+def detail_url(link, base_url=None):
+    """link, moved to base_url's host if given (e.g. a replay server)."""
+    if not base_url:
+        return link
+    base = urlparse(base_url)
+    return urlparse(link)._replace(scheme=base.scheme, netloc=base.netloc).geturl()
+
+
+def pending_details(filename, records):
+    """Records with a detail page whose stored details are missing or older than the record."""
+    details = read_details(filename)
+    return [r for r in records if r.get('Link') and stored_detail(details, r) is None]
+
+
+def fetch_detail_fields(engine, source, record, result=None, base_url=None, deadline=None):
+    """Fetch a record's detail page through engine and extract its fields."""
+    status, text = engine.fetch(source, (detail_url(record['Link'], base_url), None), result, deadline)
+    if status != 200 or not text:
+        raise FetchError(f"status {status} for {record['Link']}")
+    return extract_detail(text)
+
+
+def enrich_details(filename, records, engine=None, budget=ENRICH_BUDGET, base_url=None):
+    """Fetch, extract and store the details of filename's new or changed records.
+
+    Returns counts: {'fetched', 'failed', 'unchanged', 'left'}; 'left' is what
+    the budget did not reach. A page already in flight when the budget runs
+    out is still finished, but not retried.
+    """
+    engine = engine or Engine()
+    source = DetailSource()
+    result = CrawlResult(source)
+    todo = pending_details(filename, records)
+    counts = {'fetched': 0, 'failed': 0, 'unchanged': len(records) - len(todo), 'left': 0}
+    deadline = time.monotonic() + budget
+
+    def enrich(record):
+        if time.monotonic() >= deadline:
+            return None
+        return fetch_detail_fields(engine, source, record, result, base_url, deadline)
+
+    batch = {}
+    with ThreadPoolExecutor(max_workers=engine.concurrency) as pool:
+        futures = {pool.submit(enrich, record): record for record in todo}
+        for future in as_completed(futures):
+            record = futures[future]
+            try:
+                fields = future.result()
+            except (FetchError, requests.exceptions.RequestException) as e:
+                logger.warning(f"Could not fetch the details of {record_id(record)}: {e}")
+                counts['failed'] += 1
+                continue
+            except Exception as e:
+                logger.error(f"Could not extract the details of {record_id(record)}: {e}")
+                counts['failed'] += 1
+                continue
+            if fields is None:
+                counts['left'] += 1
+                continue
+            batch[record_id(record)] = detail_entry(record, fields)
+            counts['fetched'] += 1
+            if len(batch) >= SAVE_EVERY:
+                save_details(filename, batch)
+                batch = {}
+    if batch:
+        save_details(filename, batch)
+    for outcome in ('fetched', 'failed', 'left'):
+        metrics.DETAILS.inc(counts[outcome], outcome=outcome)
+    logger.info(
+        f"{filename}: details fetched for {counts['fetched']} contests, {counts['failed']} failed, "
+        f"{counts['unchanged']} unchanged, {counts['left']} left for the next run "
+        f"({result.stats['requests']} requests, {result.stats['retries']} retries)"
+    )
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m scraper.enrich", description="Fetch contest detail pages")
+    parser.add_argument("filename", nargs="?", default=DETAILS_SOURCE_FILE)
+    parser.add_argument("--budget", type=float, default=ENRICH_BUDGET, help="seconds the stage may take")
+    parser.add_argument("--base-url", help="fetch the pages from this host instead, e.g. a replay server")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    _, records = load_snapshot(args.filename)
+    counts = enrich_details(args.filename, records, budget=args.budget, base_url=args.base_url)
+    return 1 if counts['failed'] and not counts['fetched'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,297 @@
+"""Dated, compressed history of every complete scrape, with as-of and compare queries.
+
+    python -m scraper.history list contests_korea.json
+    python -m scraper.history add contests_korea.json_bak --as contests_korea.json
+    python -m scraper.history compare contests_korea.json 2025-05-01 2025-05-23
+
+Each source keeps history/<name>/manifest.json, one entry per scrape, and one
+Parquet segment per year (zstd, Category/Organization dictionary-encoded)
+holding only the rows each scrape added, changed or removed. A snapshot as of
+any date is the replay of the segments up to it, so a day on which nothing
+changed costs one manifest line. D-Day counts down by itself, so rows store the
+deadline date instead and D-Day is recomputed for the day being read.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+
+from .diff import diff_records, fingerprint, record_id
+from .storage import read_snapshot, write_json_atomic
+from .utils import days_until_deadline
+
+logger = logging.getLogger(__name__)
+
+HISTORY_DIR = "history"
+COMPRESSION = "zstd"
+COMPRESSION_LEVEL = 9
+# Few distinct values repeated across rows; the other columns are mostly unique
+DICTIONARY_COLUMNS = ("Category", "Organization")
+# Bookkeeping columns stored with every row
+KEY_COLUMNS = ("_scraped_at", "_id", "_op")
+MANIFEST_FIELDS = ("scraped_at", "segment", "records", "upserts", "deletes")
+
+
+def history_dir(filename):
+    """history/<name>/ next to a snapshot, e.g. history/contests_korea/."""
+    stem = os.path.splitext(os.path.basename(filename))[0]
+    return os.path.join(os.path.dirname(filename), HISTORY_DIR, stem)
+
+
+def manifest_path(filename):
+    return os.path.join(history_dir(filename), "manifest.json")
+
+
+def list_snapshots(filename):
+    """Manifest entries for a snapshot, oldest first: {'scraped_at', 'segment', 'records', 'upserts', 'deletes'}."""
+    path = manifest_path(filename)
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        columns = json.load(f)
+    # Stored column-wise: a year of daily entries stays small
+    return [dict(zip(MANIFEST_FIELDS, values)) for values in zip(*(columns[name] for name in MANIFEST_FIELDS))]
+
+
+def _write_manifest(filename, snapshots):
+    columns = {name: [entry[name] for entry in snapshots] for name in MANIFEST_FIELDS}
+    write_json_atomic(manifest_path(filename), columns, indent=None)
+
+
+def _as_of_key(when):
+    """An ISO timestamp to compare scraped_at against; a bare date means the end of that day."""
+    if isinstance(when, datetime):
+        return when.isoformat(timespec='seconds')
+    if isinstance(when, date):
+        when = when.isoformat()
+    when = str(when)
+    try:
+        if len(when) == 10:
+            date.fromisoformat(when)
+            return when + "T23:59:59"
+        return datetime.fromisoformat(when).isoformat(timespec='seconds')
+    except ValueError:
+        raise ValueError(f"not a date: {when!r} (use YYYY-MM-DD or an ISO timestamp)")
+
+
+def resolve(filename, when, snapshots=None):
+    """The last manifest entry scraped on or before when (date, datetime or ISO string), or None."""
+    key = _as_of_key(when)
+    snapshots = list_snapshots(filename) if snapshots is None else snapshots
+    found = [entry for entry in snapshots if entry['scraped_at'] <= key]
+    return found[-1] if found else None
+
+
+def _row(record, day):
+    """The stored form of a record: no empty fields, D-Day replaced by the deadline it points at."""
+    row = {k: v for k, v in record.items() if v is not None}
+    d_day = row.pop('D-Day', None)
+    if isinstance(d_day, int):
+        row['_deadline'] = day + timedelta(days=days_until_deadline(d_day))
+    elif d_day is not None:
+        row['D-Day'] = d_day
+    return row
+
+
+def _stored(row):
+    """A replayed row back in the form _row() produced, to compare against a new scrape."""
+    return {k: v for k, v in row.items() if not pd.isna(v) and k not in KEY_COLUMNS}
+
+
+def _write_segment(path, rows):
+    """Append rows to a year's segment; Parquet files are immutable, so it is rewritten."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    if os.path.exists(path):
+        rows = pq.read_table(path).to_pylist() + rows
+    columns = list(dict.fromkeys(name for row in rows for name in row))
+    table = pa.table({name: [row.get(name) for row in rows] for name in columns})
+    dictionary = [name for name in DICTIONARY_COLUMNS + ('_scraped_at', '_op') if name in columns]
+    for name in dictionary:
+        table = table.set_column(table.column_names.index(name), name, table[name].dictionary_encode())
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    # Without the embedded Arrow schema; load_as_of restores the dictionary columns' type
+    pq.write_table(table, tmp, compression=COMPRESSION, compression_level=COMPRESSION_LEVEL,
+                   use_dictionary=dictionary, store_schema=False)
+    os.replace(tmp, path)
+
+
+def _read_segments(filename, snapshots, columns=None):
+    """Rows written by the given manifest entries (oldest first), as one DataFrame."""
+    import pyarrow.parquet as pq
+
+    folder = history_dir(filename)
+    until = snapshots[-1]['scraped_at'] if snapshots else ""
+    frames = []
+    for segment in dict.fromkeys(entry['segment'] for entry in snapshots if entry['segment']):
+        path = os.path.join(folder, segment)
+        wanted = None
+        if columns is not None:
+            names = pq.read_schema(path).names
+            wanted = [c for c in KEY_COLUMNS + tuple(columns) if c in names]
+        table = pq.read_table(path, columns=wanted, filters=[('_scraped_at', '<=', until)])
+        frames.append(table.to_pandas())
+    if not frames:
+        return pd.DataFrame(columns=list(KEY_COLUMNS))
+    return pd.concat(frames, ignore_index=True)
+
+
+def _replay(filename, snapshots, columns=None):
+    """Live rows after applying the segments in order: the last upsert per ID, minus deletions.
+
+    Rows come back in the order their IDs were first recorded, not in the
+    site's listing order of the day.
+    """
+    rows = _read_segments(filename, snapshots, columns)
+    first_seen = rows['_id'].drop_duplicates()
+    rows = rows.drop_duplicates('_id', keep='last').set_index('_id').loc[first_seen].reset_index()
+    return rows[rows['_op'] == 'upsert'].reset_index(drop=True)
+
+
+def archive_snapshot(filename, records, scraped_at=None, key=record_id):
+    """Add a complete scrape to the history of filename; returns its manifest entry.
+
+    Only rows that differ from the previous entry are written. Entries must be
+    added in time order; an older scrape is refused (None).
+    """
+    scraped_at = scraped_at or datetime.now()
+    stamp = scraped_at.isoformat(timespec='seconds')
+    snapshots = list_snapshots(filename)
+    if snapshots and snapshots[-1]['scraped_at'] >= stamp:
+        logger.warning(f"{filename}: history already has {snapshots[-1]['scraped_at']}; not adding {stamp}")
+        return None
+
+    head = _replay(filename, snapshots)
+    previous = {
+        row['_id']: fingerprint(_stored(row))
+        for row in head.astype(object).to_dict('records')
+    }
+    upserts, seen = [], set()
+    for record in records:
+        rid = key(record)
+        if rid in seen:
+            continue
+        seen.add(rid)
+        row = _row(record, scraped_at.date())
+        if previous.get(rid) != fingerprint(row):
+            upserts.append({'_scraped_at': stamp, '_id': rid, '_op': 'upsert', **row})
+    deletes = [{'_scraped_at': stamp, '_id': rid, '_op': 'delete'} for rid in previous if rid not in seen]
+
+    segment = None
+    os.makedirs(history_dir(filename), exist_ok=True)
+    if upserts or deletes:
+        segment = scraped_at.strftime("%Y") + ".parquet"
+        _write_segment(os.path.join(history_dir(filename), segment), upserts + deletes)
+    entry = {
+        'scraped_at': stamp,
+        'segment': segment,
+        'records': len(seen),
+        'upserts': len(upserts),
+        'deletes': len(deletes),
+    }
+    _write_manifest(filename, snapshots + [entry])
+    logger.info(f"{filename}: archived {stamp} ({len(upserts)} upserts, {len(deletes)} deletes)")
+    return entry
+
+
+def load_as_of(filename, when, columns=None):
+    """(manifest entry, DataFrame) of the snapshot as of when, reading only columns (all if None).
+
+    Raises LookupError if there is no snapshot on or before that date.
+    """
+    snapshots = list_snapshots(filename)
+    entry = resolve(filename, when, snapshots)
+    if entry is None:
+        raise LookupError(f"{filename}: no snapshot on or before {when}")
+    wanted = None if columns is None else list(columns)
+    if wanted is not None and 'D-Day' in wanted:
+        wanted.append('_deadline')
+    rows = _replay(filename, snapshots[:snapshots.index(entry) + 1], wanted)
+
+    if '_deadline' in rows.columns:
+        day = date.fromisoformat(entry['scraped_at'][:10])
+        deadline = pd.to_datetime(rows['_deadline'])
+        days = -(deadline - pd.Timestamp(day)).dt.days
+        restored = days.astype('Int64')
+        if 'D-Day' in rows.columns:
+            restored = restored.astype(object).where(rows['_deadline'].notna(), rows['D-Day'])
+        rows['D-Day'] = restored
+    keep = [c for c in rows.columns if not c.startswith('_')]
+    if columns is not None:
+        keep = [c for c in columns if c in rows.columns]
+    df = rows[keep].copy()
+    for name in DICTIONARY_COLUMNS:
+        if name in df.columns:
+            df[name] = df[name].astype('category')
+    return entry, df
+
+
+def records_as_of(filename, when, columns=None):
+    """(manifest entry, records) as of when, in the same shape as the snapshot's records."""
+    entry, df = load_as_of(filename, when, columns)
+    # Columns come back for every row, so a field a record did not have reads as None
+    records = [
+        {k: (None if pd.isna(v) else v) for k, v in row.items()}
+        for row in df.astype(object).to_dict('records')
+    ]
+    return entry, records
+
+
+def compare_snapshots(filename, before, after, columns=None, key=record_id):
+    """diff.diff_records between the snapshots as of two dates, reading only columns.
+
+    Without 'Link' and 'Title' among columns, records cannot be keyed, so those
+    two are always read.
+    """
+    if columns is not None:
+        columns = list(dict.fromkeys(list(columns) + ['Link', 'Title']))
+    _, old = records_as_of(filename, before, columns)
+    _, new = records_as_of(filename, after, columns)
+    return diff_records(old, new, key=key)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m scraper.history", description="Snapshot history")
+    commands = parser.add_subparsers(dest="command", required=True)
+    listing = commands.add_parser("list", help="list the archived scrapes of a snapshot")
+    listing.add_argument("file")
+    add = commands.add_parser("add", help="archive an existing snapshot file (e.g. a *_bak copy)")
+    add.add_argument("file")
+    add.add_argument("--as", dest="target", help="history to add it to (default: the file's own)")
+    compare = commands.add_parser("compare", help="added/removed/changed between two dates")
+    compare.add_argument("file")
+    compare.add_argument("before")
+    compare.add_argument("after")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    if args.command == "list":
+        for entry in list_snapshots(args.file):
+            print(f"{entry['scraped_at']}  {entry['records']:>5} records  "
+                  f"+{entry['upserts']} -{entry['deletes']}  {entry['segment'] or '-'}")
+    elif args.command == "add":
+        data = read_snapshot(args.file)
+        if data is None or not data['last_scraped']:
+            logger.error(f"{args.file} is missing or has no last_scraped date")
+            return 1
+        scraped_at = datetime.fromisoformat(data['last_scraped'])
+        if archive_snapshot(args.target or args.file, data['contests'], scraped_at) is None:
+            return 1
+    else:
+        try:
+            diff = compare_snapshots(args.file, args.before, args.after)
+        except (LookupError, ValueError) as e:
+            logger.error(e)
+            return 1
+        print(f"{len(diff['added'])} added, {len(diff['removed'])} removed, {len(diff['changed'])} changed")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,52 +1,98 @@
-import asyncio
-from playwright.sync_api import sync_playwright
+from playwright.sync_api import Error as PlaywrightError
+from requests.structures import CaseInsensitiveDict
 import logging
-import time
-
-def parse_competitions_from_page(page):
-    competitions = []
-    # Wait for competition entries to load
-    page.wait_for_selector('div.middle-wrapper', timeout=10000)
-    comps = page.query_selector_all('div.middle-wrapper')
-    for comp in comps:
-        # Title and link
-        h3 = comp.query_selector('h3')
-        a = h3.query_selector('a') if h3 else None
-        title = a.inner_text().strip() if a else None
-        link = a.get_attribute('href') if a else None
-        # Ages
-        ages_p = comp.query_selector('p.ages span')
-        ages = ages_p.inner_text().strip() if ages_p else None
-        # Categories
-        cat_p = comp.query_selector('p.categories span')
-        categories = cat_p.inner_text().strip() if cat_p else None
-        competitions.append({
-            'Title': title,
-            'Link': link,
-            'Ages': ages,
-            'Categories': categories,
-        })
-    logging.info(f"Parsed {len(competitions)} competitions from current page.")
-    return competitions
-
-def scrape_ics_competitions_playwright(max_pages=56, headless=False):
-    competitions = []
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=headless)
-        page = browser.new_page()
-        page_url = "https://www.competitionsciences.org/competitions/"
-        page_count = 0
-        while page_url and (max_pages is None or page_count < max_pages):
-            logging.info(f"Navigating to: {page_url}")
-            page.goto(page_url, timeout=60000)
-            comps = parse_competitions_from_page(page)
-            competitions.extend(comps)
-            # Find next page
-            next_a = page.query_selector('div.nav-links a.next.page-numbers')
-            next_link = next_a.get_attribute('href') if next_a else None
-            page_url = next_link
-            page_count += 1
-            time.sleep(1)
-        browser.close()
-    logging.info(f"Scraping complete. Total competitions: {len(competitions)}")
-    return competitions 
\ No newline at end of file
+import queue
+import threading
+from .engine import Engine
+from .ics_scraper import ICSSource, ICS_COMPETITIONS_URL
+from urllib.parse import urlparse
+from . import metrics
+from .browser_pool import get_pool
+
+# Crawls resumed on a new browser after the pool's browser crashed mid-crawl
+CRASH_RETRIES = 1
+
+class PlaywrightICSSource(ICSSource):
+    """ICS listing rendered in a real browser; parsing is shared with ICSSource."""
+    name = "ics-playwright"
+    retryable_errors = (PlaywrightError,)
+
+    def __init__(self, page, start_url=ICS_COMPETITIONS_URL):
+        super().__init__(start_url)
+        self.page = page
+
+    def fetch(self, engine, url, params):
+        logging.info(f"Navigating to: {url}")
+        host = urlparse(url).netloc
+        with metrics.IN_FLIGHT.track(host=host):
+            response = self.page.goto(url, timeout=60000)
+            if response is None or response.ok:
+                # Wait for competition entries to load
+                self.page.wait_for_selector('div.middle-wrapper', timeout=10000)
+        status = response.status if response else 200
+        content = self.page.content()
+        metrics.REQUESTS.inc(host=host, status=status)
+        metrics.RESPONSE_BYTES.inc(len(content.encode('utf-8')), host=host)
+        return status, content, CaseInsensitiveDict(response.headers if response else {})
+
+def iter_ics_competitions_playwright(max_pages=56, headless=False, start_url=ICS_COMPETITIONS_URL, pool=None):
+    """Yield competitions as each page is rendered and parsed.
+
+    The crawl runs on pool's thread (the process's shared BrowserPool by
+    default) and hands records over as they are parsed; closing the generator
+    stops it after the current page.
+    """
+    pool = pool or get_pool(headless)
+    records = queue.Queue()
+    stop = threading.Event()
+    done = object()
+
+    def crawl(page):
+        # The browser is single-threaded, so crawl one page at a time
+        engine = Engine(concurrency=1)
+        for record in engine.iter_records(PlaywrightICSSource(page, start_url), max_pages=max_pages):
+            if stop.is_set():
+                break
+            records.put(record)
+
+    future = pool.submit(crawl)
+    future.add_done_callback(lambda _: records.put(done))
+    try:
+        while True:
+            record = records.get()
+            if record is done:
+                break
+            yield record
+        future.result()
+    finally:
+        stop.set()
+
+
+def update_ics_competitions_playwright(max_pages=56, headless=True, output=PlaywrightICSSource.output_file,
+                                      start_url=ICS_COMPETITIONS_URL, resume=True, pool=None):
+    """Checkpointed browser crawl saved to output; a rerun after a crash resumes (see Engine.run).
+
+    Runs on pool (the process's shared BrowserPool by default), so repeated
+    refreshes reuse the running browser.
+    """
+    pool = pool or get_pool(headless)
+
+    def crawl(page):
+        engine = Engine(concurrency=1)
+        result = engine.run(PlaywrightICSSource(page, start_url), max_pages=max_pages, output=output, resume=resume)
+        return result, page.is_closed() or not page.context.browser.is_connected()
+
+    for attempt in range(CRASH_RETRIES + 1):
+        result, crashed = pool.run(crawl)
+        if result.complete or not crashed:
+            break
+        # The pool starts a new browser for the next job, which resumes from the checkpoint
+        logging.warning(f"Browser crashed after {len(result.records)} competitions; resuming with a new one")
+    logging.info(f"Scraping complete. Total competitions: {len(result.records)}, complete={result.complete}")
+    return result
+
+
+def scrape_ics_competitions_playwright(max_pages=56, headless=False, start_url=ICS_COMPETITIONS_URL):
+    records = list(iter_ics_competitions_playwright(max_pages, headless, start_url))
+    logging.info(f"Scraping complete. Total competitions: {len(records)}")
+    return records
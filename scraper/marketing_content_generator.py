@@ -1,4 +1,3 @@
-import openai
 import os
 
 # You may want to set your OpenAI API key as an environment variable or load it securely
@@ -10,6 +9,8 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 def generate_marketing_content(contest_detail, model="gpt-4o"):
     if not OPENAI_API_KEY:
         raise ValueError("OpenAI API key not set. Please set the OPENAI_API_KEY environment variable.")
+    # The SDK takes longer to import than the rest of the app; load it on first use
+    import openai
     openai.api_key = OPENAI_API_KEY
     prompt = f"""
 Given the following contest detail, generate:
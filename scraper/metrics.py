@@ -0,0 +1,236 @@
+import bisect
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+# Seconds; covers a cached lookup up to a slow page load
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+METRICS_FILE = os.getenv("SCRAPER_METRICS_FILE", "scraper_metrics.prom")
+
+
+def _label_key(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    def escape(v):
+        return v.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return "{" + ",".join(f'{k}="{escape(v)}"' for k, v in pairs) + "}"
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help = help_text
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def samples(self):
+        """[(labels dict, value)] for the diagnostics panel."""
+        with self._lock:
+            return [(dict(k), v) for k, v in self._values.items()]
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, value=1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+
+    def render(self):
+        with self._lock:
+            return [f"{self.name}{_format_labels(k)} {v}" for k, v in self._values.items()]
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[_label_key(labels)] = value
+
+    def inc(self, value=1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+
+    def dec(self, value=1, **labels):
+        self.inc(-value, **labels)
+
+    @contextmanager
+    def track(self, **labels):
+        """Count the wrapped block as in flight."""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+    def render(self):
+        with self._lock:
+            return [f"{self.name}{_format_labels(k)} {v}" for k, v in self._values.items()]
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {'counts': [0] * (len(self.buckets) + 1), 'sum': 0.0, 'count': 0}
+            state['counts'][bisect.bisect_left(self.buckets, value)] += 1
+            state['sum'] += value
+            state['count'] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self):
+        with self._lock:
+            return [(dict(k), {'counts': list(v['counts']), 'sum': v['sum'], 'count': v['count']})
+                    for k, v in self._values.items()]
+
+    def quantile(self, state, q):
+        """Upper bucket bound holding the q-quantile (Prometheus-style estimate)."""
+        if not state['count']:
+            return 0.0
+        rank = q * state['count']
+        running = 0
+        for bound, count in zip(self.buckets + (float('inf'),), state['counts']):
+            running += count
+            if running >= rank:
+                return bound
+        return float('inf')
+
+    def render(self):
+        lines = []
+        with self._lock:
+            for key, state in self._values.items():
+                running = 0
+                for bound, count in zip(self.buckets, state['counts']):
+                    running += count
+                    lines.append(f"{self.name}_bucket{_format_labels(key, [('le', repr(bound))])} {running}")
+                lines.append(f"{self.name}_bucket{_format_labels(key, [('le', '+Inf')])} {state['count']}")
+                lines.append(f"{self.name}_sum{_format_labels(key)} {state['sum']}")
+                lines.append(f"{self.name}_count{_format_labels(key)} {state['count']}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name, help_text, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help_text, **kwargs)
+            return metric
+
+    def counter(self, name, help_text):
+        return self._get(Counter, name, help_text)
+
+    def gauge(self, name, help_text):
+        return self._get(Gauge, name, help_text)
+
+    def histogram(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        return self._get(Histogram, name, help_text, buckets=buckets)
+
+    def metrics(self):
+        with self._lock:
+            return list(self._metrics.values())
+
+    def render(self):
+        lines = []
+        for metric in self.metrics():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# One process-wide registry; export it with write_prometheus() or serve_metrics()
+REGISTRY = Registry()
+
+# HTTP, labelled by host
+REQUESTS = REGISTRY.counter("scraper_requests_total", "HTTP requests sent, by host and status code")
+RESPONSE_BYTES = REGISTRY.counter("scraper_response_bytes_total", "Response body bytes received")
+CACHE_HITS = REGISTRY.counter("scraper_cache_hits_total", "Pages served from the page cache")
+IN_FLIGHT = REGISTRY.gauge("scraper_in_flight_requests", "Requests currently in flight")
+# Fetch and parse stages, labelled by source
+FETCH_SECONDS = REGISTRY.histogram("scraper_fetch_seconds", "Time to fetch one page")
+RETRIES = REGISTRY.counter("scraper_retries_total", "Page fetches retried after a 429/5xx or network error")
+CONCURRENCY_LIMIT = REGISTRY.gauge("scraper_concurrency_limit", "Current adaptive in-flight request limit")
+PARSE_SECONDS = REGISTRY.histogram("scraper_parse_seconds", "Time to parse one page")
+RECORDS = REGISTRY.counter("scraper_records_total", "Records parsed")
+PARSE_ERRORS = REGISTRY.counter("scraper_parse_errors_total", "Items that failed to parse")
+# Detail enrichment, labelled by outcome (fetched, failed, skipped)
+DETAILS = REGISTRY.counter("scraper_details_total", "Detail pages handled by the enrichment stage")
+# Persist stage, labelled by file
+PERSIST_SECONDS = REGISTRY.histogram("scraper_persist_seconds", "Time to diff and write a snapshot")
+# App, labelled by view
+RENDER_SECONDS = REGISTRY.histogram("app_render_seconds", "Time to render a table view")
+# Query API, labelled by resource and status
+API_REQUESTS = REGISTRY.counter("api_requests_total", "Query API requests")
+API_SECONDS = REGISTRY.histogram("api_request_seconds", "Time to answer a query API request")
+
+
+def render_prometheus():
+    return REGISTRY.render()
+
+
+def write_prometheus(path=METRICS_FILE):
+    """Write the current metrics in Prometheus text format (e.g. for node_exporter's textfile collector)."""
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(render_prometheus())
+    os.replace(tmp, path)
+    return path
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = render_prometheus().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_metrics(port, host="127.0.0.1"):
+    """Serve GET /metrics from a daemon thread; returns the server."""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    logger.info(f"Serving metrics on http://{host}:{port}/metrics")
+    return server
@@ -0,0 +1,230 @@
+"""Opt-in profiling of scrape runs and app reruns.
+
+    SCRAPER_PROFILE=1 python -m scraper.run_all_scrapers
+    python -m scraper.run_all_scrapers --profile
+    SCRAPER_PROFILE=1 streamlit run app.py       # one profile per rerun
+
+A profiled run samples the stacks of every thread and records wall-clock
+spans for its stages (fetch, parse, write_json, ...). Both go to one
+speedscope file per run in profiles/ (SCRAPER_PROFILE_DIR); open it at
+https://www.speedscope.app/. The samples are rooted at the spans that were open,
+so the flame graph splits by stage first. When profiling is off, span() hands
+back a shared no-op context and no thread is started.
+"""
+import contextlib
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+PROFILE_ENV = "SCRAPER_PROFILE"
+PROFILE_DIR = os.getenv("SCRAPER_PROFILE_DIR", "profiles")
+# Seconds between stack samples
+SAMPLE_INTERVAL = 0.005
+# Frames kept per sample, counted from the innermost
+MAX_DEPTH = 128
+SPEEDSCOPE_SCHEMA = "https://www.speedscope.app/file-format-schema.json"
+
+_NO_SPAN = contextlib.nullcontext()
+# The profile being recorded, if any; one at a time per process
+_active = None
+_active_lock = threading.Lock()
+
+
+def enabled():
+    return os.environ.get(PROFILE_ENV, "").lower() not in ("", "0", "false", "no")
+
+
+def span(name):
+    """Context manager timing a stage of the running profile; a no-op when none is running."""
+    profile = _active
+    if profile is None:
+        return _NO_SPAN
+    return profile.span(name)
+
+
+class Profile:
+    """Stack samples and spans of one run, written as a speedscope file."""
+
+    def __init__(self, name, interval=SAMPLE_INTERVAL):
+        self.name = name
+        self.interval = interval
+        self.started = time.perf_counter()
+        self.ended = None
+        self.frames = []
+        self._frame_index = {}
+        # Per thread: [(event, frame, at)], the open spans, and [(stack, weight)] samples
+        self.events = {}
+        self.open_spans = {}
+        self.samples = {}
+        self.thread_names = {}
+        self.path = None
+        self._frames_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sampler = None
+
+    def frame(self, name, file=None, line=None):
+        key = (name, file, line)
+        index = self._frame_index.get(key)
+        if index is None:
+            with self._frames_lock:
+                index = self._frame_index.get(key)
+                if index is None:
+                    entry = {'name': name}
+                    if file:
+                        entry['file'] = file
+                    if line:
+                        entry['line'] = line
+                    self.frames.append(entry)
+                    index = self._frame_index[key] = len(self.frames) - 1
+        return index
+
+    @contextlib.contextmanager
+    def span(self, name):
+        thread = threading.get_ident()
+        frame = self.frame(f"[{name}]")
+        self.thread_names.setdefault(thread, threading.current_thread().name)
+        events = self.events.setdefault(thread, [])
+        stack = self.open_spans.setdefault(thread, [])
+        events.append(('O', frame, time.perf_counter()))
+        stack.append(frame)
+        try:
+            yield
+        finally:
+            stack.pop()
+            events.append(('C', frame, time.perf_counter()))
+
+    def start(self):
+        self._sampler = threading.Thread(target=self._sample, name="profiler", daemon=True)
+        self._sampler.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+        self.ended = time.perf_counter()
+
+    def _sample(self):
+        me = threading.get_ident()
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            weight, last = now - last, now
+            for thread, top in sys._current_frames().items():
+                if thread == me:
+                    continue
+                stack = []
+                frame = top
+                while frame is not None and len(stack) < MAX_DEPTH:
+                    code = frame.f_code
+                    stack.append(self.frame(code.co_name, code.co_filename, code.co_firstlineno))
+                    frame = frame.f_back
+                stack.reverse()
+                self.samples.setdefault(thread, []).append((list(self.open_spans.get(thread, ())) + stack, weight))
+        for thread in self.samples:
+            self.thread_names.setdefault(thread, str(thread))
+        for thread in threading.enumerate():
+            if thread.ident in self.samples or thread.ident in self.events:
+                self.thread_names[thread.ident] = thread.name
+
+    def span_totals(self):
+        """{span name: wall-clock seconds}, summed over threads and calls."""
+        totals = {}
+        for events in list(self.events.values()):
+            opened = []
+            for kind, frame, at in events:
+                if kind == 'O':
+                    opened.append(at)
+                elif opened:
+                    name = self.frames[frame]['name'][1:-1]
+                    totals[name] = totals.get(name, 0.0) + at - opened.pop()
+        return totals
+
+    def speedscope(self):
+        end = (self.ended or time.perf_counter()) - self.started
+        profiles = []
+        for thread, events in list(self.events.items()):
+            events = list(events)
+            # Spans still open in other threads (e.g. another app session) end with the profile
+            opened = []
+            for kind, frame, _ in events:
+                if kind == 'O':
+                    opened.append(frame)
+                else:
+                    opened.pop()
+            events.extend(('C', frame, self.started + end) for frame in reversed(opened))
+            profiles.append({
+                'type': 'evented',
+                'name': f"{self.thread_names.get(thread, thread)} spans",
+                'unit': 'seconds',
+                'startValue': 0,
+                'endValue': end,
+                'events': [{'type': kind, 'frame': frame, 'at': at - self.started} for kind, frame, at in events],
+            })
+        for thread, samples in list(self.samples.items()):
+            profiles.append({
+                'type': 'sampled',
+                'name': f"{self.thread_names.get(thread, thread)} samples",
+                'unit': 'seconds',
+                'startValue': 0,
+                'endValue': end,
+                'samples': [stack for stack, _ in samples],
+                'weights': [weight for _, weight in samples],
+            })
+        return {
+            '$schema': SPEEDSCOPE_SCHEMA,
+            'name': self.name,
+            'exporter': 'scraper.profiling',
+            'shared': {'frames': self.frames},
+            'profiles': profiles,
+        }
+
+    def write(self, directory=PROFILE_DIR):
+        os.makedirs(directory, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        path = os.path.join(directory, f"{self.name}-{stamp}.speedscope.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.speedscope(), f)
+        self.path = path
+        return path
+
+
+@contextlib.contextmanager
+def profiled(name, enable=None):
+    """Profile the wrapped run when enable (default: $SCRAPER_PROFILE) is set.
+
+    Yields the Profile, or None when profiling is off. Inside a run that is
+    already being profiled, e.g. a second app session, it only adds a span.
+    """
+    global _active
+    if not (enabled() if enable is None else enable):
+        yield None
+        return
+    with _active_lock:
+        profile = None
+        if _active is None:
+            profile = _active = Profile(name)
+    if profile is None:
+        with span(name):
+            yield None
+        return
+    profile.start()
+    try:
+        with profile.span(name):
+            yield profile
+    finally:
+        profile.stop()
+        with _active_lock:
+            _active = None
+        try:
+            path = profile.write()
+        except OSError as e:
+            logger.warning(f"Could not write the profile of {name}: {e}")
+        else:
+            totals = ", ".join(f"{k} {v:.3f}s" for k, v in sorted(profile.span_totals().items(), key=lambda kv: -kv[1]))
+            logger.info(f"Profile of {name} written to {path} ({totals})")
@@ -1,23 +1,61 @@
-from scraper.contest_scraper import scrape_contests
-from scraper.ics_scraper_playwright import scrape_ics_competitions_playwright
-import json
-from datetime import datetime
+import argparse
 
-if __name__ == "__main__":
+from scraper.contest_scraper import CATEGORY_CODES, scrape_contests_sharded, update_contests
+from scraper.enrich import ENRICH_BUDGET, enrich_details
+from scraper.ics_scraper_playwright import update_ics_competitions_playwright
+from scraper.storage import save_snapshot
+from scraper.metrics import write_prometheus
+from scraper.profiling import profiled, span
+
+
+def report(filename, count, diff):
+    if diff is None:
+        print(f"Crawl stopped early ({count} records); kept the existing {filename}. Run again to resume.")
+    else:
+        print(f"Saved {count} records to {filename} "
+              f"({len(diff['added'])} added, {len(diff['removed'])} removed, {len(diff['changed'])} changed)")
+
+
+def run(args):
     # Scrape Contest Korea
     print("Scraping Contest Korea...")
-    korea_data = scrape_contests(max_pages=20)
-    ts_korea = datetime.now().strftime("%Y-%m-%d")
-    korea_obj = {'last_scraped': ts_korea, 'contests': korea_data}
-    with open("contests_korea.json", "w", encoding="utf-8") as f:
-        json.dump(korea_obj, f, ensure_ascii=False, indent=2)
-    print(f"Saved {len(korea_data)} contests to contests_korea.json")
+    if args.sharded:
+        korea_data = scrape_contests_sharded(max_pages=20, force=args.refresh)
+        report("contests_korea.json", len(korea_data), save_snapshot("contests_korea.json", korea_data))
+    else:
+        result = update_contests(max_pages=20)
+        korea_data = result.records
+        report("contests_korea.json", len(result.records), result.diff)
+
+    if args.details:
+        print("Fetching details of new and changed contests...")
+        with span("details"):
+            counts = enrich_details("contests_korea.json", korea_data, budget=args.detail_budget)
+        print(f"Details: {counts['fetched']} fetched, {counts['failed']} failed, "
+              f"{counts['unchanged']} unchanged, {counts['left']} left for the next run")
 
     # Scrape ICS competitions
     print("Scraping ICS competitions (Playwright)...")
-    ics_data = scrape_ics_competitions_playwright(headless=True)
-    ts = datetime.now().strftime("%Y-%m-%d")
-    obj = {'last_scraped': ts, 'contests': ics_data}
-    with open("ics_competitions.json", "w", encoding="utf-8") as f:
-        json.dump(obj, f, ensure_ascii=False, indent=2)
-    print(f"Saved {len(ics_data)} competitions to ics_competitions.json") 
\ No newline at end of file
+    result = update_ics_competitions_playwright(headless=True)
+    report("ics_competitions.json", len(result.records), result.diff)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scrape Contest Korea and ICS")
+    parser.add_argument("--sharded", action="store_true",
+                        help="crawl Contest Korea one category at a time, refreshing only shards that are due")
+    parser.add_argument("--refresh", nargs="+", choices=CATEGORY_CODES, default=(),
+                        help="with --sharded, refresh these categories even if they are not due")
+    parser.add_argument("--details", action="store_true",
+                        help="after the Contest Korea crawl, fetch the detail pages of new and changed contests")
+    parser.add_argument("--detail-budget", type=float, default=ENRICH_BUDGET,
+                        help="seconds the detail stage may take; the rest is fetched next run")
+    parser.add_argument("--profile", action="store_true",
+                        help="write a speedscope profile of the run to profiles/ (or set SCRAPER_PROFILE=1)")
+    args = parser.parse_args()
+
+    with profiled("run_all_scrapers", args.profile or None) as profile:
+        run(args)
+    print(f"Wrote metrics to {write_prometheus()}")
+    if profile is not None and profile.path:
+        print(f"Wrote profile to {profile.path}")
@@ -1,11 +1,24 @@
-from scraper.ics_scraper_playwright import scrape_ics_competitions_playwright
-import json
-from datetime import datetime
+import argparse
+import sys
+
+from scraper.ics_scraper_playwright import update_ics_competitions_playwright
+from scraper.metrics import write_prometheus
+from scraper.profiling import profiled
 
 if __name__ == "__main__":
-    data = scrape_ics_competitions_playwright(headless=True)
-    ts = datetime.now().strftime("%Y-%m-%d")
-    obj = {'last_scraped': ts, 'contests': data}
-    with open("ics_competitions.json", "w", encoding="utf-8") as f:
-        json.dump(obj, f, ensure_ascii=False, indent=2)
-    print(f"Saved {len(data)} competitions to ics_competitions.json") 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Scrape ICS competitions with Playwright")
+    parser.add_argument("--profile", action="store_true",
+                        help="write a speedscope profile of the run to profiles/ (or set SCRAPER_PROFILE=1)")
+    args = parser.parse_args()
+    with profiled("run_ics_playwright", args.profile or None) as profile:
+        result = update_ics_competitions_playwright(headless=True)
+    print(f"Wrote metrics to {write_prometheus()}")
+    if profile is not None and profile.path:
+        print(f"Wrote profile to {profile.path}")
+    diff = result.diff
+    if diff is None:
+        print(f"Crawl stopped early ({len(result.records)} competitions, failed pages {result.failed_pages}); "
+              f"kept the existing ics_competitions.json. Run again to resume.", file=sys.stderr)
+        sys.exit(1)
+    print(f"Saved {len(result.records)} competitions to ics_competitions.json "
+          f"({len(diff['added'])} added, {len(diff['removed'])} removed, {len(diff['changed'])} changed)")
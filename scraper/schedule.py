@@ -0,0 +1,306 @@
+"""Refresh Contest Korea within a time budget, most valuable work first.
+
+    python -m scraper.schedule                    # 10 second budget
+    python -m scraper.schedule --budget 60 --base-url http://127.0.0.1:8765
+
+Work runs in tiers:
+1. the top list pages, where new contests appear;
+2. the detail pages of contests whose deadline is near;
+3. the detail pages of other new or changed contests;
+4. the remaining list pages (the long tail).
+The list pages are small, fixed-size pages, so one page is quick to fetch.
+Contests found on a list page are merged into the snapshot by record id, and
+their details are queued when they are new or changed. Work not started when
+the budget runs out is carried over. The tail pages go to
+contests_korea.schedule.json, so the next run continues the tail where this one
+stopped. Details are found again from the details store.
+
+A scheduled refresh never removes a contest, since it does not see the whole
+list at once; removals come with a full crawl (scraper.run_all_scrapers).
+"""
+import argparse
+import heapq
+import json
+import logging
+import math
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timedelta
+
+import requests
+
+from . import metrics
+from .contest_scraper import BASE_URL, ContestKoreaSource
+from .detail import detail_entry, read_details, save_details, stored_detail
+from .diff import fingerprint, record_id
+from .engine import CrawlResult, Engine, FetchError
+from .enrich import DetailSource, fetch_detail_fields
+from .storage import read_snapshot, save_snapshot, write_json_atomic
+from .utils import days_until_deadline
+
+logger = logging.getLogger(__name__)
+
+# Seconds an interactive refresh may take
+REFRESH_BUDGET = 10
+# Rows per list page; the site honors displayrow, and small pages keep each unit of work short
+PAGE_SIZE = 50
+TOP_PAGES = 2
+NEAR_DEADLINE_DAYS = 7
+# Details of contests closing soon are fetched again once they are this old
+NEAR_DEADLINE_DETAIL_AGE = timedelta(days=1)
+# Tiers, in the order they run
+TOP, NEAR_DEADLINE, DETAILS, TAIL = range(4)
+
+
+def schedule_path(filename):
+    """Carried-over work for a snapshot, e.g. contests_korea.schedule.json."""
+    return os.path.splitext(filename)[0] + ".schedule.json"
+
+
+def load_schedule(path):
+    """{'tail': [pages], 'updated_at'}; empty if the file is missing or unreadable."""
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Could not read schedule {path}: {e}")
+        return {}
+
+
+def near_deadline(record, days=NEAR_DEADLINE_DAYS):
+    d_day = record.get('D-Day')
+    return isinstance(d_day, int) and 0 <= days_until_deadline(d_day) <= days
+
+
+def _urgency(record):
+    # Open contests by days left, then the ones without a deadline, then closed ones
+    d_day = record.get('D-Day')
+    if not isinstance(d_day, int):
+        return (1, 0)
+    days = days_until_deadline(d_day)
+    return (0, days) if days >= 0 else (2, -days)
+
+
+def detail_tier(details, record, now):
+    """The tier a record's detail page belongs in, or None if its stored details will do."""
+    if not record.get('Link'):
+        return None
+    near = near_deadline(record)
+    if stored_detail(details, record) is None:
+        return NEAR_DEADLINE if near else DETAILS
+    fetched_at = details[record_id(record)].get('fetched_at')
+    if near and (not fetched_at or now - datetime.fromisoformat(fetched_at) >= NEAR_DEADLINE_DETAIL_AGE):
+        return NEAR_DEADLINE
+    return None
+
+
+class ScheduleResult:
+    def __init__(self):
+        self.pages = []
+        self.details = 0
+        self.failed = []
+        # Work not started within the budget: [(tier, item)]
+        self.left = []
+        self.reached_end = False
+        # Set once the merged records are saved; None if no list page was fetched
+        self.diff = None
+        self.records = []
+
+
+class Scheduler:
+    """Runs prioritized work on an Engine until a deadline, then stops taking new work.
+
+    Items are ('list', page) or ('detail', record id). Items are started up to
+    the engine's current AIMD limit, so it paces them like a crawl's pages; an
+    item still in flight at the deadline is finished but not retried.
+    """
+
+    def __init__(self, filename, engine=None, base_url=BASE_URL, page_size=PAGE_SIZE, top_pages=TOP_PAGES):
+        self.filename = filename
+        self.engine = engine or Engine()
+        self.base_url = base_url
+        self.top_pages = top_pages
+        self.list_source = ContestKoreaSource(base_url, page_size=page_size)
+        self.detail_source = DetailSource()
+        self.list_result = CrawlResult(self.list_source)
+        self.detail_result = CrawlResult(self.detail_source)
+        self._queue = []
+        self._queued = set()
+        self._seq = 0
+
+    def push(self, tier, item):
+        if item in self._queued:
+            return
+        self._queued.add(item)
+        heapq.heappush(self._queue, (tier, self._seq, item))
+        self._seq += 1
+
+    def plan(self, previous, details, carried, now):
+        """Queue the top pages, the details that are due and the tail (carried over, or all of it)."""
+        for page in range(1, self.top_pages + 1):
+            self.push(TOP, ('list', page))
+        for record in sorted(previous, key=_urgency):
+            tier = detail_tier(details, record, now)
+            if tier is not None:
+                self.push(tier, ('detail', record_id(record)))
+        tail = carried.get('tail')
+        if not tail:
+            last = max(self.top_pages + 1, math.ceil(len(previous) / self.list_source.page_size) + 1)
+            tail = range(self.top_pages + 1, last + 1)
+        for page in tail:
+            if page > self.top_pages:
+                self.push(TAIL, ('list', page))
+
+    def _work(self, item, records_by_id, deadline):
+        kind, key = item
+        if kind == 'list':
+            return self.engine.crawl_page(self.list_source, key, self.list_result, deadline)
+        record = records_by_id[key]
+        fields = fetch_detail_fields(self.engine, self.detail_source, record, self.detail_result, self.base_url, deadline)
+        return detail_entry(record, fields)
+
+    def run(self, previous, details, budget=REFRESH_BUDGET, now=None):
+        """Work through the queue for budget seconds; returns (ScheduleResult, fetched records by page)."""
+        now = now or datetime.now()
+        deadline = time.monotonic() + budget
+        result = ScheduleResult()
+        records_by_id = {record_id(r): r for r in previous}
+        previous_prints = {rid: fingerprint(r) for rid, r in records_by_id.items()}
+        pages = {}
+        entries = {}
+        end_page = None
+        in_flight = {}
+        with ThreadPoolExecutor(max_workers=self.engine.concurrency) as pool:
+            while self._queue or in_flight:
+                # Only as many as the AIMD limit lets run, so none sits waiting for a slot past the deadline
+                while self._queue and len(in_flight) < max(1, int(self.engine.controller.limit)) \
+                        and time.monotonic() < deadline:
+                    tier, _, item = heapq.heappop(self._queue)
+                    if item[0] == 'list' and end_page is not None and item[1] > end_page:
+                        continue
+                    in_flight[pool.submit(self._work, item, records_by_id, deadline)] = (tier, item)
+                if not in_flight:
+                    break
+                done, _ = wait(in_flight, timeout=max(0.0, deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+                if not done and time.monotonic() >= deadline:
+                    # Stop taking work, but let what is in flight finish
+                    done, _ = wait(in_flight)
+                for future in done:
+                    tier, item = in_flight.pop(future)
+                    kind, key = item
+                    try:
+                        outcome = future.result()
+                    except (FetchError, requests.exceptions.RequestException) as e:
+                        logger.warning(f"Scheduled {kind} {key} failed: {e}")
+                        result.failed.append(item)
+                        continue
+                    except Exception as e:
+                        logger.error(f"Scheduled {kind} {key} failed: {e}")
+                        result.failed.append(item)
+                        continue
+                    if kind == 'detail':
+                        entries[key] = outcome
+                        result.details += 1
+                        continue
+                    records, is_last = outcome
+                    result.pages.append(key)
+                    if records is not None:
+                        pages[key] = records
+                    if records is None or is_last:
+                        end_page = key if end_page is None else min(end_page, key)
+                        result.reached_end = True
+                    elif tier == TAIL and not any(t == TAIL for t, _, _ in self._queue) and not any(
+                            t == TAIL for t, _ in in_flight.values()):
+                        # The tail is longer than the snapshot suggested
+                        self.push(TAIL, ('list', key + 1))
+                    for record in records or ():
+                        rid = record_id(record)
+                        if previous_prints.get(rid) != fingerprint(record):
+                            records_by_id[rid] = record
+                            detail = detail_tier(details, record, now)
+                            if detail is not None:
+                                self.push(detail, ('detail', rid))
+        while self._queue:
+            tier, _, item = heapq.heappop(self._queue)
+            if item[0] == 'list' and end_page is not None and item[1] > end_page:
+                continue
+            result.left.append((tier, item))
+        if entries:
+            save_details(self.filename, entries)
+        return result, pages
+
+
+def carried_tail(result, top_pages):
+    """Tail pages for the next run: the ones not started in time and the ones that failed."""
+    pages = {item[1] for tier, item in result.left if tier == TAIL}
+    pages.update(item[1] for item in result.failed if item[0] == 'list' and item[1] > top_pages)
+    return sorted(pages)
+
+
+def merge_pages(previous, pages, key=record_id):
+    """previous with the records from fetched list pages upserted; contests new to it come first."""
+    fresh = {}
+    for page in sorted(pages):
+        for record in pages[page]:
+            fresh.setdefault(key(record), record)
+    known = {key(r) for r in previous}
+    added = [r for rid, r in fresh.items() if rid not in known]
+    return added + [fresh.get(key(r), r) for r in previous]
+
+
+def scheduled_refresh(filename=ContestKoreaSource.output_file, budget=REFRESH_BUDGET, engine=None, base_url=BASE_URL):
+    """Refresh filename within budget seconds (see the module docstring); returns a ScheduleResult."""
+    started = time.monotonic()
+    try:
+        data = read_snapshot(filename) or {'complete': False, 'contests': []}
+    except (OSError, ValueError) as e:
+        logger.warning(f"Could not read {filename}: {e}")
+        data = {'complete': False, 'contests': []}
+    previous = data['contests']
+    details = read_details(filename)
+    path = schedule_path(filename)
+    now = datetime.now()
+
+    scheduler = Scheduler(filename, engine, base_url)
+    scheduler.plan(previous, details, load_schedule(path), now)
+    result, pages = scheduler.run(previous, details, budget, now)
+
+    if pages:
+        # The list is complete once a pass reached its end with no earlier page failing
+        complete = data['complete'] or (result.reached_end and not any(k == 'list' for k, _ in result.failed))
+        result.records = merge_pages(previous, pages)
+        result.diff = save_snapshot(filename, result.records, complete=complete)
+    else:
+        result.records = previous
+    write_json_atomic(path, {'tail': carried_tail(result, scheduler.top_pages), 'updated_at': now.isoformat(timespec='seconds')},
+                      indent=None)
+    metrics.DETAILS.inc(result.details, outcome='fetched')
+    logger.info(
+        f"{filename}: scheduled refresh fetched {len(result.pages)} list pages and {result.details} details "
+        f"in {time.monotonic() - started:.1f}s; {len(result.failed)} failed, {len(result.left)} left for the next run"
+    )
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m scraper.schedule", description="Refresh within a time budget")
+    parser.add_argument("--budget", type=float, default=REFRESH_BUDGET, help="seconds the refresh may take")
+    parser.add_argument("--output", default=ContestKoreaSource.output_file)
+    parser.add_argument("--base-url", default=BASE_URL, help="site root, e.g. a replay server")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    result = scheduled_refresh(args.output, args.budget, base_url=args.base_url)
+    if result.diff is not None:
+        diff = result.diff
+        print(f"Saved {len(result.records)} contests to {args.output} "
+              f"({len(diff['added'])} added, {len(diff['changed'])} changed)")
+    print(f"{len(result.pages)} list pages, {result.details} details, {len(result.left)} items left for the next run")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,172 @@
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+from .diff import diff_records, record_id
+from . import metrics, profiling
+
+logger = logging.getLogger(__name__)
+
+
+def changes_path(filename):
+    """Change log that sits next to a snapshot, e.g. contests_korea.changes.jsonl."""
+    return os.path.splitext(filename)[0] + ".changes.jsonl"
+
+
+def read_snapshot(filename):
+    """The snapshot as {'last_scraped', 'complete', 'contests'}; None if it is missing."""
+    if not os.path.exists(filename):
+        return None
+    with open(filename, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if not isinstance(data, dict):
+        data = {'contests': data}
+    # Snapshots written before crawls were checkpointed were always full crawls
+    return {
+        'last_scraped': data.get('last_scraped'),
+        'complete': data.get('complete', True),
+        'contests': data.get('contests', []),
+    }
+
+
+def load_snapshot(filename):
+    """Return (last_scraped, records) for a snapshot file; (None, []) if it is missing."""
+    data = read_snapshot(filename)
+    if data is None:
+        return None, []
+    return data['last_scraped'], data['contests']
+
+
+def write_json_atomic(filename, obj, indent=2):
+    """Write JSON through a temp file so readers never see a half-written file."""
+    # Unique, since the app, its sessions and the scrapers may write the same file at once
+    tmp = f"{filename}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(obj, f, ensure_ascii=False, indent=indent)
+    os.replace(tmp, filename)
+
+
+def save_snapshot(filename, records, key=record_id, complete=True):
+    """Replace a snapshot, recording what changed since the previous one.
+
+    Returns the diff (see diff.diff_records) between the old and new records.
+    Records from an incomplete crawl never replace a complete snapshot; then
+    nothing is written and None is returned.
+    """
+    with metrics.PERSIST_SECONDS.time(file=os.path.basename(filename)):
+        return _save_snapshot(filename, records, key, complete)
+
+
+def _save_snapshot(filename, records, key, complete):
+    try:
+        with profiling.span("read_previous"):
+            data = read_snapshot(filename) or {'complete': False, 'contests': []}
+    except (OSError, ValueError) as e:
+        logger.warning(f"Could not read previous snapshot {filename}: {e}")
+        data = {'complete': False, 'contests': []}
+    previous = data['contests']
+    if not complete and previous and data['complete']:
+        logger.warning(
+            f"{filename}: keeping the complete snapshot ({len(previous)} records) "
+            f"instead of a partial crawl ({len(records)} records)"
+        )
+        return None
+    with profiling.span("diff"):
+        diff = diff_records(previous, records, key=key)
+
+    now = datetime.now()
+    with profiling.span("write_json"):
+        write_json_atomic(filename, {'last_scraped': now.strftime("%Y-%m-%d"), 'complete': complete, 'contests': records})
+    with profiling.span("export_arrow"):
+        export_arrow(filename, records, now.strftime("%Y-%m-%d"), complete, key)
+
+    entry = {
+        'scraped_at': now.isoformat(timespec='seconds'),
+        'added': [key(r) for r in diff['added']],
+        'removed': [key(r) for r in diff['removed']],
+        'changed': {c['id']: c['fields'] for c in diff['changed']},
+    }
+    with open(changes_path(filename), "a", encoding="utf-8") as f:
+        f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    if complete:
+        with profiling.span("archive"):
+            archive(filename, records, now, key)
+        with profiling.span("dedupe"):
+            refresh_duplicates(filename)
+    # The first scrape of a file is not news; after that, check what it added or changed
+    if previous:
+        with profiling.span("alerts"):
+            send_alerts(filename, diff, key)
+    logger.info(
+        f"{filename}: {len(diff['added'])} added, {len(diff['removed'])} removed, "
+        f"{len(diff['changed'])} changed"
+    )
+    return diff
+
+
+def export_arrow(filename, records, last_scraped, complete, key=record_id):
+    """Write the memory-mappable Arrow copy the app loads; without it the app falls back to the JSON."""
+    try:
+        from .columnar import write_arrow
+        return write_arrow(filename, records, last_scraped, complete, key)
+    except (ImportError, OSError, ValueError) as e:
+        logger.warning(f"Could not write the Arrow copy of {filename}: {e}")
+        return None
+
+
+def archive(filename, records, scraped_at, key=record_id):
+    """Add a complete scrape to the Parquet history; a failure there never fails the save."""
+    # history reads snapshots through this module, so import it here
+    try:
+        from .history import archive_snapshot
+        return archive_snapshot(filename, records, scraped_at, key=key)
+    except (ImportError, OSError, ValueError) as e:
+        logger.warning(f"Could not archive {filename} to history: {e}")
+        return None
+
+
+def refresh_duplicates(filename):
+    """Update duplicate detection after a complete scrape; like archive(), it never fails the save."""
+    try:
+        from .dedupe import refresh_duplicates as refresh
+        return refresh(filename)
+    except (ImportError, OSError, ValueError) as e:
+        logger.warning(f"Could not update duplicates for {filename}: {e}")
+        return None
+
+
+def send_alerts(filename, diff, key=record_id):
+    """Check saved searches against the delta; like archive(), it never fails the save."""
+    try:
+        from .alerts import evaluate_delta
+        return evaluate_delta(filename, diff, key)
+    except (ImportError, OSError, ValueError) as e:
+        logger.warning(f"Could not check saved searches for {filename}: {e}")
+        return None
+
+
+def read_changes(filename):
+    """All change log entries for a snapshot, oldest first."""
+    path = changes_path(filename)
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def added_since(filename, since=None):
+    """IDs added after an ISO timestamp; without one, those added by the latest scrape."""
+    return ids_added_since(read_changes(filename), since)
+
+
+def ids_added_since(entries, since=None):
+    """added_since() over change log entries already in memory."""
+    if since is None:
+        entries = entries[-1:]
+    else:
+        entries = [e for e in entries if e['scraped_at'] > since]
+    ids = set()
+    for entry in entries:
+        ids.update(entry['added'])
+    return ids
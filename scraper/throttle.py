@@ -0,0 +1,102 @@
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+
+# Statuses worth retrying; anything else is final
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# A response this many times slower than the running average counts as congestion
+LATENCY_SPIKE_FACTOR = 3.0
+# ...but only once it is also slower than this many seconds
+LATENCY_SPIKE_FLOOR = 1.0
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 30.0
+
+
+def parse_retry_after(value):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP-date), or None."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+def backoff_delay(attempt, base=BACKOFF_BASE, cap=BACKOFF_CAP, rng=random):
+    """'Full jitter' exponential backoff for a 0-based retry attempt."""
+    return rng.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class AIMDController:
+    """Adaptive in-flight request limit.
+
+    Healthy responses raise the limit by `increase` once per limit's worth of
+    successes (about one round trip). A 429/5xx or a latency spike cuts it by
+    `decrease`, at most once per round trip. Retry-After pauses all new requests.
+    """
+
+    def __init__(self, initial=2, minimum=1, maximum=8, increase=1.0, decrease=0.5):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.increase = increase
+        self.decrease = decrease
+        self.limit = float(max(minimum, min(initial, maximum)))
+        self.in_flight = 0
+        self.avg_latency = None
+        self._successes = 0
+        self._last_cut = 0.0
+        self._resume_at = 0.0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        with self._cond:
+            while True:
+                wait = self._resume_at - time.monotonic()
+                if wait > 0:
+                    self._cond.wait(wait)
+                elif self.in_flight >= int(self.limit):
+                    self._cond.wait()
+                else:
+                    self.in_flight += 1
+                    return
+
+    def release(self, latency, status=None):
+        """Return a slot and feed back the outcome; status None means a network error."""
+        with self._cond:
+            self.in_flight -= 1
+            congested = status is None or status in RETRY_STATUSES
+            if not congested and self.avg_latency is not None:
+                congested = latency > max(LATENCY_SPIKE_FLOOR, self.avg_latency * LATENCY_SPIKE_FACTOR)
+            if congested:
+                self._cut()
+            else:
+                self._successes += 1
+                if self._successes >= int(self.limit):
+                    self._successes = 0
+                    self.limit = min(self.maximum, self.limit + self.increase)
+            if status is not None:
+                self.avg_latency = latency if self.avg_latency is None else 0.8 * self.avg_latency + 0.2 * latency
+            self._cond.notify_all()
+
+    def _cut(self):
+        now = time.monotonic()
+        # Several requests fail together during one overload; only react once
+        if now - self._last_cut < (self.avg_latency or 0.0):
+            return
+        self._last_cut = now
+        self._successes = 0
+        self.limit = max(self.minimum, self.limit * self.decrease)
+
+    def pause(self, seconds):
+        """Hold all new requests for `seconds` (from a Retry-After header)."""
+        with self._cond:
+            self._resume_at = max(self._resume_at, time.monotonic() + seconds)
+            self._cond.notify_all()
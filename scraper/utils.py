@@ -1,3 +1,7 @@
+def days_until_deadline(d_day):
+    """Days left from a stored D-Day value ("D-7" is stored as -7); negative once the deadline passed."""
+    return -d_day
+
 def extract_days_left(dday_text):
     """Extract numeric days left from D-Day text."""
     try:
@@ -0,0 +1,45 @@
+import pandas as pd
+import streamlit as st
+from scraper.alerts import add_search, load_searches, outbox_path, read_outbox, remove_search, searches_path
+
+RECENT_ALERTS = 20
+
+def save_search_controls(filename, selections, key):
+    """Expander that stores the current filter as a saved search; matches then show up after each scrape."""
+    with st.expander("Save this search"):
+        if not any(selections.values()):
+            st.caption("Pick some filter values first; a search without any would match every new contest.")
+        name = st.text_input("Name", key=f"{key}_search_name")
+        query = st.text_input("Title contains (optional)", key=f"{key}_search_query")
+        if st.button("Save search", key=f"{key}_save_search", disabled=not name):
+            add_search(searches_path(filename), name, filename, selections, query)
+            st.success(f"Saved \"{name}\". New or changed contests that match it are listed under Saved searches.")
+
+def display_saved_searches(filename):
+    """Sidebar list of the saved searches next to filename, with the latest alerts."""
+    path = searches_path(filename)
+    searches = load_searches(path)
+    if not searches:
+        return
+    with st.sidebar.expander(f"Saved searches ({len(searches)})"):
+        for search in searches:
+            filters = "; ".join(f"{column}: {', '.join(values)}" for column, values in search['filters'].items())
+            if search.get('query'):
+                filters += f"; title: {search['query']}"
+            cols = st.columns([3, 1])
+            cols[0].markdown(f"**{search['name']}** ({search['source']})  \n{filters or 'everything'}")
+            if cols[1].button("Delete", key=f"delete_search_{search['id']}"):
+                remove_search(path, search['id'])
+                st.rerun()
+        alerts = read_outbox(outbox_path(filename), RECENT_ALERTS)
+        if alerts:
+            st.caption("Latest matches")
+            st.dataframe(
+                pd.DataFrame([
+                    {'When': a['created_at'], 'Search': a['search'], 'Event': a['event'],
+                     'Title': a['record'].get('Title'), 'Link': a['record'].get('Link')}
+                    for a in reversed(alerts)
+                ]),
+                hide_index=True,
+                column_config={'Link': st.column_config.LinkColumn('Link')},
+            )
@@ -0,0 +1,33 @@
+import pandas as pd
+import streamlit as st
+from scraper import metrics
+
+def display_diagnostics():
+    """Small panel with the current scraper and render metrics."""
+    with st.expander("Diagnostics"):
+        rows = []
+        for metric in metrics.REGISTRY.metrics():
+            for labels, value in metric.samples():
+                label_text = ", ".join(f"{k}={v}" for k, v in sorted(labels.items()))
+                if metric.kind == "histogram":
+                    count = value['count']
+                    rows.append({
+                        'Metric': metric.name,
+                        'Labels': label_text,
+                        'Value': count,
+                        'Avg (s)': round(value['sum'] / count, 4) if count else 0.0,
+                        'p95 (s)': metric.quantile(value, 0.95),
+                    })
+                else:
+                    rows.append({'Metric': metric.name, 'Labels': label_text, 'Value': value})
+        if rows:
+            st.dataframe(pd.DataFrame(rows), hide_index=True, use_container_width=True)
+        else:
+            st.caption("No metrics recorded yet in this process.")
+        st.download_button(
+            label="Download metrics (Prometheus text)",
+            data=metrics.render_prometheus(),
+            file_name="metrics.prom",
+            mime="text/plain",
+            key="metrics_download_button",
+        )
@@ -1,77 +1,90 @@
 import streamlit as st
+import numpy as np
 import pandas as pd
-
-def display_ics_competitions(ics_competitions):
+from ui.table import page_frames, render_pager, view_frame
+from ui.filters import canonical_selection, restore_pager, restore_selection, share_view
+from ui.export import render_export
+from ui.duplicates import collapse_duplicates
+from ui.alerts import save_search_controls
+
+# Columns shipped to the grid, in display order
+ICS_GRID_COLUMNS = ['Title', 'Ages', 'Categories', 'Link']
+ICS_TRUNCATED_COLUMNS = ['Title', 'Ages', 'Categories']
+
+def competition_tags(df):
+    """Sorted category tags; Categories holds comma-separated tags."""
+    all_tags = set()
+    for cats in df['Categories'].dropna():
+        tags = [tag.strip() for tag in cats.split(',')]
+        all_tags.update(tags)
+    return sorted(all_tags)
+
+def filter_competitions(df, selected_tags):
+    """Rows with any selected tag; an empty selection does not filter."""
+    def has_selected_tag(cat_str):
+        if pd.isna(cat_str):
+            return False
+        tags = [tag.strip() for tag in cat_str.split(',')]
+        return any(tag in selected_tags for tag in tags)
+
+    if selected_tags:
+        return df[df['Categories'].apply(has_selected_tag)]
+    return df
+
+def display_ics_competitions(dataset, new_ids=None, duplicates=None):
+    """Render the shared Dataset (see scraper.dataset); the session only keeps its filter state."""
     st.subheader("ICS Competitions (competitionsciences.org)")
-    if ics_competitions:
-        df = pd.DataFrame(ics_competitions)
-
-        # Split categories by comma and strip whitespace, then explode for filtering
-        all_tags = set()
-        for cats in df['Categories'].dropna():
-            tags = [tag.strip() for tag in cats.split(',')]
-            all_tags.update(tags)
-        unique_tags = sorted(all_tags)
-
-        # Uncheck All logic (only uncheck, do not update table)
-        if 'ics_uncheck_all' not in st.session_state:
-            st.session_state.ics_uncheck_all = False
-        if 'ics_tag_states' not in st.session_state:
-            st.session_state.ics_tag_states = {tag: True for tag in unique_tags}
-        uncheck_all = st.button("Uncheck All Tags", key="ics_uncheck_all_btn")
-        if uncheck_all:
-            for tag in unique_tags:
-                st.session_state.ics_tag_states[tag] = False
-
-        # Use checkboxes for each tag and an Apply button
+    if dataset is not None and len(dataset):
+        # "New since last visit" view, driven by the scrape change log
+        rows = None
+        if new_ids:
+            is_new = dataset.ids.isin(new_ids)
+            if st.checkbox(f"Only new since last visit ({int(is_new.sum())})", key="ics_only_new"):
+                rows = np.flatnonzero(is_new.to_numpy())
+        rows = collapse_duplicates(dataset, duplicates, "ics", "ics", rows)
+
+        unique_tags = dataset.derive('tags', competition_tags, dataset.df)
+
+        # The filter and pager state comes from the URL on a session's first run
+        restore_selection("ics_tags", "ics_tag", unique_tags)
+        restore_pager("ics", ICS_GRID_COLUMNS)
+        if st.button("Clear Tags", key="ics_clear_tags"):
+            st.session_state.ics_tags = []
+
+        # The selection only changes when Apply is pressed; an empty selection shows everything
         st.subheader("Filter by Category Tag")
         with st.form(key="ics_tag_filter_form"):
-            tag_states = {}
-            cols = st.columns(4)
-            for i, tag in enumerate(unique_tags):
-                col = cols[i % 4]
-                tag_states[tag] = col.checkbox(tag, value=st.session_state.ics_tag_states.get(tag, True), key=f"ics_tag_{tag}")
-            apply_filters = st.form_submit_button("Apply Filters")
-
-        # Only update filtered_df when Apply Filters is pressed
-        if 'ics_selected_tags' not in st.session_state or apply_filters:
-            st.session_state.ics_selected_tags = [tag for tag, checked in tag_states.items() if checked]
-            st.session_state.ics_tag_states = tag_states.copy()
-        selected_tags = st.session_state.ics_selected_tags
-
-        # Filter dataframe by selected tags (show if any tag in Categories matches)
-        def has_selected_tag(cat_str):
-            if pd.isna(cat_str):
-                return False
-            tags = [tag.strip() for tag in cat_str.split(',')]
-            return any(tag in selected_tags for tag in tags)
-
-        if selected_tags:
-            filtered_df = df[df['Categories'].apply(has_selected_tag)]
-        else:
-            filtered_df = df
-
-        # Sort by Title (or any other field if needed)
-        filtered_df = filtered_df.sort_values('Title', ascending=True)
+            st.multiselect("Category tags", unique_tags, key="ics_tags", placeholder="All tags")
+            st.form_submit_button("Apply Filters")
+        selected_tags = canonical_selection(st.session_state.ics_tags, unique_tags)
+        selections = {'Categories': selected_tags}
+        save_search_controls(dataset.filename, selections, "ics")
+
+        # Filter by selected tags (show if any tag in Categories matches), through the shared index;
+        # views are memoized on the dataset, so an unchanged view costs nothing
+        matched = dataset.view(selections, rows)
 
         # Create a container for the summary
         summary_container = st.empty()
 
         # Display competition count
-        st.subheader(f"Showing {len(filtered_df)} competitions")
+        st.subheader(f"Showing {len(matched)} competitions")
+
+        # Sort the whole result (default: by Title), then ship only the
+        # current page, with long text cut, to the browser
+        sort_key, ascending, page, page_size = render_pager(
+            "ics", len(matched), ICS_GRID_COLUMNS, default_sort='Title'
+        )
+        share_view("ics", {'ics_tag': selected_tags}, sort_key, ascending, page, page_size, default_sort='Title')
+        view_key = dataset.view_key(selections, rows, sort_key, ascending)
+        ordered = dataset.view(selections, rows, sort_key, ascending)
+        page_df, grid_df = page_frames(dataset, view_key, ordered, ICS_GRID_COLUMNS, ICS_TRUNCATED_COLUMNS, page, page_size)
 
         # Create a form for the table
         with st.form(key="ics_competitions_form"):
-            # Add checkboxes to the dataframe
-            filtered_df['Select'] = False
-
-            # Reorder columns
-            column_order = ['Select', 'Title', 'Ages', 'Categories', 'Link']
-            filtered_df = filtered_df[column_order]
-
             # Display the data with sortable columns
             st.dataframe(
-                filtered_df,
+                grid_df,
                 column_config={
                     "Select": st.column_config.CheckboxColumn(
                         "Select",
@@ -104,7 +117,7 @@ def display_ics_competitions(ics_competitions):
 
             # Handle form submission
             if submit_button:
-                selected_rows = filtered_df[filtered_df['Select'] == True]
+                selected_rows = page_df.loc[grid_df.index[grid_df['Select'] == True]]
                 for _, row in selected_rows.iterrows():
                     summary = f"""
 ### {row['Title']}
@@ -117,17 +130,11 @@ def display_ics_competitions(ics_competitions):
 """
                     summary_container.markdown(summary)
 
-        # Add download button
-        csv = filtered_df.to_csv(index=False)
-        st.download_button(
-            label="Download ICS Competitions CSV",
-            data=csv,
-            file_name="ics_competitions.csv",
-            mime="text/csv",
-            key="ics_download_button"
-        )
+        # Export the filtered view; the file is only built on request
+        filtered_df = view_frame(dataset, view_key, ordered, ICS_GRID_COLUMNS)
+        render_export("ics", filtered_df, dataset.version, view_key, "ics_competitions")
 
         # Display summary
-        st.info(f"Found {len(ics_competitions)} ICS competitions.")
+        st.info(f"Found {len(dataset)} ICS competitions.")
     else:
         st.warning("No ICS competitions found or error occurred while scraping.") 
\ No newline at end of file
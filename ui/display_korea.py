@@ -1,51 +1,65 @@
 import streamlit as st
+import numpy as np
 import pandas as pd
-import requests
-from bs4 import BeautifulSoup
-from scraper.marketing_content_generator import generate_marketing_content
 import os
-from urllib.parse import urljoin
-import re
+from ui.table import page_frames, render_pager, view_frame
+from ui.filters import canonical_selection, restore_pager, restore_selection, share_view
+from ui.export import render_export
+from ui.duplicates import collapse_duplicates
+from ui.alerts import save_search_controls
+from scraper.detail import detail_prompt, fetch_detail_area, format_krw, get_detail
+from scraper.dataset import clean_record
+from scraper.diff import fingerprint
 
-def generate_contest_summary(contest):
-    """Generate a summary of the contest details, including scraped detail page content if possible."""
-    detail_html = None
-    detail_url = contest.get('Link')
+# Columns shipped to the grid, in display order
+KOREA_GRID_COLUMNS = ['D-Day', 'Title', 'Category', 'Organization', 'Target', 'Date Info', 'Link']
+KOREA_TRUNCATED_COLUMNS = ['Title', 'Organization', 'Target', 'Date Info']
+
+@st.cache_data(persist="disk", show_spinner=False)
+def fetch_poster(poster_url, title):
+    """Download a poster into downloaded_images/; returns its path, or None if the site has none."""
+    import requests
+    img_resp = requests.get(poster_url, timeout=10)
+    if img_resp.status_code != 200:
+        return None
+    img_dir = 'downloaded_images'
+    os.makedirs(img_dir, exist_ok=True)
+    img_filename = f"{title[:50].replace(' ', '_').replace('/', '_')}.jpg"
+    image_path = os.path.join(img_dir, img_filename)
+    with open(image_path, 'wb') as f:
+        f.write(img_resp.content)
+    return image_path
+
+@st.cache_data(persist="disk", show_spinner=False)
+def cached_marketing_content(contest_fingerprint, contest_detail):
+    """Marketing copy is only regenerated when the contest changed."""
+    from scraper.marketing_content_generator import generate_marketing_content
+    return generate_marketing_content(contest_detail)
+
+def generate_contest_summary(contest, filename):
+    """Summary of a contest plus the structured fields of its detail page.
+
+    The fields are parsed once and stored next to the snapshot (see
+    scraper.detail), so the page is only fetched again when the contest
+    changed. Returns (summary_md, fields, image_path); fields is None when the
+    page could not be fetched.
+    """
+    record = clean_record(contest)
+    fields = None
     image_path = None
-    if detail_url:
+    if contest.get('Link'):
         try:
-            resp = requests.get(detail_url, timeout=10)
-            resp.raise_for_status()
-            soup = BeautifulSoup(resp.text, 'lxml')
-            detail_area = soup.find('div', class_='view_detail_area')
-            if detail_area:
-                # Extract the main text content, preserving basic formatting
-                detail_html = detail_area.prettify()
-                # Try to extract image from <div class="img_area"><img ...>
-                img_area = detail_area.find('div', class_='img_area')
-                if img_area:
-                    img_tag = img_area.find('img')
-                    if img_tag and img_tag.has_attr('src'):
-                        img_url = img_tag['src']
-                        # Make absolute URL if needed
-                        if img_url.startswith('/'):
-                            img_url = urljoin('https://www.contestkorea.com', img_url)
-                        # Download and save image locally
-                        img_resp = requests.get(img_url, timeout=10)
-                        if img_resp.status_code == 200:
-                            img_dir = 'downloaded_images'
-                            os.makedirs(img_dir, exist_ok=True)
-                            img_filename = f"{contest['Title'][:50].replace(' ', '_').replace('/', '_')}.jpg"
-                            image_path = os.path.join(img_dir, img_filename)
-                            with open(image_path, 'wb') as f:
-                                f.write(img_resp.content)
+            fields = get_detail(filename, record)
+            if fields.get('Poster'):
+                image_path = fetch_poster(fields['Poster'], contest['Title'])
+                if image_path and not os.path.exists(image_path):
+                    # Poster was deleted from disk; fetch it again
+                    fetch_poster.clear()
+                    image_path = fetch_poster(fields['Poster'], contest['Title'])
         except Exception as e:
-            detail_html = None
+            fields = None
             image_path = None
-    if detail_html:
-        # Remove <div class="img_area">...</div> from detail_html
-        detail_html = re.sub(r'<div[^>]*class=["\"][^"\"]*img_area[^"\"]*["\"][^>]*>.*?</div>', '', detail_html, flags=re.IGNORECASE|re.DOTALL)
-        summary = f"""
+    summary = f"""
 ### {contest['Title']}
 
 **Category:** {contest['Category']}
@@ -60,114 +74,128 @@ def generate_contest_summary(contest):
 **Days Left:** {contest['D-Day']} days
 
 **Application Link:** {contest['Link']}
-
----
-
-**Contest Details:**
 """
-        return summary, detail_html, image_path
-    else:
-        # Fallback to original summary
-        summary = f"""
-### {contest['Title']}
-
-**Category:** {contest['Category']}
-
-**Organization:** {contest['Organization']}
-
-**Target Participants:** {contest['Target']}
-
-**Deadline Information:**
-{contest['Date Info']}
-
-**Days Left:** {contest['D-Day']} days
-
-**Application Link:** {contest['Link']}
-
+    if fields is None:
+        summary += f"""
 **Keywords:**
 - Category: {contest['Category']}
 - Target: {contest['Target']}
 - Application Method: Online (via contestkorea.com)
 """
-        return summary, None, None
+    return summary, fields, image_path
 
-def display_contests(contests):
-    if contests:
-        df = pd.DataFrame(contests)
-        
-        # Sort by D-Day (ascending order - smallest/most urgent first)
-        df = df.sort_values('D-Day', ascending=True)
+def render_detail_card(fields, key):
+    """Compact card of a contest's detail fields: prizes, who can enter, how, contact and schedule."""
+    awards = fields.get('Awards') or []
+    cols = st.columns(3)
+    cols[0].metric("Top prize", format_krw(fields.get('Top Prize')) or "-")
+    cols[1].metric("Total prizes", format_krw(fields.get('Prize Total')) or "-")
+    cols[2].metric("Winners", sum(a['Winners'] for a in awards) or "-")
+    lines = [
+        f"**{label}:** {fields[name]}"
+        for name, label in (('Topic', 'Topic'), ('Eligibility', 'Eligibility'),
+                            ('Submission', 'How to apply'), ('Contact', 'Contact'))
+        if fields.get(name)
+    ]
+    if lines:
+        st.markdown("  \n".join(lines))
+    if awards:
+        st.dataframe(
+            pd.DataFrame([{'Award': a['Award'], 'Winners': a['Winners'], 'Each': format_krw(a['Amount'])} for a in awards]),
+            hide_index=True, key=f"{key}_awards",
+        )
+    elif fields.get('Prizes'):
+        st.markdown(f"**Prizes:** {fields['Prizes']}")
+    if fields.get('Schedule'):
+        st.dataframe(pd.DataFrame(fields['Schedule']), hide_index=True, key=f"{key}_schedule")
+
+def clean_target(t):
+    """Clean up a target string for use as a filter option."""
+    t = t.replace('대상.', '').replace('대상 .', '').replace('대상', '').strip()
+    return t
+
+def contest_filter_options(df):
+    """Sorted category and target options for the filter form."""
+    unique_categories = sorted(df['Category'].unique())
+    unique_targets = sorted({clean_target(t) for targets in df['Target'].dropna() for t in targets.split(',') if '해당자' not in t})
+    unique_targets = [t for t in unique_targets if t]  # Remove empty strings
+    return unique_categories, unique_targets
+
+def filter_contests(df, selected_categories, selected_targets):
+    """Rows in any selected category AND with any selected target; an empty selection does not filter."""
+    def target_match(target_str):
+        if pd.isna(target_str):
+            return False
+        targets = [t.strip() for t in target_str.split(',')]
+        return any(t in selected_targets for t in targets)
+    if selected_categories and selected_targets:
+        return df[df['Category'].isin(selected_categories) & df['Target'].apply(target_match)]
+    elif selected_categories:
+        return df[df['Category'].isin(selected_categories)]
+    elif selected_targets:
+        return df[df['Target'].apply(target_match)]
+    return df
+
+def display_contests(dataset, new_ids=None, duplicates=None):
+    """Render the shared Dataset (see scraper.dataset); the session only keeps its filter state."""
+    if dataset is not None and len(dataset):
+        # "New since last visit" view, driven by the scrape change log
+        rows = None
+        if new_ids:
+            is_new = dataset.ids.isin(new_ids)
+            if st.checkbox(f"Only new since last visit ({int(is_new.sum())})", key="korea_only_new"):
+                rows = np.flatnonzero(is_new.to_numpy())
+        rows = collapse_duplicates(dataset, duplicates, "korea", "korea", rows)
         
         # Create a container for the summary
         summary_container = st.empty()
         
-        # Get unique categories for filtering
-        unique_categories = sorted(df['Category'].unique())
-        # Clean up target strings for filter options
-        def clean_target(t):
-            t = t.replace('대상.', '').replace('대상 .', '').replace('대상', '').strip()
-            return t
-        unique_targets = sorted({clean_target(t) for targets in df['Target'].dropna() for t in targets.split(',') if '해당자' not in t})
-        unique_targets = [t for t in unique_targets if t]  # Remove empty strings
+        # Get unique categories and targets for filtering (once per data version)
+        unique_categories, unique_targets = dataset.derive('filter_options', contest_filter_options, dataset.df)
         
-        # Uncheck All logic for categories and targets
-        if 'korea_uncheck_all' not in st.session_state:
-            st.session_state.korea_uncheck_all = False
-        uncheck_all = st.button("Uncheck All Filters", key="korea_uncheck_all_btn")
-        if uncheck_all:
-            st.session_state.korea_uncheck_all = True
-        else:
-            st.session_state.korea_uncheck_all = False
+        # The filter and pager state comes from the URL on a session's first run
+        restore_selection("korea_categories", "korea_category", unique_categories)
+        restore_selection("korea_targets", "korea_target", unique_targets)
+        restore_pager("korea", KOREA_GRID_COLUMNS)
+        if st.button("Clear Filters", key="korea_clear_filters"):
+            st.session_state.korea_categories = []
+            st.session_state.korea_targets = []
         
-        # Use checkboxes for each category and target, and an Apply button
+        # Widgets in a form only change when Apply is pressed; an empty selection shows everything
         st.subheader("Filter")
         with st.form(key="korea_filter_form"):
-            cat_states = {}
-            target_states = {}
-            cat_cols = st.columns(4)
-            for i, cat in enumerate(unique_categories):
-                col = cat_cols[i % 4]
-                default_checked = not st.session_state.korea_uncheck_all if f"korea_cat_{cat}" not in st.session_state else st.session_state[f"korea_cat_{cat}"]
-                cat_states[cat] = col.checkbox(cat, value=default_checked, key=f"korea_cat_{cat}")
-            target_cols = st.columns(4)
-            for i, target in enumerate(unique_targets):
-                col = target_cols[i % 4]
-                default_checked = not st.session_state.korea_uncheck_all if f"korea_target_{target}" not in st.session_state else st.session_state[f"korea_target_{target}"]
-                target_states[target] = col.checkbox(target, value=default_checked, key=f"korea_target_{target}")
-            apply_filters = st.form_submit_button("Apply Filters")
-        # Only update filtered_df when Apply Filters is pressed or Uncheck All is pressed
-        if 'korea_selected_categories' not in st.session_state or apply_filters or st.session_state.korea_uncheck_all:
-            st.session_state.korea_selected_categories = [cat for cat, checked in cat_states.items() if checked]
-            st.session_state.korea_selected_targets = [target for target, checked in target_states.items() if checked]
-        selected_categories = st.session_state.korea_selected_categories
-        selected_targets = st.session_state.korea_selected_targets
+            cols = st.columns(2)
+            cols[0].multiselect("Category", unique_categories, key="korea_categories", placeholder="All categories")
+            cols[1].multiselect("Target", unique_targets, key="korea_targets", placeholder="All targets")
+            st.form_submit_button("Apply Filters")
+        selected_categories = canonical_selection(st.session_state.korea_categories, unique_categories)
+        selected_targets = canonical_selection(st.session_state.korea_targets, unique_targets)
+        selections = {'Category': selected_categories, 'Target': selected_targets}
+        save_search_controls(dataset.filename, selections, "korea")
         
-        # Filter dataframe by selected categories AND selected targets
-        def target_match(target_str):
-            if pd.isna(target_str):
-                return False
-            targets = [t.strip() for t in target_str.split(',')]
-            return any(t in selected_targets for t in targets)
-        if selected_categories and selected_targets:
-            filtered_df = df[df['Category'].isin(selected_categories) & df['Target'].apply(target_match)].copy()
-        elif selected_categories:
-            filtered_df = df[df['Category'].isin(selected_categories)].copy()
-        elif selected_targets:
-            filtered_df = df[df['Target'].apply(target_match)].copy()
-        else:
-            filtered_df = df.copy()
+        # Filter by selected categories AND selected targets, through the shared indexes;
+        # views are memoized on the dataset, so an unchanged view costs nothing
+        matched = dataset.view(selections, rows)
         
         # Display contest count
-        st.subheader(f"Showing {len(filtered_df)} contests")
+        st.subheader(f"Showing {len(matched)} contests")
+        
+        # Sort the whole result (default: smallest/most urgent D-Day first), then
+        # ship only the current page, with long text cut, to the browser
+        sort_key, ascending, page, page_size = render_pager(
+            "korea", len(matched), KOREA_GRID_COLUMNS, default_sort='D-Day'
+        )
+        share_view("korea", {'korea_category': selected_categories, 'korea_target': selected_targets},
+                   sort_key, ascending, page, page_size, default_sort='D-Day')
+        view_key = dataset.view_key(selections, rows, sort_key, ascending)
+        ordered = dataset.view(selections, rows, sort_key, ascending)
+        page_df, grid_df = page_frames(dataset, view_key, ordered, KOREA_GRID_COLUMNS, KOREA_TRUNCATED_COLUMNS, page, page_size)
         
         # Create a form for the table
         selected_rows = pd.DataFrame()
         with st.form(key="contests_form"):
-            filtered_df['Select'] = False
-            column_order = ['Select', 'D-Day', 'Title', 'Category', 'Organization', 'Target', 'Date Info', 'Link']
-            filtered_df = filtered_df[column_order]
             edited_df = st.data_editor(
-                filtered_df,
+                grid_df,
                 column_config={
                     "Select": st.column_config.CheckboxColumn(
                         "Select",
@@ -204,13 +232,15 @@ def display_contests(contests):
                         help="Contest link",
                     ),
                 },
+                disabled=KOREA_GRID_COLUMNS,
                 hide_index=True,
                 use_container_width=True,
                 key="korea_data_editor"
             )
             submit_button = st.form_submit_button("View Selected Summary")
             if submit_button:
-                selected_rows = edited_df[edited_df['Select'] == True]
+                # Look the full, untruncated rows up by index
+                selected_rows = page_df.loc[edited_df.index[edited_df['Select'] == True]]
                 st.session_state['selected_rows'] = selected_rows
         # After the form, retrieve selected_rows from session state if available
         if 'selected_rows' in st.session_state:
@@ -222,11 +252,11 @@ def display_contests(contests):
             selected_rows = pd.DataFrame(selected_rows)
         if not selected_rows.empty:
             for idx, row in selected_rows.iterrows():
-                summary, detail_html, image_path = generate_contest_summary(row)
+                summary, fields, image_path = generate_contest_summary(row, dataset.filename)
                 summary_container.markdown(summary)
-                if detail_html:
-                    st.success("Contest detail page scraped successfully.")
-                    st.markdown(detail_html, unsafe_allow_html=True)
+                if fields is not None:
+                    st.success("Contest details loaded.")
+                    render_detail_card(fields, f"korea_detail_{idx}")
                     if image_path:
                         img_key = f"show_full_{row['Title']}"
                         if img_key not in st.session_state:
@@ -239,13 +269,24 @@ def display_contests(contests):
                             st.image(image_path, caption="Contest Poster (click button to shrink)")
                         else:
                             st.image(image_path, caption="Contest Poster (click button to enlarge)", width=200)
+                    # The original page is only fetched on request; the card above covers the usual questions
+                    if st.button(f"Show original detail page: {row['Title']}", key=f"raw_detail_{row['Title']}_{idx}"):
+                        with st.spinner("Fetching the detail page..."):
+                            try:
+                                detail_html = fetch_detail_area(row['Link'])
+                            except Exception as e:
+                                detail_html = None
+                                st.error(f"Could not fetch the detail page: {e}")
+                        if detail_html:
+                            st.markdown(detail_html, unsafe_allow_html=True)
                     # Add a debug log to confirm this code path is reached
                     st.info(f"[DEBUG] Ready to show Generate Marketing Content button for {row['Title']} (idx={idx})")
                     if st.button(f"Generate Marketing Content for {row['Title']}", key=f"marketing_btn_{row['Title']}_{idx}"):
                         st.info("[DEBUG] Button pressed. Calling generate_marketing_content...")
                         with st.spinner("Generating marketing content with OpenAI..."):
                             try:
-                                marketing_result = generate_marketing_content(detail_html)
+                                contest = clean_record(row)
+                                marketing_result = cached_marketing_content(fingerprint(contest), detail_prompt(contest, fields))
                                 st.success("[DEBUG] OpenAI API call succeeded.")
                                 st.subheader("Marketing Content")
                                 st.json(marketing_result)
@@ -254,17 +295,11 @@ def display_contests(contests):
                 else:
                     st.warning("Could not scrape contest detail page. Showing basic info only.")
         
-        # Add download button
-        csv = filtered_df.to_csv(index=False)
-        st.download_button(
-            label="Download CSV",
-            data=csv,
-            file_name="contests.csv",
-            mime="text/csv",
-            key=f"download_button_{st.session_state.filter_counter}"
-        )
+        # Export the filtered view; the file is only built on request
+        filtered_df = view_frame(dataset, view_key, ordered, KOREA_GRID_COLUMNS)
+        render_export("korea", filtered_df, dataset.version, view_key, "contests")
         
         # Display summary
-        st.info(f"Found {len(contests)} contests across all pages.")
+        st.info(f"Found {len(dataset)} contests across all pages.")
     else:
         st.warning("No contests found or error occurred while scraping.") 
\ No newline at end of file
@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+
+def collapse_duplicates(dataset, duplicates, source, key, rows=None):
+    """Row positions to show with repeat listings of a contest collapsed into its first one.
+
+    rows (positions or None for all) narrows the result; a checkbox lets the
+    user show the repeats again.
+    """
+    if duplicates is None or not len(duplicates) or not len(dataset):
+        return rows
+    hidden = dataset.derive(('collapsed', source, duplicates.version), duplicates.collapsed, source, dataset.ids)
+    if not len(hidden):
+        return rows
+    if not st.checkbox(f"Collapse duplicate listings ({len(hidden)} hidden)", value=True, key=f"{key}_collapse_duplicates"):
+        return rows
+    visible = np.setdiff1d(np.arange(len(dataset)), hidden, assume_unique=True)
+    return visible if rows is None else np.intersect1d(rows, visible, assume_unique=True)
+
+
+def positions_by_id(ids):
+    return {rid: pos for pos, rid in enumerate(ids)}
+
+
+def display_cross_listed(duplicates, datasets):
+    """Contests listed on more than one site; datasets maps dedupe source names to Datasets."""
+    if duplicates is None or not len(duplicates):
+        return
+    # Only the records in clusters are looked up, so a mapped dataset is not turned into dicts
+    positions = {
+        source: dataset.derive('positions_by_id', positions_by_id, dataset.ids)
+        for source, dataset in datasets.items()
+    }
+    rows, groups = [], 0
+    for members in duplicates.clusters:
+        found = []
+        for member in members:
+            source, _, rid = member.partition(":")
+            pos = positions.get(source, {}).get(rid)
+            if pos is not None:
+                found.append((source, datasets[source].record(pos)))
+        if len({source for source, _ in found}) < 2:
+            continue
+        groups += 1
+        rows.extend(
+            {'Group': groups, 'Site': source, 'Title': record.get('Title'), 'Link': record.get('Link')}
+            for source, record in found
+        )
+    if rows:
+        with st.expander(f"Listed on more than one site ({groups})"):
+            st.dataframe(pd.DataFrame(rows), hide_index=True, use_container_width=True,
+                         column_config={'Link': st.column_config.LinkColumn('Link')})
@@ -0,0 +1,70 @@
+import io
+import streamlit as st
+
+# Label -> (file extension, mime type)
+EXPORT_FORMATS = {
+    "CSV": ("csv", "text/csv"),
+    "Parquet": ("parquet", "application/vnd.apache.parquet"),
+    "Arrow IPC": ("arrow", "application/vnd.apache.arrow.file"),
+}
+CSV_CHUNK_ROWS = 5000
+
+
+def iter_csv(df, chunk_rows=CSV_CHUNK_ROWS):
+    """Yield a DataFrame as UTF-8 CSV bytes, a chunk of rows at a time."""
+    for start in range(0, max(len(df), 1), chunk_rows):
+        chunk = df.iloc[start:start + chunk_rows]
+        yield chunk.to_csv(index=False, header=start == 0).encode("utf-8")
+
+
+def to_parquet_bytes(df):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    buf = io.BytesIO()
+    pq.write_table(pa.Table.from_pandas(df, preserve_index=False), buf, compression="zstd")
+    return buf.getvalue()
+
+
+def to_arrow_bytes(df):
+    import pyarrow as pa
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def build_export(fmt, version, signature, _df):
+    """Serialize a filtered view. Memoized per (format, dataset version, filter signature)."""
+    if fmt == "Parquet":
+        return to_parquet_bytes(_df)
+    if fmt == "Arrow IPC":
+        return to_arrow_bytes(_df)
+    return b"".join(iter_csv(_df))
+
+
+def render_export(key_prefix, df, version, signature, file_stem):
+    """Draw export controls; bytes are only built after the user asks for them."""
+    cols = st.columns([1, 1, 2])
+    fmt = cols[0].selectbox("Export format", list(EXPORT_FORMATS), key=f"{key_prefix}_export_format")
+    request = (fmt, version, signature)
+    requested_key = f"{key_prefix}_export_request"
+    if cols[1].button("Prepare download", key=f"{key_prefix}_export_prepare"):
+        st.session_state[requested_key] = request
+    # Only arm the download button for the view the user actually asked for
+    if st.session_state.get(requested_key) != request:
+        return
+    ext, mime = EXPORT_FORMATS[fmt]
+    try:
+        data = build_export(fmt, version, signature, df)
+    except ImportError:
+        cols[2].warning(f"{fmt} export needs pyarrow. Install it with `pip install pyarrow`.")
+        return
+    cols[2].download_button(
+        label=f"Download {fmt}",
+        data=data,
+        file_name=f"{file_stem}.{ext}",
+        mime=mime,
+        key=f"{key_prefix}_download_button",
+    )
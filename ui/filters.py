@@ -0,0 +1,60 @@
+import streamlit as st
+
+from ui.table import DEFAULT_PAGE_SIZE, PAGE_SIZE_OPTIONS
+
+ORDER_OPTIONS = ["Ascending", "Descending"]
+
+
+def canonical_selection(values, options):
+    """Sorted selection; selecting every option is the same view as selecting none."""
+    values = sorted(set(values))
+    return [] if set(options) <= set(values) else values
+
+
+def restore_selection(key, param, options):
+    """Seed a multiselect from repeated ?param= values on a session's first run.
+
+    Values the data no longer offers are dropped, so an old link still opens.
+    """
+    if key not in st.session_state and param in st.query_params:
+        allowed = set(options)
+        st.session_state[key] = [v for v in dict.fromkeys(st.query_params.get_all(param)) if v in allowed]
+
+
+def restore_choice(key, param, options=None, cast=str):
+    """Seed a single-value widget from ?param= on a session's first run, if the value is valid."""
+    if key in st.session_state or param not in st.query_params:
+        return
+    try:
+        value = cast(st.query_params[param])
+    except ValueError:
+        return
+    if options is None or value in options:
+        st.session_state[key] = value
+
+
+def restore_pager(key_prefix, sort_options):
+    """Seed the render_pager() widgets from the URL (see share_view)."""
+    restore_choice(f"{key_prefix}_sort_key", f"{key_prefix}_sort", sort_options)
+    restore_choice(f"{key_prefix}_sort_order", f"{key_prefix}_order", ORDER_OPTIONS)
+    restore_choice(f"{key_prefix}_page_size", f"{key_prefix}_size", PAGE_SIZE_OPTIONS, int)
+    restore_choice(f"{key_prefix}_page", f"{key_prefix}_page", cast=int)
+
+
+def share_view(key_prefix, selections, sort_key, ascending, page, page_size, default_sort):
+    """Keep the URL in step with a view, so it can be shared and survives a reload.
+
+    selections maps query parameter names to canonical selections. Values at
+    their defaults are left out, which keeps links short.
+    """
+    params = {param: values for param, values in selections.items()}
+    params[f"{key_prefix}_sort"] = [] if sort_key == default_sort else [sort_key]
+    params[f"{key_prefix}_order"] = [] if ascending else [ORDER_OPTIONS[1]]
+    params[f"{key_prefix}_size"] = [] if page_size == DEFAULT_PAGE_SIZE else [str(page_size)]
+    params[f"{key_prefix}_page"] = [] if page == 1 else [str(page)]
+    for param, values in params.items():
+        if not values:
+            if param in st.query_params:
+                del st.query_params[param]
+        elif st.query_params.get_all(param) != list(values):
+            st.query_params[param] = list(values)
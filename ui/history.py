@@ -0,0 +1,53 @@
+from datetime import date
+import pandas as pd
+import streamlit as st
+from scraper.dataset import file_version
+from scraper.history import compare_snapshots, list_snapshots, manifest_path
+
+LATEST, AS_OF, COMPARE = "Latest", "As of a date", "Compare two dates"
+
+def history_controls(filename, label, key):
+    """Sidebar controls for a data file's history: (mode, None | date | (before, after))."""
+    snapshots = list_snapshots(filename)
+    if not snapshots:
+        return LATEST, None
+    first = date.fromisoformat(snapshots[0]['scraped_at'][:10])
+    last = date.fromisoformat(snapshots[-1]['scraped_at'][:10])
+    with st.sidebar.expander(f"{label} history ({len(snapshots)} scrapes)"):
+        mode = st.radio("View", [LATEST, AS_OF, COMPARE], key=f"{key}_history_mode")
+        bounds = {'min_value': first, 'max_value': last}
+        if mode == AS_OF:
+            return mode, st.date_input("As of", value=last, key=f"{key}_as_of", **bounds)
+        if mode == COMPARE:
+            before = st.date_input("From", value=first, key=f"{key}_compare_from", **bounds)
+            after = st.date_input("To", value=last, key=f"{key}_compare_to", **bounds)
+            return mode, (before, after)
+    return LATEST, None
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def cached_comparison(filename, before, after, manifest_version):
+    """compare_snapshots as DataFrames; manifest_version invalidates it when a scrape is archived."""
+    diff = compare_snapshots(filename, before, after)
+    changed = pd.DataFrame([
+        {**c['record'], 'Changed fields': ", ".join(sorted(c['fields']))} for c in diff['changed']
+    ])
+    return pd.DataFrame(diff['added']), pd.DataFrame(diff['removed']), changed
+
+def display_comparison(filename, label, before, after):
+    """What was added, removed and changed in a data file between two dates."""
+    try:
+        added, removed, changed = cached_comparison(
+            filename, before.isoformat(), after.isoformat(), file_version(manifest_path(filename))
+        )
+    except LookupError as e:
+        st.warning(str(e))
+        return
+    st.subheader(f"{label}: {before} → {after}")
+    cols = st.columns(3)
+    cols[0].metric("Added", len(added))
+    cols[1].metric("Removed", len(removed))
+    cols[2].metric("Changed", len(changed))
+    for title, df in (("Added", added), ("Removed", removed), ("Changed", changed)):
+        if len(df):
+            with st.expander(f"{title} ({len(df)})"):
+                st.dataframe(df, hide_index=True, use_container_width=True)
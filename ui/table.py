@@ -0,0 +1,93 @@
+import math
+import streamlit as st
+
+PAGE_SIZE_OPTIONS = [25, 50, 100, 200]
+DEFAULT_PAGE_SIZE = 50
+# Long free-text cells are cut to this many characters in the grid; the full
+# value is still available in the summary view.
+MAX_CELL_CHARS = 60
+
+
+def truncate_text(df, columns, max_chars=MAX_CELL_CHARS):
+    """Cut long text cells so the grid payload stays small."""
+    df = df.copy()
+    for col in columns:
+        if col in df.columns:
+            # Replace the whole column: a Categorical one (see scraper.columnar) takes no new values
+            values = df[col].astype('string')
+            too_long = values.str.len() > max_chars
+            df[col] = values.where(~too_long, values.str.slice(0, max_chars - 1) + '…')
+    return df
+
+
+def _index_kwargs(key, index):
+    # A widget whose value was already set through session state (e.g. from
+    # the URL) must not also get a default
+    return {} if key in st.session_state else {'index': index}
+
+
+def view_frame(dataset, view_key, positions, columns):
+    """The rows of a Dataset view (see Dataset.view) as a DataFrame; memoized per view."""
+    return dataset.memo(('frame', view_key, tuple(columns)), _view_frame, dataset.df, positions, columns)
+
+
+def _view_frame(df, positions, columns):
+    return df.iloc[positions][columns]
+
+
+def page_frames(dataset, view_key, positions, columns, truncated_columns, page, page_size):
+    """(page_df, grid_df) for one page of a Dataset view; memoized per view and page.
+
+    grid_df has long text cut and a leading 'Select' column; page_df keeps the
+    full values for looking selected rows up.
+    """
+    return dataset.memo(
+        ('page', view_key, tuple(columns), page, page_size),
+        _page_frames, dataset.df, positions, columns, truncated_columns, page, page_size,
+    )
+
+
+def _page_frames(df, positions, columns, truncated_columns, page, page_size):
+    total_pages = max(1, math.ceil(len(positions) / page_size))
+    page = min(max(1, page), total_pages)
+    start = (page - 1) * page_size
+    page_df = df.iloc[positions[start:start + page_size]][columns]
+    grid_df = truncate_text(page_df, truncated_columns)
+    grid_df.insert(0, 'Select', False)
+    return page_df, grid_df
+
+
+def render_pager(key_prefix, total_rows, sort_options, default_sort, default_ascending=True):
+    """Draw sort and paging controls and return (sort_key, ascending, page, page_size)."""
+    cols = st.columns(4)
+    sort_key = cols[0].selectbox(
+        "Sort by",
+        sort_options,
+        key=f"{key_prefix}_sort_key",
+        **_index_kwargs(f"{key_prefix}_sort_key", sort_options.index(default_sort)),
+    )
+    order = cols[1].selectbox(
+        "Order",
+        ["Ascending", "Descending"],
+        key=f"{key_prefix}_sort_order",
+        **_index_kwargs(f"{key_prefix}_sort_order", 0 if default_ascending else 1),
+    )
+    page_size = cols[2].selectbox(
+        "Rows per page",
+        PAGE_SIZE_OPTIONS,
+        key=f"{key_prefix}_page_size",
+        **_index_kwargs(f"{key_prefix}_page_size", PAGE_SIZE_OPTIONS.index(DEFAULT_PAGE_SIZE)),
+    )
+    total_pages = max(1, math.ceil(total_rows / page_size))
+    page_key = f"{key_prefix}_page"
+    # Clamp a page number left over from a larger result set
+    if st.session_state.get(page_key, 1) > total_pages:
+        st.session_state[page_key] = total_pages
+    page = cols[3].number_input(
+        f"Page (of {total_pages})",
+        min_value=1,
+        max_value=total_pages,
+        step=1,
+        key=page_key,
+    )
+    return sort_key, order == "Ascending", int(page), page_size